@@ -0,0 +1,109 @@
+"""Benchmark point-in-alert lookups with the R-tree in mcp/alert_geo.py.
+
+Builds a synthetic snapshot shaped like a busy day: a few thousand
+zone-only alerts referencing a grid of zone boundaries plus polygon
+warnings, then compares AlertLocator.find with testing every shape.
+
+    python bench/bench_alert_geo.py --zones 4000 --warnings 300
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+
+from alert_geo import AlertLocator, ZoneBoundaryStore, contains, polygons
+from alert_index import AlertSnapshot
+
+
+def circle(lon: float, lat: float, radius: float, points: int = 48) -> dict:
+    angles = [2 * math.pi * i / points for i in range(points)]
+    ring = [[lon + radius * math.cos(a), lat + radius * math.sin(a)] for a in angles]
+    return {"type": "Polygon", "coordinates": [ring + ring[:1]]}
+
+
+def zone_polygon(lon: float, lat: float, size: float, points: int = 40) -> dict:
+    """A square zone with `points` vertices, closer to real boundaries than 4 corners."""
+    side = points // 4
+    ring = (
+        [[lon + size * i / side, lat] for i in range(side)]
+        + [[lon + size, lat + size * i / side] for i in range(side)]
+        + [[lon + size - size * i / side, lat + size] for i in range(side)]
+        + [[lon, lat + size - size * i / side] for i in range(side)]
+    )
+    return {"type": "Polygon", "coordinates": [ring + ring[:1]]}
+
+
+def build(args, rng: random.Random) -> tuple[AlertSnapshot, ZoneBoundaryStore]:
+    zones = ZoneBoundaryStore(":memory:")
+    columns = int(math.sqrt(args.zones * 2))
+    codes = []
+    for n in range(args.zones):
+        code = f"XXZ{n:04d}"
+        lon, lat = -125 + 0.5 * (n % columns), 25 + 0.5 * (n // columns)
+        zones.put(code, zone_polygon(lon, lat, 0.5))
+        codes.append(code)
+
+    features = []
+    for n in range(args.alerts):
+        covered = rng.sample(codes, rng.randint(1, 12))
+        features.append(
+            {"id": f"a{n}", "geometry": None, "properties": {"geocode": {"UGC": covered}}}
+        )
+    for n in range(args.warnings):
+        geometry = circle(rng.uniform(-125, -70), rng.uniform(25, 49), rng.uniform(0.05, 0.4))
+        features.append(
+            {"id": f"w{n}", "geometry": geometry, "properties": {"geocode": {"UGC": []}}}
+        )
+    return AlertSnapshot.build({"features": features}), zones
+
+
+def linear_find(snapshot: AlertSnapshot, zones: ZoneBoundaryStore, lat: float, lon: float) -> list:
+    found = []
+    for feature in snapshot.features:
+        shapes = polygons(feature.get("geometry")) or [
+            polygon
+            for code in feature["properties"]["geocode"]["UGC"]
+            for polygon in zones.get(code) or []
+        ]
+        if any(contains(polygon, lon, lat) for polygon in shapes):
+            found.append(feature)
+    return found
+
+
+def main(args) -> None:
+    rng = random.Random(0)
+    snapshot, zones = build(args, rng)
+    start = time.perf_counter()
+    locator = AlertLocator(snapshot, zones)
+    print(f"index {len(locator.tree)} shapes in {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    points = [(rng.uniform(25, 49), rng.uniform(-125, -70)) for _ in range(args.queries)]
+    start = time.perf_counter()
+    indexed = [locator.find(lat, lon) for lat, lon in points]
+    tree = (time.perf_counter() - start) / len(points)
+
+    sample = points[:max(len(points) // 20, 1)]
+    start = time.perf_counter()
+    scanned = [linear_find(snapshot, zones, lat, lon) for lat, lon in sample]
+    scan = (time.perf_counter() - start) / len(sample)
+    assert scanned == indexed[:len(sample)]
+
+    hits = sum(map(len, indexed)) / len(indexed)
+    print(
+        f"R-tree {tree * 1e6:.1f} us   linear scan {scan * 1e6:.0f} us"
+        f"   ({scan / tree:.0f}x, {hits:.1f} alerts per point)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--zones", type=int, default=4000)
+    parser.add_argument("--alerts", type=int, default=1500)
+    parser.add_argument("--warnings", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=2000)
+    main(parser.parse_args())
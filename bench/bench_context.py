@@ -0,0 +1,125 @@
+"""Benchmark the chat context builder on a large alert feed.
+
+Compares the prompt the chat tab used to build, every alert formatted in
+full and concatenated, with client/context_builder.py at a few token
+budgets. Uses a recorded feed when given (bench/record_nws.py writes
+alerts_active.json), else a synthetic outbreak where the same warning
+text is issued for many zones.
+
+    python bench/bench_context.py --feed bench/recordings/alerts_active.json
+    python bench/bench_context.py --llm   # also time real answers (needs GROQ_API_KEY)
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "client"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+
+from context_builder import Section, build_context, estimate_tokens
+from models import alert_record
+
+QUESTION = "Are there any dangerous weather alerts I should know about, and what should I do?"
+
+EVENTS = [
+    ("Tornado Warning", "Extreme", "Immediate"),
+    ("Severe Thunderstorm Warning", "Severe", "Immediate"),
+    ("Flash Flood Warning", "Severe", "Expected"),
+    ("Tornado Watch", "Severe", "Future"),
+    ("Wind Advisory", "Moderate", "Expected"),
+    ("Special Weather Statement", "Minor", "Expected"),
+]
+
+
+def synthetic_outbreak(alerts: int, texts: int, rng: random.Random) -> dict:
+    """An alert feed where `alerts` alerts share `texts` distinct bodies."""
+    bodies = []
+    for n in range(texts):
+        event, severity, urgency = EVENTS[n % len(EVENTS)]
+        paragraph = (
+            f"* WHAT...{event} conditions with damaging winds up to {50 + n} mph and "
+            "quarter size hail. Tornadoes are possible. Travel could be very difficult. "
+        )
+        instruction = "Move to an interior room on the lowest floor of a sturdy building. "
+        bodies.append((event, severity, urgency, paragraph * 6, instruction * 3))
+    features = []
+    for n in range(alerts):
+        event, severity, urgency, description, instruction = bodies[rng.randrange(texts)]
+        features.append({"id": f"urn:oid:bench.{n}", "properties": {
+            "id": f"urn:oid:bench.{n}", "event": event, "severity": severity, "urgency": urgency,
+            "headline": f"{event} issued by NWS", "areaDesc": f"County {n}; County {n + 1}",
+            "expires": f"2025-05-01T{n % 24:02d}:00:00+00:00",
+            "description": description, "instruction": instruction,
+        }})
+    return {"features": features}
+
+
+def naive_context(features: list[dict]) -> str:
+    """What the chat tab sent before: every alert in full (mcp/weather.py format_alert)."""
+    parts = []
+    for feature in features:
+        props = feature["properties"]
+        parts.append(
+            f"\nEvent: {props.get('event', 'Unknown')}\nArea: {props.get('areaDesc', 'Unknown')}\n"
+            f"Severity: {props.get('severity', 'Unknown')}\n"
+            f"Description: {props.get('description', 'No description available')}\n"
+            f"Instructions: {props.get('instruction', 'No specific instructions provided')}\n"
+        )
+    return "\n\n=== Weather Alerts ===\n" + "\n---\n".join(parts)
+
+
+def time_answer(context: str) -> float:
+    from groq import Groq
+
+    client = Groq(api_key=os.environ["GROQ_API_KEY"])
+    start = time.perf_counter()
+    client.chat.completions.create(
+        model="openai/gpt-oss-120b",
+        messages=[
+            {"role": "system", "content": f"You are a weather assistant. Data:{context}"},
+            {"role": "user", "content": QUESTION},
+        ],
+        max_tokens=512,
+    )
+    return time.perf_counter() - start
+
+
+def main(args) -> None:
+    if args.feed:
+        with open(args.feed, "rb") as f:
+            feed = json.load(f)
+    else:
+        feed = synthetic_outbreak(args.alerts, args.texts, random.Random(0))
+    features = feed.get("features", [])
+    records = [alert_record(feature) for feature in features]
+    print(f"{len(features)} alerts")
+
+    start = time.perf_counter()
+    rows = [("naive", naive_context(features), time.perf_counter() - start)]
+    for budget in args.budgets:
+        start = time.perf_counter()
+        context = build_context([Section("all states", alerts=records)], budget)
+        rows.append((f"budget {budget}", context, time.perf_counter() - start))
+
+    for name, context, seconds in rows:
+        line = (
+            f"{name:<13} {len(context) / 1e3:>8.1f} kB  ~{estimate_tokens(context):>7} tokens"
+            f"   build {seconds * 1e3:>6.1f} ms"
+        )
+        if args.llm:
+            line += f"   answer {time_answer(context):.2f} s"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feed", help="recorded /alerts/active response")
+    parser.add_argument("--alerts", type=int, default=400)
+    parser.add_argument("--texts", type=int, default=40)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[1500, 3000, 6000])
+    parser.add_argument("--llm", action="store_true", help="time answers with the Groq API")
+    main(parser.parse_args())
@@ -0,0 +1,64 @@
+"""Benchmark location matching in chat prompts as the gazetteer grows.
+
+Compares the original approach, a substring test per known name, with
+the compiled Aho-Corasick matcher in client/gazetteer.py on gazetteers
+of increasing size taken from the packed file.
+
+    python bench/bench_gazetteer.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "client"))
+
+from gazetteer import GAZETTEER_PATH, Gazetteer
+
+PROMPTS = [
+    "What are the current weather alerts for California? Also get me the forecast for New York City.",
+    "Will it rain in Portland, ME this weekend, and is there anything severe heading for Boston?",
+    "Should I pack warm clothes for Chicago and Minneapolis next week, or is Denver warmer?",
+    "Any tornado warnings in Oklahoma? My parents live near Tulsa, OK and drive to Wichita often.",
+]
+
+
+def substring_scan(names: list[str], prompt: str) -> list[str]:
+    prompt_lower = prompt.lower()
+    return [name for name in names if name in prompt_lower]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for prompt in PROMPTS:
+            fn(prompt)
+    return (time.perf_counter() - start) / (repeat * len(PROMPTS))
+
+
+def main(args) -> None:
+    start = time.perf_counter()
+    full = Gazetteer.load()
+    print(
+        f"load + compile {time.perf_counter() - start:.2f} s "
+        f"({os.path.getsize(GAZETTEER_PATH) / 1e3:.0f} kB packed, {len(full.automaton)} states)"
+    )
+
+    keys = sorted(full.places, key=lambda key: -full.places[key][0].population)
+    for size in (100, 1_000, 10_000, len(keys)):
+        subset = {key: full.places[key] for key in keys[:size]}
+        gazetteer = Gazetteer(full.states, subset)
+        names = [*subset, *(name.lower() for name in full.states.values())]
+        scan = timed(lambda prompt: substring_scan(names, prompt), args.repeat)
+        matched = timed(gazetteer.find, args.repeat)
+        print(
+            f"{size:>6} places   substring scan {scan * 1e6:>8.1f} us"
+            f"   automaton {matched * 1e6:>7.1f} us   ({scan / matched:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""Benchmark per-call httpx clients against the shared pooled client.
+
+Drives the same points -> forecast sequence that get_forecast performs
+against the local stub NWS server and reports requests/sec and latency
+percentiles for both strategies.
+
+    python bench/bench_http_client.py --requests 2000 --concurrency 50
+
+Note the stub speaks plain HTTP, so the "before" numbers do not include
+the TLS handshake the real api.weather.gov costs; real-world gains are
+larger than what this shows.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_nws import StubServer
+
+
+async def per_call_fetch(url: str) -> dict | None:
+    """The original make_nws_request: a fresh client for every call."""
+    import httpx
+
+    headers = {"User-Agent": "weather-app/1.0", "Accept": "application/geo+json"}
+    async with httpx.AsyncClient() as client:
+        try:
+            response = await client.get(url, headers=headers, timeout=30.0)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            return None
+
+
+async def run(fetch, base_url: str, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            points = await fetch(f"{base_url}/points/40.{i % 100:02d},-74.00")
+            await fetch(points["properties"]["forecast"])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": 2 * total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def report(label: str, result: dict) -> None:
+    print(
+        f"{label:<10} {result['rps']:>10.0f} req/s"
+        f"   p50 {result['p50_ms']:>7.2f} ms   p99 {result['p99_ms']:>7.2f} ms"
+    )
+
+
+async def main(args) -> None:
+    with StubServer(port=args.port, latency=args.latency) as stub:
+        os.environ["NWS_API_BASE"] = stub.base_url
+        # Measure the connection pool alone, not the response cache
+        os.environ["NWS_CACHE_MAX_BYTES"] = "0"
+        os.environ["NWS_GRIDPOINT_DB"] = ":memory:"
+        os.environ["NWS_ZONE_DB"] = ":memory:"
+        os.environ["NWS_OBSERVATIONS_DB"] = ":memory:"
+        import weather
+
+        before = await run(per_call_fetch, stub.base_url, args.requests, args.concurrency)
+        async with weather.lifespan(weather.mcp):
+            after = await run(
+                weather.make_nws_request, stub.base_url, args.requests, args.concurrency
+            )
+
+    report("per-call", before)
+    report("pooled", after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8900)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""Measure the overhead of metrics instrumentation on tool calls.
+
+Calls get_forecast through an in-memory MCP client against the stub NWS
+API, once with WEATHER_METRICS=0 and once with WEATHER_METRICS=1. Each
+run is its own subprocess because the setting is read at import time.
+Responses are cached after the first call, so the measured path is the
+hot one where instrumentation costs show the most.
+
+    python bench/bench_metrics.py --calls 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+async def measure(base_url: str, calls: int) -> dict:
+    from fastmcp import Client
+
+    import weather
+
+    weather.NWS_API_BASE = base_url
+    arguments = {"latitude": 40.7128, "longitude": -74.006}
+    async with Client(weather.mcp) as client:
+        await client.call_tool("get_forecast", arguments)
+        latencies = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            await client.call_tool("get_forecast", arguments)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "mean_us": sum(latencies) / len(latencies) * 1e6,
+    }
+
+
+def worker(calls: int, port: int) -> dict:
+    from stub_nws import StubServer
+
+    with StubServer(port=port, max_age=3600) as stub:
+        return asyncio.run(measure(stub.base_url, calls))
+
+
+def main(args) -> None:
+    results = {}
+    for enabled in ("0", "1"):
+        env = {
+            **os.environ,
+            "WEATHER_METRICS": enabled,
+            "NWS_GRIDPOINT_DB": ":memory:",
+            "NWS_ZONE_DB": ":memory:",
+            "NWS_OBSERVATIONS_DB": ":memory:",
+            "NWS_ALERTS_SNAPSHOT": "0",
+        }
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", str(args.calls), str(args.port)],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+        results[enabled] = result = json.loads(output.splitlines()[-1])
+        label = "metrics on" if enabled == "1" else "metrics off"
+        print(
+            f"{label:<12} p50 {result['p50_us']:>8.1f} us   p99 {result['p99_us']:>8.1f} us"
+            f"   mean {result['mean_us']:>8.1f} us"
+        )
+
+    overhead = results["1"]["mean_us"] - results["0"]["mean_us"]
+    print(f"overhead     {overhead:+.1f} us per call ({overhead / results['0']['mean_us']:+.1%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8930)
+    parser.add_argument("--worker", nargs=2, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(worker(*args.worker)))
+    else:
+        main(args)
@@ -0,0 +1,105 @@
+"""Benchmark observation history queries with and without the local store.
+
+Runs a stream of overlapping history queries (random 1-3 day windows in
+the past week, summarized per hour) against the stub NWS server, first
+downloading every window as before and then through the observation
+store in mcp/observations.py, and reports upstream requests, observation
+rows downloaded and latency for both.
+
+    python bench/bench_observations.py --queries 200 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_nws import StubServer
+
+HOUR = 3600
+
+
+def windows(count: int, rng: random.Random) -> list[tuple[int, int]]:
+    now = int(time.time())
+    result = []
+    for _ in range(count):
+        end = now - rng.randint(0, 6 * 24) * HOUR
+        result.append((end - rng.randint(24, 72) * HOUR, end))
+    return result
+
+
+async def run(query, queries: list[tuple[int, int]], stub: StubServer) -> dict:
+    before = stub.requests["observations"]
+    rows = 0
+    latencies = []
+    for start, end in queries:
+        began = time.perf_counter()
+        rows += await query(start, end)
+        latencies.append(time.perf_counter() - began)
+    latencies.sort()
+    return {
+        "requests": stub.requests["observations"] - before,
+        "rows": rows,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "total_s": sum(latencies),
+    }
+
+
+def report(label: str, result: dict) -> None:
+    print(
+        f"{label:<10} {result['requests']:>6} upstream requests"
+        f"   p50 {result['p50_ms']:>7.2f} ms   p95 {result['p95_ms']:>7.2f} ms"
+        f"   total {result['total_s']:>6.2f} s"
+    )
+
+
+async def main(args) -> None:
+    with StubServer(port=args.port, latency=args.latency) as stub:
+        os.environ["NWS_API_BASE"] = stub.base_url
+        # Measure the store alone, not the response cache
+        os.environ["NWS_CACHE_MAX_BYTES"] = "0"
+        os.environ["NWS_OBSERVATIONS_DB"] = ":memory:"
+        os.environ["NWS_GRIDPOINT_DB"] = ":memory:"
+        os.environ["NWS_ZONE_DB"] = ":memory:"
+        import weather
+        from observations import observation_columns
+
+        queries = windows(args.queries, random.Random(args.seed))
+        station = await weather.station_for_point(args.lat, args.lon)
+
+        async def download(start: int, end: int) -> int:
+            segment = await weather.fetch_observations(station.identifier, start, end)
+            observation_columns(station, segment, ["temperature"], "hour", "json")
+            return len(segment)
+
+        async def stored(start: int, end: int) -> int:
+            _, segment = await weather.observations_for_point(args.lat, args.lon, start, end)
+            observation_columns(station, segment, ["temperature"], "hour", "json")
+            return len(segment)
+
+        before = await run(download, queries, stub)
+        after = await run(stored, queries, stub)
+
+    print(f"{args.queries} hourly-summary queries, stub latency {args.latency * 1000:.0f} ms")
+    report("download", before)
+    report("store", after)
+    print(f"rows served: {before['rows']} / {after['rows']}")
+    print(f"store: {weather.observation_store.as_dict()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--lat", type=float, default=42.5)
+    parser.add_argument("--lon", type=float, default=-76.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8907)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,148 @@
+"""Benchmark decoding of large NWS alert payloads.
+
+Compares the original full `json.loads` against the projected decode and
+the streaming ijson path in mcp/nws_parse.py, as used for every alert
+feed but the nationwide one, and against the streaming decode of the
+nationwide snapshot feed, which also keeps each polygon as packed
+coordinate arrays. Each strategy runs in its own subprocess so peak RSS
+is measured independently.
+
+Record a real payload to compare against:
+    curl -H "User-Agent: weather-app/1.0" https://api.weather.gov/alerts/active > alerts.json
+    python bench/bench_parse.py --payload alerts.json
+
+Without --payload a synthetic feed with large polygon geometries is used.
+"""
+
+import argparse
+from array import array
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+
+STRATEGIES = ["json", "projected", "streaming", "snapshot"]
+URL = "https://api.weather.gov/alerts/active/area/TX"
+SNAPSHOT_URL = "https://api.weather.gov/alerts/active"
+
+
+def synthetic_feed(alerts: int, vertices: int) -> bytes:
+    rng = random.Random(0)
+    features = []
+    for n in range(alerts):
+        lon, lat = rng.uniform(-120, -75), rng.uniform(28, 47)
+        ring = [
+            [round(lon + rng.uniform(-1, 1), 4), round(lat + rng.uniform(-1, 1), 4)]
+            for _ in range(vertices)
+        ]
+        features.append({
+            "id": f"urn:oid:synthetic.{n}",
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [ring + ring[:1]]},
+            "properties": {
+                "id": f"urn:oid:synthetic.{n}",
+                "event": "Flood Warning",
+                "areaDesc": "Somewhere County",
+                "severity": "Severe",
+                "description": "Flooding caused by excessive rainfall is expected. " * 20,
+                "instruction": "Turn around, don't drown.",
+                "geocode": {"SAME": ["048001"], "UGC": [f"TXC{n % 999:03d}"]},
+                "parameters": {"VTEC": ["/O.NEW.KFWD.FL.W.0001.000000T0000Z-000000T0000Z/"]},
+            },
+        })
+    return json.dumps({"type": "FeatureCollection", "features": features}).encode()
+
+
+def retained_bytes(value) -> int:
+    """JSON size of decoded data, counting packed arrays at their in-memory size."""
+    if isinstance(value, array):
+        return value.itemsize * len(value)
+    if isinstance(value, dict):
+        return sum(len(json.dumps(key)) + retained_bytes(item) for key, item in value.items())
+    if isinstance(value, list) and any(isinstance(item, (dict, list, array)) for item in value):
+        return sum(retained_bytes(item) for item in value)
+    return len(json.dumps(value))
+
+
+def measure(strategy: str, path: str) -> dict:
+    from nws_parse import decode, decode_stream
+
+    with open(path, "rb") as f:
+        body = f.read()
+
+    async def chunks():
+        for i in range(0, len(body), 65536):
+            yield body[i:i + 65536]
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if strategy == "json":
+        data = json.loads(body)
+    elif strategy == "projected":
+        data = decode(URL, body)
+    elif strategy == "streaming":
+        data, _ = asyncio.run(decode_stream(URL, chunks()))
+    else:
+        data, _ = asyncio.run(decode_stream(SNAPSHOT_URL, chunks()))
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "parse_ms": elapsed * 1000,
+        "peak_rss_growth_mb": (rss_after - rss_before) / 1024,
+        "retained_mb": retained_bytes(data) / 1e6,
+        "alerts": len(data["features"]),
+    }
+
+
+def main(args) -> None:
+    path = args.payload
+    if path is None:
+        # Generate in a subprocess: ru_maxrss survives exec, so a large parent
+        # would mask the workers' own peaks
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        subprocess.run(
+            [sys.executable, __file__, "--generate", path,
+             "--alerts", str(args.alerts), "--vertices", str(args.vertices)],
+            check=True,
+        )
+
+    print(f"payload: {os.path.getsize(path) / 1e6:.1f} MB")
+    for strategy in STRATEGIES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", strategy, path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"{strategy:<10} {result['parse_ms']:>8.1f} ms"
+            f"   peak RSS +{result['peak_rss_growth_mb']:>7.1f} MB"
+            f"   kept {result['retained_mb']:>6.2f} MB ({result['alerts']} alerts)"
+        )
+
+    if args.payload is None:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payload", help="recorded /alerts/active response")
+    parser.add_argument("--alerts", type=int, default=500)
+    parser.add_argument("--vertices", type=int, default=2000)
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(measure(*args.worker)))
+    elif args.generate:
+        with open(args.generate, "wb") as f:
+            f.write(synthetic_feed(args.alerts, args.vertices))
+    else:
+        main(args)
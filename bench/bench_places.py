@@ -0,0 +1,66 @@
+"""Benchmark the server's offline place index.
+
+Compares k-nearest search in the implicit KD-tree of mcp/places.py with
+a linear scan over every place, and times name lookups and opening the
+memory-mapped index.
+
+    python bench/bench_places.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+
+from places import DEFAULT_INDEX, PlaceIndex, _unit_vector, open_index
+
+QUERIES = ["Chicago, IL", "Portland, ME", "Springfield", "NYC", "Portland, Oregon"]
+
+
+def linear_nearest(index: PlaceIndex, latitude: float, longitude: float, k: int) -> list[int]:
+    x, y, z = _unit_vector(latitude, longitude)
+    xyz = index._xyz
+    distances = [
+        ((xyz[3 * i] - x) ** 2 + (xyz[3 * i + 1] - y) ** 2 + (xyz[3 * i + 2] - z) ** 2, i)
+        for i in range(index.count)
+    ]
+    return [i for _, i in sorted(distances)[:k]]
+
+
+def timed(fn, items: list) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(*item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def main(args) -> None:
+    open_index()  # compile once if missing
+    start = time.perf_counter()
+    index = PlaceIndex(DEFAULT_INDEX)
+    print(
+        f"open {(time.perf_counter() - start) * 1e3:.2f} ms "
+        f"({os.path.getsize(DEFAULT_INDEX) / 1e3:.0f} kB, {len(index)} places)"
+    )
+
+    rng = random.Random(0)
+    points = [(rng.uniform(25, 49), rng.uniform(-124, -67)) for _ in range(args.repeat)]
+    for k in (1, 5, 50):
+        tree = timed(lambda lat, lon: index.nearest(lat, lon, k), points)
+        scan = timed(lambda lat, lon: linear_nearest(index, lat, lon, k), points[:20])
+        print(
+            f"k={k:<3} KD-tree {tree * 1e6:>8.1f} us   linear scan {scan * 1e6:>9.1f} us"
+            f"   ({scan / tree:.0f}x)"
+        )
+
+    geocode = timed(index.geocode, [(query,) for query in QUERIES * args.repeat])
+    print(f"geocode {geocode * 1e6:.1f} us per name")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    main(parser.parse_args())
@@ -0,0 +1,86 @@
+"""Check that a session over its quota cannot empty or poison shared state.
+
+With the background snapshot refresher off, the first get_alerts_for_point
+call builds the nationwide alert snapshot and fetches zone boundaries.
+One session uses up a small upstream quota on get_forecast and then
+makes that call; the snapshot and every needed boundary must still be
+fetched, none may be recorded as missing, and a second session must find
+the zone-only alert covering a point. Exits non-zero when any check fails.
+
+    python bench/bench_quota.py --quota 3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_nws import StubServer
+
+
+def centre(ring) -> tuple[float, float]:
+    """Latitude and longitude of the mean vertex of a packed lon/lat ring."""
+    lons, lats = ring[0::2], ring[1::2]
+    return sum(lats) / len(lats), sum(lons) / len(lons)
+
+
+async def main(args) -> int:
+    with StubServer(port=args.port, max_age=60) as stub:
+        os.environ["NWS_API_BASE"] = stub.base_url
+        os.environ["NWS_SESSION_QUOTA"] = str(args.quota)
+        os.environ["NWS_GRIDPOINT_DB"] = ":memory:"
+        os.environ["NWS_ZONE_DB"] = ":memory:"
+        os.environ["NWS_OBSERVATIONS_DB"] = ":memory:"
+        os.environ["NWS_ALERTS_SNAPSHOT"] = "0"
+        os.environ["NWS_PREFETCH"] = "0"
+        import weather
+        from alert_geo import zones_needed
+        from fastmcp import Client
+
+        async with Client(weather.mcp) as greedy, Client(weather.mcp) as other:
+            rejected = 0
+            for n in range(args.quota + 2):
+                result = await greedy.call_tool(
+                    "get_forecast", {"latitude": 30 + n, "longitude": -95}, raise_on_error=False
+                )
+                rejected += result.is_error
+            await greedy.call_tool(
+                "get_alerts_for_point", {"latitude": 31.0, "longitude": -99.0},
+                raise_on_error=False,
+            )
+
+            snapshot = weather.alert_engine.snapshot
+            needed = sorted(zones_needed(snapshot)) if snapshot else []
+            stored = [ugc for ugc in needed if weather.zone_boundaries.get(ugc)]
+            checks = {
+                "quota was used up": rejected > 0,
+                "snapshot fetched": snapshot is not None,
+                "every zone boundary stored": bool(needed) and stored == needed,
+                # Zones left out of missing() are the ones skipped as having no boundary
+                "no zone skipped": set(weather.zone_boundaries.missing(needed))
+                == set(needed) - set(stored),
+            }
+            if stored:
+                lat, lon = centre(weather.zone_boundaries.get(stored[0])[0][0])
+                result = await other.call_tool(
+                    "get_alerts_for_point",
+                    {"latitude": lat, "longitude": lon, "format": "structured"},
+                )
+                checks[f"other session sees the {stored[0]} alert"] = bool(
+                    result.structured_content["alerts"]
+                )
+
+        print(f"quota {args.quota}/min, {rejected} calls rejected, {len(needed)} zones needed")
+        for name, ok in checks.items():
+            print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quota", type=int, default=3, help="upstream requests per session and minute")
+    parser.add_argument("--port", type=int, default=8911)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,89 @@
+"""Exercise the upstream resilience layer against a fault-injecting stub.
+
+Runs get_forecast-style fetches (points -> forecast) with a share of
+upstream requests failing, first with retries disabled and then with the
+configured retry policy, and finally against a fully failing upstream
+to show the circuit breaker failing fast.
+
+    python bench/bench_resilience.py --error-rate 0.3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_nws import StubServer
+
+
+async def scenario(weather, base_url: str, total: int, concurrency: int) -> dict:
+    from resilience import UpstreamStats
+
+    weather.upstream_guards.clear()
+    weather.upstream_stats = UpstreamStats()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    ok = 0
+
+    async def one(i: int) -> None:
+        nonlocal ok
+        async with semaphore:
+            start = time.perf_counter()
+            points = await weather.make_nws_request(f"{base_url}/points/40.{i:04d},-74.0")
+            if points:
+                forecast = await weather.make_nws_request(points["properties"]["forecast"])
+                ok += forecast is not None
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    latencies.sort()
+    return {
+        "success": ok / total,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        **weather.upstream_stats.as_dict(),
+    }
+
+
+def report(label: str, result: dict) -> None:
+    print(
+        f"{label:<16} success {result['success']:>6.1%}   p99 {result['p99_ms']:>8.1f} ms"
+        f"   attempts {result['attempts']:>5}   retries {result['retries']:>4}"
+        f"   short-circuited {result['short_circuited']:>4}"
+    )
+
+
+async def main(args) -> None:
+    os.environ.update({
+        "NWS_CACHE_MAX_BYTES": "0",
+        "NWS_GRIDPOINT_DB": ":memory:",
+        "NWS_ZONE_DB": ":memory:",
+        "NWS_OBSERVATIONS_DB": ":memory:",
+        "NWS_ALERTS_SNAPSHOT": "0",
+        "NWS_RETRY_BASE_DELAY": "0.05",
+    })
+    faults = {"error_rate": args.error_rate, "retry_after": None}
+    with StubServer(port=args.port, latency=args.latency, **faults) as flaky, \
+            StubServer(port=args.port + 1, error_rate=1.0) as down:
+        import weather
+
+        async with weather.lifespan(weather.mcp):
+            retries = weather.NWS_RETRIES
+            weather.NWS_RETRIES = 0
+            report("no retries", await scenario(weather, flaky.base_url, args.requests, args.concurrency))
+            weather.NWS_RETRIES = retries
+            report("with retries", await scenario(weather, flaky.base_url, args.requests, args.concurrency))
+            report("upstream down", await scenario(weather, down.base_url, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--port", type=int, default=8920)
+    asyncio.run(main(parser.parse_args()))
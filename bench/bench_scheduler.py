@@ -0,0 +1,107 @@
+"""Benchmark interactive latency under bulk load with and without fair scheduling.
+
+One MCP session calls get_forecast for new coordinates one at a time,
+as a person asking questions would, while another session keeps several
+get_forecast_many calls over hundreds of new coordinates in flight.
+The response cache is off and the upstream rate limit is low, so
+both compete for the same rate-limit tokens. The interactive session's
+latency is measured alone, under bulk load with the scheduler disabled
+(callers race for tokens), and under bulk load with the scheduler
+(interactive lane first, round-robin between sessions).
+
+    python bench/bench_scheduler.py --calls 40 --rate 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_nws import StubServer
+
+
+def coordinates(start: int, count: int) -> list[tuple[float, float]]:
+    """Distinct coordinates, so every lookup is an upstream /points request."""
+    return [
+        (30 + (start + i) % 1500 / 100, -(80 + (start + i) // 1500 / 100)) for i in range(count)
+    ]
+
+
+async def interactive(client, calls: int, offset: int) -> list[float]:
+    latencies = []
+    for lat, lon in coordinates(offset, calls):
+        started = time.perf_counter()
+        await client.call_tool("get_forecast", {"latitude": lat, "longitude": lon})
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def bulk(client, stop: asyncio.Event, offset: int, batch: int) -> int:
+    done = 0
+    while not stop.is_set():
+        locations = coordinates(offset + done, batch)
+        await client.call_tool("get_forecast_many", {"locations": locations})
+        done += batch
+    return done
+
+
+async def phase(
+    weather, clients, label: str, args, offset: int, load: bool, scheduling: bool
+) -> None:
+    person, crawler = clients
+    weather.upstream_scheduler(weather.NWS_API_BASE).enabled = scheduling
+    stop = asyncio.Event()
+    crawlers = [
+        asyncio.create_task(bulk(crawler, stop, 100_000 * (n + 1) + offset, args.batch))
+        for n in range(args.bulk_calls if load else 0)
+    ]
+    await asyncio.sleep(0.5 if load else 0)
+    latencies = sorted(await interactive(person, args.calls, offset))
+    stop.set()
+    bulk_done = sum(await asyncio.gather(*crawlers))
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(
+        f"{label:<26} p50 {statistics.median(latencies) * 1000:>7.1f} ms"
+        f"   p99 {p99 * 1000:>7.1f} ms   bulk locations {bulk_done}"
+    )
+
+
+async def main(args) -> None:
+    with StubServer(port=args.port, latency=args.latency) as stub:
+        os.environ["NWS_API_BASE"] = stub.base_url
+        # Every call goes upstream and the rate limit is the bottleneck
+        os.environ["NWS_CACHE_MAX_BYTES"] = "0"
+        os.environ["NWS_RATE_LIMIT"] = str(args.rate)
+        os.environ["NWS_RATE_BURST"] = "1"
+        os.environ["NWS_GRIDPOINT_DB"] = ":memory:"
+        os.environ["NWS_ZONE_DB"] = ":memory:"
+        os.environ["NWS_OBSERVATIONS_DB"] = ":memory:"
+        os.environ["NWS_ALERTS_SNAPSHOT"] = "0"
+        os.environ["NWS_PREFETCH"] = "0"
+        import weather
+        from fastmcp import Client
+
+        print(f"rate limit {args.rate}/s, stub latency {args.latency * 1000:.0f} ms")
+        # Two sessions: the first client's connection runs the server lifespan
+        async with Client(weather.mcp) as person, Client(weather.mcp) as crawler:
+            clients = (person, crawler)
+            await phase(weather, clients, "alone", args, 0, False, True)
+            await phase(weather, clients, "bulk load, no scheduler", args, 10_000, True, False)
+            await phase(weather, clients, "bulk load, scheduler", args, 20_000, True, True)
+        print(f"scheduler: {weather.scheduler_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=40, help="interactive get_forecast calls")
+    parser.add_argument("--bulk-calls", type=int, default=3, help="get_forecast_many in flight")
+    parser.add_argument("--batch", type=int, default=40, help="locations per get_forecast_many")
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8908)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,254 @@
+"""Load test the server over its HTTP transport against the stub NWS API.
+
+Starts the stub (replaying recorded payloads when --replay is given) and
+the server as a subprocess via mcp/serve.py, then drives get_alerts and
+get_forecast through FastMCP HTTP clients at a fixed concurrency.
+Reports throughput, latency percentiles, errors, upstream calls per
+endpoint kind and the server's peak memory, and compares them with a
+stored baseline: the run exits non-zero when any metric regressed by
+more than --tolerance.
+
+    python bench/loadtest.py --requests 1000 --concurrency 20
+    python bench/loadtest.py --update-baseline   # after an intended change
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from fastmcp import Client
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_nws import STATES, StubServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVE = os.path.join(HERE, "..", "mcp", "serve.py")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+# Metric -> whether higher is better
+METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "error_rate": False,
+    "upstream_calls": False,
+    "peak_rss_mb": False,
+}
+
+
+def workload(requests: int, locations: int) -> list[tuple[str, dict]]:
+    """An even mix of get_alerts and get_forecast over a fixed set of places."""
+    calls = []
+    for i in range(requests):
+        if i % 2:
+            calls.append(("get_alerts", {"state": STATES[i // 2 % len(STATES)]}))
+        else:
+            n = i // 2 % locations
+            calls.append(("get_forecast", {
+                "latitude": 30.0 + n * 0.25,
+                "longitude": -100.0 + n * 0.25,
+            }))
+    return calls
+
+
+def peak_rss_mb(pid: int) -> float | None:
+    """Peak resident memory of a process and its children (Linux only)."""
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            if current == pid:
+                return None
+    return total / 1024
+
+
+def start_server(args, stub_url: str, data_dir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "NWS_API_BASE": stub_url,
+        "WEATHER_HOST": "127.0.0.1",
+        "WEATHER_PORT": str(args.port),
+        "WEATHER_WORKERS": str(args.workers),
+        # Several workers on one port only work without sessions
+        "WEATHER_STATELESS": "1" if args.workers > 1 else "0",
+        "NWS_GRIDPOINT_DB": os.path.join(data_dir, "gridpoints.db"),
+        "NWS_ZONE_DB": os.path.join(data_dir, "zones.db"),
+        "NWS_OBSERVATIONS_DB": os.path.join(data_dir, "observations.db"),
+        "NWS_CACHE_PATH": os.path.join(data_dir, "responses.db"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, SERVE], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{args.port}/ready").status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not become ready")
+
+
+def wait_for_warm_up(stub: StubServer, quiet: float = 1.0, timeout: float = 30.0) -> None:
+    """Wait until the server stops calling upstream on its own.
+
+    After startup each worker fetches the alert snapshot and then, in the
+    background, the boundaries of the zones it covers; those calls are
+    start-up cost, not load, and must not count against the run.
+    """
+    deadline = time.monotonic() + timeout
+    seen = -1
+    while time.monotonic() < deadline:
+        total = sum(stub.requests.values())
+        if total == seen:
+            return
+        seen = total
+        time.sleep(quiet)
+
+
+async def drive(url: str, calls: list[tuple[str, dict]], concurrency: int) -> dict:
+    queue = iter(calls)
+    latencies: list[float] = []
+    errors = 0
+
+    async def client_loop() -> None:
+        nonlocal errors
+        async with Client(url) as client:
+            for tool, arguments in queue:
+                start = time.perf_counter()
+                result = await client.call_tool(tool, arguments, raise_on_error=False)
+                latencies.append(time.perf_counter() - start)
+                errors += result.is_error
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+
+    return {
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "error_rate": errors / len(latencies),
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Metrics that are worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for name, higher_is_better in METRICS.items():
+        current, expected = result.get(name), baseline.get(name)
+        if current is None or expected is None:
+            continue
+        if name == "error_rate":
+            worse = current > expected + tolerance / 10
+        elif higher_is_better:
+            worse = current < expected * (1 - tolerance)
+        else:
+            worse = current > expected * (1 + tolerance)
+        if worse:
+            regressions.append(f"{name}: {current:.2f} vs baseline {expected:.2f}")
+    return regressions
+
+
+def report(result: dict) -> None:
+    print(
+        f"throughput {result['throughput_rps']:.1f} req/s   "
+        f"p50 {result['p50_ms']:.1f} ms   p95 {result['p95_ms']:.1f} ms   "
+        f"p99 {result['p99_ms']:.1f} ms   errors {result['error_rate']:.2%}"
+    )
+    upstream = ", ".join(f"{kind} {n}" for kind, n in sorted(result["upstream"].items()))
+    print(f"upstream calls {result['upstream_calls']} ({upstream})")
+    if result["peak_rss_mb"] is not None:
+        print(f"server peak RSS {result['peak_rss_mb']:.1f} MB")
+
+
+def main(args) -> int:
+    calls = workload(args.requests, args.locations)
+    stub_options = {
+        "latency": args.latency,
+        "max_age": args.max_age,
+        "replay": args.replay,
+        "error_rate": args.error_rate,
+    }
+    with StubServer(port=args.stub_port, **stub_options) as stub, \
+            tempfile.TemporaryDirectory() as data_dir:
+        server = start_server(args, stub.base_url, data_dir)
+        try:
+            wait_for_warm_up(stub)
+            stub.requests.clear()
+            result = asyncio.run(drive(
+                f"http://127.0.0.1:{args.port}/mcp", calls, args.concurrency
+            ))
+            result["upstream"] = dict(stub.requests)
+            result["upstream_calls"] = sum(stub.requests.values())
+            result["peak_rss_mb"] = peak_rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    report(result)
+    settings = {name: getattr(args, name) for name in (
+        "requests", "concurrency", "workers", "locations", "latency", "max_age", "error_rate",
+        "replay",
+    )}
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"settings": settings, **result}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline; run with --update-baseline to store one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print("baseline was recorded with different settings; not comparing")
+        return 0
+    regressions = compare(result, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"within {args.tolerance:.0%} of baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--locations", type=int, default=50, help="distinct forecast points")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub response delay")
+    parser.add_argument("--max-age", type=int, default=60, help="stub Cache-Control max-age")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--replay", help="directory of payloads recorded by record_nws.py")
+    parser.add_argument("--port", type=int, default=8950)
+    parser.add_argument("--stub-port", type=int, default=8951)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    sys.exit(main(parser.parse_args()))
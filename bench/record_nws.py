@@ -0,0 +1,51 @@
+"""Record real api.weather.gov payloads for the stub to replay.
+
+Fetches one of each endpoint the server uses (for one location and one
+state) and writes them as <kind>.json (see stub_nws.RECORDED_KINDS) into
+the output directory, where `stub_nws.py --replay` and
+`loadtest.py --replay` pick them up.
+
+    python bench/record_nws.py --latitude 40.7128 --longitude -74.0060 --state NY
+"""
+
+import argparse
+import os
+
+import httpx
+
+NWS_API_BASE = "https://api.weather.gov"
+USER_AGENT = "weather-app/1.0"
+
+
+def record(latitude: float, longitude: float, state: str, out: str) -> None:
+    os.makedirs(out, exist_ok=True)
+    headers = {"User-Agent": USER_AGENT, "Accept": "application/geo+json"}
+    with httpx.Client(headers=headers, timeout=30.0, follow_redirects=True) as client:
+
+        def fetch(kind: str, url: str) -> dict:
+            response = client.get(url)
+            response.raise_for_status()
+            with open(os.path.join(out, f"{kind}.json"), "wb") as f:
+                f.write(response.content)
+            print(f"{kind:<14} {len(response.content) / 1e3:>9.1f} kB  {url}")
+            return response.json()
+
+        points = fetch("points", f"{NWS_API_BASE}/points/{latitude:.4f},{longitude:.4f}")
+        props = points["properties"]
+        fetch("forecast", props["forecast"])
+        fetch("hourly", props["forecastHourly"])
+        fetch("gridpoint", props["forecastGridData"])
+        fetch("alerts_active", f"{NWS_API_BASE}/alerts/active")
+        fetch("alerts_area", f"{NWS_API_BASE}/alerts/active/area/{state}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latitude", type=float, default=40.7128)
+    parser.add_argument("--longitude", type=float, default=-74.0060)
+    parser.add_argument("--state", default="NY")
+    parser.add_argument(
+        "--out", default=os.path.join(os.path.dirname(__file__), "recordings")
+    )
+    args = parser.parse_args()
+    record(args.latitude, args.longitude, args.state, args.out)
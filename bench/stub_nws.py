@@ -0,0 +1,450 @@
+"""Local stand-in for api.weather.gov used by the benchmarks.
+
+Serves the handful of endpoints the weather server talks to with
+synthetic but correctly shaped GeoJSON, so benchmarks never touch the
+real NWS API. Payloads recorded with bench/record_nws.py are replayed
+instead of the synthetic ones when a recording directory is given.
+
+Run standalone:
+    python bench/stub_nws.py --port 8900 --latency 0.02 --replay bench/recordings
+
+then point the server at it with NWS_API_BASE=http://127.0.0.1:8900
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+
+STATES = ["CA", "FL", "NY", "OK", "TX"]
+# Synthetic zone n of a state is a 0.5 degree square east of these corners
+STATE_ORIGINS = {
+    "CA": (-121.0, 36.0), "FL": (-82.5, 27.5), "NY": (-76.0, 42.5),
+    "OK": (-98.0, 35.0), "TX": (-100.0, 31.0),
+}
+EVENTS = [
+    ("Heat Advisory", "Moderate"),
+    ("Severe Thunderstorm Warning", "Severe"),
+    ("Tornado Warning", "Extreme"),
+    ("Small Craft Advisory", "Minor"),
+]
+
+
+def _square(min_lon: float, min_lat: float, size: float) -> dict:
+    ring = [
+        [min_lon, min_lat], [min_lon + size, min_lat], [min_lon + size, min_lat + size],
+        [min_lon, min_lat + size], [min_lon, min_lat],
+    ]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def _zone_geometry(ugc: str) -> dict:
+    lon, lat = STATE_ORIGINS.get(ugc[:2], (-90.0, 40.0))
+    return _square(lon + 0.5 * (int(ugc[3:]) - 1), lat, 0.5)
+
+
+def _alert(state: str, n: int) -> dict:
+    event, severity = EVENTS[n % len(EVENTS)]
+    lon, lat = STATE_ORIGINS.get(state, (-90.0, 40.0))
+    return {
+        "id": f"urn:oid:stub.{state}.{n}",
+        "type": "Feature",
+        # Every third alert is a warning-style polygon inside its zone
+        "geometry": _square(lon + 0.5 * n + 0.1, lat + 0.1, 0.2) if n % 3 == 2 else None,
+        "properties": {
+            "id": f"urn:oid:stub.{state}.{n}",
+            "event": event,
+            "areaDesc": f"Zone {n}, {state}",
+            "severity": severity,
+            "urgency": "Immediate" if severity == "Extreme" else "Expected",
+            "headline": f"{event} issued for Zone {n}, {state}",
+            "effective": "2025-01-01T00:00:00+00:00",
+            "expires": f"2025-01-01T{6 + n % 12:02d}:00:00+00:00",
+            "geocode": {"UGC": [f"{state}Z{n + 1:03d}"]},
+            "description": "* WHAT...Heat index values up to 105.\n" * 4,
+            "instruction": "Drink plenty of fluids and stay out of the sun.",
+        },
+    }
+
+
+def _period(n: int) -> dict:
+    return {
+        "number": n + 1,
+        "name": f"Period {n + 1}",
+        "temperature": 70 + n,
+        "temperatureUnit": "F",
+        "windSpeed": "5 to 10 mph",
+        "windDirection": "SW",
+        "detailedForecast": "Partly sunny with a slight chance of showers.",
+    }
+
+
+def _hour(n: int) -> str:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(hours=n)
+    return start.isoformat()
+
+
+def _hourly_period(n: int) -> dict:
+    return {
+        "number": n + 1,
+        "name": "",
+        "startTime": _hour(n),
+        "endTime": _hour(n + 1),
+        "isDaytime": 6 <= n % 24 < 18,
+        "temperature": 60 + n % 24 // 2,
+        "temperatureUnit": "F",
+        "probabilityOfPrecipitation": {"unitCode": "wmoUnit:percent", "value": n % 5 * 10},
+        "windSpeed": f"{5 + n % 10} mph",
+        "windDirection": ["N", "NE", "E", "SE", "S", "SW", "W", "NW"][n % 8],
+        "shortForecast": "Partly Sunny" if n % 3 else "Chance Showers",
+        "detailedForecast": "",
+    }
+
+
+def _layer(uom: str, step_hours: int, base: float) -> dict:
+    return {
+        "uom": uom,
+        "values": [
+            {"validTime": f"{_hour(n)}/PT{step_hours}H", "value": base + n % 7}
+            for n in range(0, 168, step_hours)
+        ],
+    }
+
+
+# Seconds between synthetic station observations
+OBSERVATION_STEP = 1200
+
+
+def _station(n: int, lat: float, lon: float) -> dict:
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon + 0.05 * n, lat + 0.05 * n]},
+        "properties": {"stationIdentifier": f"KST{n}", "name": f"Stub Station {n}"},
+    }
+
+
+def _observation(stamp: int) -> dict:
+    """A reading with a daily temperature cycle; every seventh lacks a gust."""
+    n = stamp // OBSERVATION_STEP
+    temperature = 10 + 8 * math.sin(2 * math.pi * (stamp % 86400) / 86400)
+
+    def quantity(value, unit):
+        return {"unitCode": f"wmoUnit:{unit}", "value": value}
+
+    return {
+        "type": "Feature",
+        "properties": {
+            "timestamp": datetime.fromtimestamp(stamp, timezone.utc).isoformat(),
+            "textDescription": "Clear",
+            "temperature": quantity(round(temperature, 1), "degC"),
+            "dewpoint": quantity(round(temperature - 5, 1), "degC"),
+            "relativeHumidity": quantity(60 + n % 20, "percent"),
+            "windDirection": quantity(n * 37 % 360, "degree_(angle)"),
+            "windSpeed": quantity(float(5 + n % 15), "km_h-1"),
+            "windGust": quantity(None if n % 7 == 0 else float(20 + n % 10), "km_h-1"),
+            "barometricPressure": quantity(101325.0 - n % 50 * 10, "Pa"),
+            "visibility": quantity(16090.0, "m"),
+            "precipitationLastHour": quantity(None, "mm"),
+        },
+    }
+
+
+# Recording file names, one per endpoint kind (see bench/record_nws.py)
+RECORDED_KINDS = ("points", "forecast", "hourly", "gridpoint", "alerts_active", "alerts_area")
+
+
+def endpoint_kind(path: str) -> str:
+    if path.startswith("/points/"):
+        return "points"
+    if path == "/alerts/active":
+        return "alerts_active"
+    if path.startswith("/alerts/active/area/"):
+        return "alerts_area"
+    if path.endswith("/forecast/hourly"):
+        return "hourly"
+    if path.endswith("/forecast"):
+        return "forecast"
+    if path.startswith("/gridpoints/"):
+        return "gridpoint"
+    if path.endswith("/stations"):
+        return "stations"
+    if path.startswith("/stations/"):
+        return "observations"
+    if path.startswith("/zones/"):
+        return "zones"
+    return "other"
+
+
+def load_recordings(directory: str) -> dict[str, bytes]:
+    """Recorded bodies by endpoint kind; kinds without a file stay synthetic."""
+    recordings = {}
+    for kind in RECORDED_KINDS:
+        path = os.path.join(directory, f"{kind}.json")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                recordings[kind] = f.read()
+    return recordings
+
+
+def _respond(request: Request, payload: dict | bytes, max_age: int) -> Response:
+    """Answer like NWS does: with Cache-Control, an ETag and 304 on a match."""
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    etag = '"' + hashlib.md5(body).hexdigest() + '"'
+    headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/geo+json", headers=headers)
+
+
+def with_faults(
+    app,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    retry_after: int | None = None,
+    stall_rate: float = 0.0,
+    seed: int = 0,
+):
+    """Wrap an ASGI app so a fraction of requests fail or stall.
+
+    `error_rate` of requests get `error_status` (with Retry-After when
+    given); `stall_rate` of requests hang for a minute before answering.
+    """
+    rng = random.Random(seed)
+
+    async def faulty(scope, receive, send):
+        if scope["type"] == "http":
+            roll = rng.random()
+            if roll < error_rate:
+                headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+                await Response(status_code=error_status, headers=headers)(scope, receive, send)
+                return
+            if roll < error_rate + stall_rate:
+                await asyncio.sleep(60)
+        await app(scope, receive, send)
+
+    return faulty
+
+
+def with_counter(app, counter: Counter):
+    """Wrap an ASGI app to count requests per endpoint kind, faults included."""
+
+    async def counting(scope, receive, send):
+        if scope["type"] == "http":
+            counter[endpoint_kind(scope["path"])] += 1
+        await app(scope, receive, send)
+
+    return counting
+
+
+def create_app(
+    latency: float = 0.0,
+    alerts_per_state: int = 5,
+    max_age: int = 0,
+    replay: str | None = None,
+    counter: Counter | None = None,
+    **faults,
+):
+    """Build the stub app.
+
+    Every response is delayed by `latency` seconds and carries
+    `Cache-Control: max-age=<max_age>`. `replay` names a directory of
+    recorded payloads, `counter` collects request counts per endpoint
+    kind, and keyword arguments for `with_faults` enable fault injection.
+    """
+    recordings = load_recordings(replay) if replay else {}
+
+    def recorded(request: Request, kind: str) -> bytes | None:
+        body = recordings.get(kind)
+        if body is not None:
+            # Recorded links point at the real API; keep clients on the stub
+            base = str(request.base_url).rstrip("/").encode()
+            body = body.replace(b"https://api.weather.gov", base)
+        return body
+
+    async def points(request: Request):
+        await asyncio.sleep(latency)
+        base = str(request.base_url).rstrip("/")
+        body = recorded(request, "points")
+        if body is not None:
+            return _respond(request, body, max_age)
+        return _respond(request, {
+            "properties": {
+                "gridId": "OKX",
+                "gridX": 33,
+                "gridY": 35,
+                "forecast": f"{base}/gridpoints/OKX/33,35/forecast",
+                "forecastHourly": f"{base}/gridpoints/OKX/33,35/forecast/hourly",
+                "forecastGridData": f"{base}/gridpoints/OKX/33,35",
+            }
+        }, max_age)
+
+    async def forecast(request: Request):
+        await asyncio.sleep(latency)
+        body = recorded(request, "forecast")
+        if body is not None:
+            return _respond(request, body, max_age)
+        return _respond(
+            request, {"properties": {"periods": [_period(n) for n in range(14)]}}, max_age
+        )
+
+    async def hourly(request: Request):
+        await asyncio.sleep(latency)
+        body = recorded(request, "hourly")
+        if body is not None:
+            return _respond(request, body, max_age)
+        return _respond(
+            request, {"properties": {"periods": [_hourly_period(n) for n in range(156)]}}, max_age
+        )
+
+    async def gridpoint(request: Request):
+        await asyncio.sleep(latency)
+        body = recorded(request, "gridpoint")
+        if body is not None:
+            return _respond(request, body, max_age)
+        return _respond(request, {
+            "type": "Feature",
+            "geometry": None,
+            "properties": {
+                "temperature": _layer("wmoUnit:degC", 1, 10.0),
+                "probabilityOfPrecipitation": _layer("wmoUnit:percent", 6, 20.0),
+                "windSpeed": _layer("wmoUnit:km_h-1", 3, 8.0),
+            },
+        }, max_age)
+
+    async def alerts(request: Request):
+        await asyncio.sleep(latency)
+        body = recorded(request, "alerts_area")
+        if body is not None:
+            return _respond(request, body, max_age)
+        state = request.path_params["state"].upper()
+        return _respond(request, {
+            "type": "FeatureCollection",
+            "features": [_alert(state, n) for n in range(alerts_per_state)],
+        }, max_age)
+
+    async def all_alerts(request: Request):
+        await asyncio.sleep(latency)
+        body = recorded(request, "alerts_active")
+        if body is not None:
+            return _respond(request, body, max_age)
+        return _respond(request, {
+            "type": "FeatureCollection",
+            "features": [
+                _alert(state, n) for state in STATES for n in range(alerts_per_state)
+            ],
+        }, max_age)
+
+    async def zone(request: Request):
+        await asyncio.sleep(latency)
+        ugc = request.path_params["ugc"].upper()
+        if request.path_params["kind"] not in ("forecast", "county", "fire"):
+            return Response(status_code=404)
+        return _respond(request, {
+            "id": f"https://api.weather.gov/zones/{request.path_params['kind']}/{ugc}",
+            "type": "Feature",
+            "geometry": _zone_geometry(ugc),
+            "properties": {"id": ugc, "type": request.path_params["kind"]},
+        }, max_age)
+
+    async def stations(request: Request):
+        await asyncio.sleep(latency)
+        lon, lat = STATE_ORIGINS["NY"]
+        return _respond(request, {
+            "type": "FeatureCollection",
+            "features": [_station(n, lat, lon) for n in range(3)],
+        }, max_age)
+
+    async def observations(request: Request):
+        await asyncio.sleep(latency)
+        now = int(time.time())
+        end = request.query_params.get("end")
+        start = request.query_params.get("start")
+        end = min(int(datetime.fromisoformat(end).timestamp()), now) if end else now
+        start = int(datetime.fromisoformat(start).timestamp()) if start else end - 7 * 86400
+        first = -(-start // OBSERVATION_STEP) * OBSERVATION_STEP
+        stamps = range(first, end + 1, OBSERVATION_STEP)
+        return _respond(request, {
+            "type": "FeatureCollection",
+            "features": [_observation(stamp) for stamp in reversed(stamps)],
+        }, max_age)
+
+    app = Starlette(routes=[
+        Route("/alerts/active", all_alerts),
+        Route("/points/{coords}", points),
+        Route("/gridpoints/{office}/{grid}/forecast", forecast),
+        Route("/gridpoints/{office}/{grid}/forecast/hourly", hourly),
+        Route("/gridpoints/{office}/{grid}/stations", stations),
+        Route("/stations/{station}/observations", observations),
+        Route("/gridpoints/{office}/{grid}", gridpoint),
+        Route("/alerts/active/area/{state}", alerts),
+        Route("/zones/{kind}/{ugc}", zone),
+    ])
+    if faults:
+        app = with_faults(app, **faults)
+    return with_counter(app, counter) if counter is not None else app
+
+
+class StubServer:
+    """Run the stub app on a background thread for in-process benchmarks."""
+
+    def __init__(self, port: int = 8900, **app_kwargs):
+        self.requests: Counter = Counter()
+        config = uvicorn.Config(
+            create_app(counter=self.requests, **app_kwargs),
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+        )
+        self.server = uvicorn.Server(config)
+        self.base_url = f"http://127.0.0.1:{port}"
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self._thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--max-age", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--replay", help="directory of payloads recorded by record_nws.py")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(
+            latency=args.latency,
+            max_age=args.max_age,
+            replay=args.replay,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            retry_after=args.retry_after,
+            stall_rate=args.stall_rate,
+        ),
+        host="127.0.0.1",
+        port=args.port,
+    )
@@ -0,0 +1,108 @@
+"""Cache of LLM answers for the chat tab.
+
+Many chat prompts are the same question about the same weather: "alerts
+for California?" and "Alerts for California" asked a minute apart,
+while the alerts have not changed. An answer is stored under a key
+built from
+
+- the prompt, normalized (case, punctuation, whitespace and a few filler
+  words ignored),
+- the locations resolved from it (tool name and arguments), and
+- a hash of the weather data that was retrieved for it,
+
+so a cached answer is only reused while the data it was based on is
+unchanged; any update to the alerts or forecast changes the key. Entries
+also expire after a TTL, because answers phrase times relative to now
+("tonight"), and the least recently used entry is evicted when the cache
+is full.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import re
+import threading
+import time
+
+# Words that do not change what is being asked
+FILLER_WORDS = frozenset({
+    "a", "an", "the", "please", "pls", "me", "can", "could", "would", "you",
+    "tell", "show", "give", "get", "hey", "hi", "thanks", "thank",
+})
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase words of the prompt without punctuation and filler words."""
+    return " ".join(word for word in _WORD.findall(prompt.lower()) if word not in FILLER_WORDS)
+
+
+def data_fingerprint(weather_data: str) -> str:
+    """Hash of the retrieved weather data, ignoring whitespace differences."""
+    return hashlib.sha256(" ".join(weather_data.split()).encode()).hexdigest()
+
+
+def cache_key(prompt: str, requests: list, weather_data: str, model: str) -> str:
+    """Key of an answer: normalized prompt, resolved locations, data hash and model."""
+    locations = sorted(
+        f"{tool}:{sorted(arguments.items())}" for _, _, tool, arguments in requests
+    )
+    parts = [model, normalize_prompt(prompt), *locations, data_fingerprint(weather_data)]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+@dataclass(slots=True)
+class CachedAnswer:
+    text: str
+    expires_at: float
+
+
+class AnswerCache:
+    """Thread-safe LRU cache of answers with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 900.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() >= entry.expires_at:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.text
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = CachedAnswer(text, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,101 @@
+"""Build the packed US gazetteer (data/places.tsv.gz) used by gazetteer.py.
+
+Reads a GeoNames dump such as cities500.txt or US.txt
+(https://download.geonames.org/export/dump/, CC BY 4.0) and keeps
+populated places in the US and its territories:
+
+    python client/build_gazetteer.py cities500.txt
+
+The output is gzipped, tab-separated and sorted:
+    S <code> <name>                              one line per state/territory
+    P <name> <state> <lat> <lon> <population>    one line per place or alias
+"""
+
+import argparse
+import gzip
+import os
+
+STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas",
+    "CA": "California", "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho",
+    "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas",
+    "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
+    "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota", "MS": "Mississippi",
+    "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma",
+    "OR": "Oregon", "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina",
+    "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah",
+    "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
+    "WI": "Wisconsin", "WY": "Wyoming",
+    # District and territories, which NWS also issues alerts for
+    "DC": "District of Columbia", "PR": "Puerto Rico", "GU": "Guam",
+    "VI": "U.S. Virgin Islands", "AS": "American Samoa", "MP": "Northern Mariana Islands",
+}
+
+TERRITORIES = {"PR", "GU", "VI", "AS", "MP"}
+
+# Common short forms: (alias, place name, state)
+ALIASES = [
+    ("NYC", "New York City", "NY"),
+    ("Philly", "Philadelphia", "PA"),
+    ("SF", "San Francisco", "CA"),
+    ("Vegas", "Las Vegas", "NV"),
+]
+
+# GeoNames dump columns
+NAME, LATITUDE, LONGITUDE, FEATURE_CLASS, COUNTRY, ADMIN1, POPULATION = 1, 4, 5, 6, 8, 10, 14
+
+
+def read_places(path: str) -> dict[tuple[str, str], tuple[float, float, int]]:
+    """(name, state) -> (lat, lon, population), keeping the most populous duplicate."""
+    places = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = line.rstrip("\n").split("\t")
+            if row[FEATURE_CLASS] != "P":
+                continue
+            country = row[COUNTRY]
+            if country == "US":
+                state = row[ADMIN1]
+            elif country in TERRITORIES:
+                state = country
+            else:
+                continue
+            if state not in STATES:
+                continue
+            key = (row[NAME], state)
+            value = (float(row[LATITUDE]), float(row[LONGITUDE]), int(row[POPULATION] or 0))
+            if key not in places or value[2] > places[key][2]:
+                places[key] = value
+    return places
+
+
+def build(source: str, out: str) -> int:
+    places = read_places(source)
+    for alias, name, state in ALIASES:
+        if (name, state) in places:
+            places[(alias, state)] = places[(name, state)]
+
+    lines = [f"S\t{code}\t{name}" for code, name in STATES.items()]
+    lines += [
+        f"P\t{name}\t{state}\t{lat:.4f}\t{lon:.4f}\t{population}"
+        for (name, state), (lat, lon, population) in places.items()
+    ]
+    lines.sort()
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    # mtime=0 keeps the output byte-identical across rebuilds
+    with open(out, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write(("\n".join(lines) + "\n").encode())
+    return len(places)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="GeoNames dump, e.g. cities500.txt")
+    parser.add_argument(
+        "--out", default=os.path.join(os.path.dirname(__file__), "data", "places.tsv.gz")
+    )
+    args = parser.parse_args()
+    print(f"{build(args.source, args.out)} places written to {args.out}")
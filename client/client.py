@@ -1,17 +1,223 @@
 import asyncio
 import os
 import streamlit as st
-import asyncio
-from fastmcp import Client, FastMCP
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq
+
+from answer_cache import AnswerCache, cache_key
+from context_builder import Section, build_context
+from gazetteer import load_gazetteer
+from mcp_session import BackgroundLoop, MCPSession
 
 # Load environment variables from .env
 load_dotenv()
 groq_api_key = os.getenv("GROQ_API_KEY")
 
-# Initialize Groq client
-groq_client = Groq(api_key=groq_api_key)
+GROQ_MODEL = "openai/gpt-oss-120b"
+
+# Seconds to wait for the next streamed piece of an answer
+LLM_STREAM_TIMEOUT = float(os.getenv("LLM_STREAM_TIMEOUT", "60"))
+
+# Answers reused while the prompt and the weather data behind them are unchanged
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "900"))
+
+
+@st.cache_resource
+def get_event_loop():
+    """One event loop for all MCP calls, kept across Streamlit reruns."""
+    return BackgroundLoop()
+
+
+@st.cache_resource
+def get_mcp_session(server_url):
+    """A connected MCP session per server URL, reused across reruns."""
+    return MCPSession(server_url)
+
+
+@st.cache_resource
+def get_groq_client():
+    """Async Groq client; only used on the background loop, so its connections are reused.
+
+    Its connection is opened right away, so the first question does not pay for it.
+    """
+    client = AsyncGroq(api_key=groq_api_key)
+    asyncio.run_coroutine_threadsafe(client.models.retrieve(GROQ_MODEL), get_event_loop().loop)
+    return client
+
+
+@st.cache_resource
+def get_answer_cache():
+    """LLM answers shared by all sessions of this Streamlit server."""
+    return AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL)
+
+
+def run_async(coro, timeout=60):
+    """Run a coroutine on the background loop and return its result."""
+    return get_event_loop().run(coro, timeout)
+
+
+# Limits for the weather lookups made for a chat prompt
+MCP_CALL_CONCURRENCY = int(os.getenv("MCP_CALL_CONCURRENCY", "8"))
+MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "15"))
+
+# Estimated tokens of weather data put into the chat system prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+def result_text(result):
+    """Text content of a tool call result, or None."""
+    if hasattr(result, 'data') and result.data:
+        return result.data
+    if getattr(result, 'content', None):
+        first = result.content[0]
+        return first.text if hasattr(first, 'text') else str(first)
+    return None
+
+
+def find_weather_requests(prompt):
+    """(heading, label, tool, arguments) for every state and place the prompt mentions.
+
+    Locations are fetched once each, in the order they are first mentioned.
+    Alerts come back structured, for build_context to rank and trim.
+    """
+    prompt_lower = prompt.lower()
+    wants_alerts = 'alert' in prompt_lower or 'warning' in prompt_lower
+    wants_forecast = 'forecast' in prompt_lower or 'weather' in prompt_lower
+    gazetteer = load_gazetteer()
+
+    requests = {}
+    for mention in gazetteer.find(prompt):
+        if mention.place is None and wants_alerts:
+            state_name = gazetteer.states[mention.state]
+            requests.setdefault(('get_alerts', mention.state), (
+                f"{state_name} ({mention.state})",
+                f"alerts for {state_name}",
+                'get_alerts',
+                {"state": mention.state, "format": "structured"},
+            ))
+        elif mention.place is not None:
+            place = mention.place
+            if wants_forecast:
+                requests.setdefault(('get_forecast', place.latitude, place.longitude), (
+                    f"Weather Forecast for {place.name}, {place.state}",
+                    f"forecast for {place.name}",
+                    'get_forecast',
+                    {"latitude": place.latitude, "longitude": place.longitude},
+                ))
+            if wants_alerts:
+                requests.setdefault(('get_alerts_for_point', place.latitude, place.longitude), (
+                    f"{place.name}, {place.state}",
+                    f"alerts for {place.name}",
+                    'get_alerts_for_point',
+                    {"latitude": place.latitude, "longitude": place.longitude, "format": "structured"},
+                ))
+    return list(requests.values())
+
+
+async def fetch_weather_data(session, requests):
+    """Run the requested tool calls concurrently; one Section per request, in order.
+
+    At most MCP_CALL_CONCURRENCY calls are in flight and each is abandoned
+    after MCP_CALL_TIMEOUT seconds, so one slow location cannot hold up
+    the answer.
+    """
+    semaphore = asyncio.Semaphore(MCP_CALL_CONCURRENCY)
+
+    async def fetch(heading, label, tool, arguments):
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(session.call_tool(tool, arguments), MCP_CALL_TIMEOUT)
+            except asyncio.TimeoutError:
+                error = f"Could not fetch {label}: timed out after {MCP_CALL_TIMEOUT:g}s"
+                return Section(heading, error=error)
+            except Exception as e:
+                return Section(heading, error=f"Could not fetch {label}: {str(e)}")
+        if arguments.get("format") == "structured":
+            records = getattr(result, 'structured_content', None) or {}
+            near = heading if tool == 'get_alerts_for_point' else None
+            return Section(heading, alerts=records.get("alerts", []), near=near)
+        return Section(heading, text=result_text(result))
+
+    return await asyncio.gather(*(fetch(*request) for request in requests))
+
+
+async def prepare_chat(user_prompt, session, answer_cache):
+    """Fetch the weather data for a prompt and build the chat messages.
+
+    Returns (messages, cache key, cached answer or None, whether every
+    lookup succeeded).
+    """
+    # Fetch alerts and forecasts for every location mentioned, concurrently
+    requests = find_weather_requests(user_prompt)
+    sections = await fetch_weather_data(session, requests)
+    # Ranked, deduplicated and trimmed to the token budget
+    weather_data = build_context(sections, CONTEXT_TOKEN_BUDGET)
+
+    # Enhanced system prompt for weather assistant
+    system_prompt = f"""You are a helpful weather assistant for US weather data. You can provide information about weather alerts and forecasts.
+
+Here is current weather data that was retrieved:{weather_data}
+
+Based on this weather data and the user's question, provide a helpful response. If weather data was retrieved, use it to give specific, accurate information. If no specific weather data was retrieved, provide general guidance about weather and mention that you can get alerts for US states (using 2-letter codes) and forecasts for US cities and towns.
+
+Always provide practical advice based on weather conditions (e.g., umbrella for rain, layers for cold weather, emergency preparations for severe weather, etc.).
+
+Available capabilities:
+- Weather alerts for US states (CA, NY, TX, FL, etc.)  
+- Weather forecasts for US cities and towns
+- General weather advice and safety tips
+
+Note: This service only covers the United States through the National Weather Service API."""
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    # Same question about unchanged weather: reuse the earlier answer
+    key = cache_key(user_prompt, requests, weather_data, GROQ_MODEL)
+    complete = not any(section.error for section in sections)
+    return messages, key, answer_cache.get(key), complete
+
+
+async def stream_answer(groq_client, messages, answer_cache, key=None):
+    """Yield the answer from GPT OSS 120B (without tool calling) as it streams in.
+
+    The complete answer is cached in `answer_cache` under `key` when one is given.
+    """
+    stream = await groq_client.chat.completions.create(
+        model=GROQ_MODEL,
+        messages=messages,
+        temperature=0.7,
+        max_tokens=1024,
+        stream=True,
+    )
+    parts = []
+    async for chunk in stream:
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            parts.append(text)
+            yield text
+    if key is not None and parts:
+        answer_cache.put(key, "".join(parts))
+
+
+def format_alert_text(text):
+    """Markdown lines for an NWS alert description, highlighting its * WHAT/WHERE/WHEN/IMPACTS parts."""
+    formatted_lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if line.startswith('* WHAT'):
+            formatted_lines.append(f"**What:** {line[7:]}")
+        elif line.startswith('* WHERE'):
+            formatted_lines.append(f"**Where:** {line[8:]}")
+        elif line.startswith('* WHEN'):
+            formatted_lines.append(f"**When:** {line[7:]}")
+        elif line.startswith('* IMPACTS'):
+            formatted_lines.append(f"**Impacts:** {line[10:]}")
+        elif line:
+            formatted_lines.append(line)
+    return formatted_lines
+
 
 # Streamlit UI Configuration
 st.set_page_config(
@@ -56,126 +262,37 @@ with col1:
         )
         
         if st.button("Ask GPT OSS 120B 🚀", type="primary"):
-            with st.spinner("Getting weather data and generating response..."):
-                async def get_weather_and_chat():
+            try:
+                with st.spinner("Getting weather data..."):
+                    # Cached resources are fetched here: their getters use
+                    # Streamlit's script context, which the event loop thread lacks.
+                    # The first call connects to Groq while the weather is fetched.
+                    groq_client = get_groq_client()
+                    messages, key, cached, complete = run_async(
+                        prepare_chat(user_prompt, get_mcp_session(server_url), get_answer_cache()),
+                        timeout=None,
+                    )
+            except Exception as e:
+                st.error(f"Error with AI response: {str(e)}")
+            else:
+                st.write("###  GPT OSS 120B Response")
+                if cached is not None:
+                    st.info(cached)
+                    st.caption("Answered from cache: same question, weather data unchanged.")
+                else:
+                    # Tokens are shown as they arrive instead of after the whole answer
                     try:
-                        # First, let's try to get weather data based on the user's question
-                        weather_data = ""
-                        
-                        # Simple keyword detection for weather requests
-                        prompt_lower = user_prompt.lower()
-                        
-                        # Check if user is asking about specific states for alerts
-                        state_keywords = {
-                            'california': 'CA', 'ca': 'CA',
-                            'new york': 'NY', 'ny': 'NY', 
-                            'texas': 'TX', 'tx': 'TX',
-                            'florida': 'FL', 'fl': 'FL',
-                            'illinois': 'IL', 'il': 'IL',
-                            'pennsylvania': 'PA', 'pa': 'PA',
-                            'ohio': 'OH', 'oh': 'OH',
-                            'georgia': 'GA', 'ga': 'GA',
-                            'north carolina': 'NC', 'nc': 'NC',
-                            'michigan': 'MI', 'mi': 'MI'
-                        }
-                        
-                        # Location coordinates for major cities
-                        city_coords = {
-                            'new york city': (40.7128, -74.0060),
-                            'nyc': (40.7128, -74.0060),
-                            'los angeles': (34.0522, -118.2437),
-                            'la': (34.0522, -118.2437),
-                            'chicago': (41.8781, -87.6298),
-                            'houston': (29.7604, -95.3698),
-                            'phoenix': (33.4484, -112.0740),
-                            'philadelphia': (39.9526, -75.1652),
-                            'san antonio': (29.4241, -98.4936),
-                            'san diego': (32.7157, -117.1611),
-                            'dallas': (32.7767, -96.7970),
-                            'san jose': (37.3382, -121.8863),
-                            'austin': (30.2672, -97.7431),
-                            'miami': (25.7617, -80.1918)
-                        }
-                        
-                        # Try to connect to MCP and get weather data
-                        try:
-                            async with Client(server_url) as client:
-                                # Look for state alerts
-                                if 'alert' in prompt_lower or 'warning' in prompt_lower:
-                                    for location, state_code in state_keywords.items():
-                                        if location in prompt_lower:
-                                            try:
-                                                result = await client.call_tool("get_alerts", {"state": state_code})
-                                                content = None
-                                                if hasattr(result, 'data'):
-                                                    content = result.data
-                                                elif hasattr(result, 'content') and result.content:
-                                                    if isinstance(result.content, list) and len(result.content) > 0:
-                                                        content = result.content[0].text if hasattr(result.content[0], 'text') else str(result.content[0])
-                                                
-                                                if content:
-                                                    weather_data += f"\n\n=== Weather Alerts for {location.title()} ({state_code}) ===\n{content}\n"
-                                                break
-                                            except Exception as e:
-                                                weather_data += f"\n\nCould not fetch alerts for {location.title()}: {str(e)}\n"
-                                
-                                # Look for forecast requests
-                                if 'forecast' in prompt_lower or 'weather' in prompt_lower:
-                                    for city, (lat, lon) in city_coords.items():
-                                        if city in prompt_lower:
-                                            try:
-                                                result = await client.call_tool("get_forecast", {"latitude": lat, "longitude": lon})
-                                                content = None
-                                                if hasattr(result, 'data'):
-                                                    content = result.data
-                                                elif hasattr(result, 'content') and result.content:
-                                                    if isinstance(result.content, list) and len(result.content) > 0:
-                                                        content = result.content[0].text if hasattr(result.content[0], 'text') else str(result.content[0])
-                                                
-                                                if content:
-                                                    weather_data += f"\n\n=== Weather Forecast for {city.title()} ===\n{content}\n"
-                                                break
-                                            except Exception as e:
-                                                weather_data += f"\n\nCould not fetch forecast for {city.title()}: {str(e)}\n"
-                        
-                        except Exception as e:
-                            weather_data = f"\n\nNote: Could not connect to weather service: {str(e)}\n"
-                        
-                        # Enhanced system prompt for weather assistant
-                        system_prompt = f"""You are a helpful weather assistant for US weather data. You can provide information about weather alerts and forecasts.
-
-Here is current weather data that was retrieved:{weather_data}
-
-Based on this weather data and the user's question, provide a helpful response. If weather data was retrieved, use it to give specific, accurate information. If no specific weather data was retrieved, provide general guidance about weather and mention that you can get alerts for US states (using 2-letter codes) and forecasts for major US cities.
-
-Always provide practical advice based on weather conditions (e.g., umbrella for rain, layers for cold weather, emergency preparations for severe weather, etc.).
-
-Available capabilities:
-- Weather alerts for US states (CA, NY, TX, FL, etc.)  
-- Weather forecasts for major US cities
-- General weather advice and safety tips
-
-Note: This service only covers the United States through the National Weather Service API."""
-
-                        # Get response from GPT OSS 120B WITHOUT tool calling
-                        response = groq_client.chat.completions.create(
-                            model="openai/gpt-oss-120b",
-                            messages=[
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": user_prompt},
-                            ],
-                            temperature=0.7,
-                            max_tokens=1024
-                        )
-                        
-                        return response.choices[0].message.content
-                
+                        st.write_stream(get_event_loop().iterate(
+                            stream_answer(
+                                groq_client,
+                                messages,
+                                get_answer_cache(),
+                                key if complete else None,
+                            ),
+                            LLM_STREAM_TIMEOUT,
+                        ))
                     except Exception as e:
-                        return f"Error with AI response: {str(e)}"
-                
-                response_text = asyncio.run(get_weather_and_chat())
-                st.write("###  GPT OSS 120B Response")
-                st.info(response_text)
+                        st.error(f"Error with AI response: {str(e)}")
     
     else:
         st.header("🇺🇸 US Weather Tools")
@@ -193,289 +310,140 @@ with col2:
     
     if query_type != "Chat with AI":
         if st.button(" Get Weather Data", type="primary"):
-            async def fetch_weather_data():
-                try:
-                    # Connect to HTTP MCP server
-                    async with Client(server_url) as client:
-                        
-                        # Call the appropriate tool with proper argument format
-                        if tool_choice == "get_alerts":
-                            # Try different argument formats based on FastMCP expectations
-                            try:
-                                # Method 1: Dictionary format
-                                result = await client.call_tool("get_alerts", {"state": state.upper()})
-                            except Exception as e1:
-                                try:
-                                    # Method 2: Named parameters in dict
-                                    result = await client.call_tool("get_alerts", arguments={"state": state.upper()})
-                                except Exception as e2:
-                                    # Method 3: Direct parameter passing
-                                    result = await client.call_tool("get_alerts", state.upper())
-                                    
-                        elif tool_choice == "get_forecast":
-                            # Try different argument formats based on FastMCP expectations  
-                            try:
-                                # Method 1: Dictionary format
-                                result = await client.call_tool("get_forecast", {
-                                    "latitude": latitude, 
-                                    "longitude": longitude
-                                })
-                            except Exception as e1:
-                                try:
-                                    # Method 2: Named parameters in dict
-                                    result = await client.call_tool("get_forecast", arguments={
-                                        "latitude": latitude, 
-                                        "longitude": longitude
-                                    })
-                                except Exception as e2:
-                                    # Method 3: Direct parameter passing
-                                    result = await client.call_tool("get_forecast", latitude, longitude)
-                        
-                        st.write(f"### {tool_choice.replace('_', ' ').title()} Results")
-                        
-                        # Handle CallToolResult object from FastMCP
-                        content = None
-                        
-                        if hasattr(result, 'data'):
-                            # FastMCP CallToolResult has a 'data' attribute
-                            content = result.data
-                        elif hasattr(result, 'content') and result.content:
-                            # Check if content is a list with TextContent objects
-                            if isinstance(result.content, list) and len(result.content) > 0:
-                                first_content = result.content[0]
-                                if hasattr(first_content, 'text'):
-                                    content = first_content.text
-                                else:
-                                    content = str(first_content)
-                            else:
-                                content = str(result.content)
-                        elif hasattr(result, 'structured_content') and result.structured_content:
-                            # Check structured_content for 'result' key
-                            if isinstance(result.structured_content, dict) and 'result' in result.structured_content:
-                                content = result.structured_content['result']
-                            else:
-                                content = str(result.structured_content)
-                        elif isinstance(result, dict):
-                            # Fallback to dictionary handling
-                            if 'data' in result:
-                                content = result['data']
-                            elif 'content' in result:
-                                content = result['content']
-                            elif 'result' in result:
-                                content = result['result']
-                            else:
-                                content = str(result)
-                        elif isinstance(result, str):
-                            content = result
-                        else:
-                            content = str(result)
-                        
-                        # Format the content properly
-                        if content and content.strip():
-                            # Split by the separator used in your server (---) 
-                            sections = content.split('\n---\n')
-                            
-                            if len(sections) > 1:
-                                # Multiple alerts or forecast periods
-                                for i, section in enumerate(sections):
-                                    if tool_choice == "get_alerts":
-                                        st.error(f"🚨 Alert {i+1}")  # Red for alerts
-                                    else:  # get_forecast
-                                        st.info(f"📅 Forecast Period {i+1}")  # Blue for forecasts
-                                    
-                                    # Format the section content nicely
-                                    formatted_section = section.strip()
-                                    if formatted_section:
-                                        # Use markdown for better formatting
-                                        lines = formatted_section.split('\n')
-                                        formatted_lines = []
-                                        for line in lines:
-                                            line = line.strip()
-                                            if line.startswith('Event:'):
-                                                formatted_lines.append(f"** {line}**")
-                                            elif line.startswith('Area:'):
-                                                formatted_lines.append(f"** {line}**")
-                                            elif line.startswith('Severity:'):
-                                                formatted_lines.append(f"** {line}**")
-                                            elif line.startswith('Temperature:'):
-                                                formatted_lines.append(f"** {line}**")
-                                            elif line.startswith('Wind:'):
-                                                formatted_lines.append(f"** {line}**")
-                                            elif line.startswith('Forecast:'):
-                                                formatted_lines.append(f"** {line}**")
-                                            elif line.startswith('Description:'):
-                                                formatted_lines.append(f"** Description:**")
-                                            elif line.startswith('Instructions:'):
-                                                formatted_lines.append(f"** Instructions:**")
-                                            elif line.startswith('* WHAT'):
-                                                formatted_lines.append(f"**What:** {line[7:]}")
-                                            elif line.startswith('* WHERE'):
-                                                formatted_lines.append(f"**Where:** {line[8:]}")
-                                            elif line.startswith('* WHEN'):
-                                                formatted_lines.append(f"**When:** {line[7:]}")
-                                            elif line.startswith('* IMPACTS'):
-                                                formatted_lines.append(f"**Impacts:** {line[10:]}")
-                                            elif line:
-                                                formatted_lines.append(line)
-                                        
-                                        st.markdown('\n'.join(formatted_lines))
-                                    
-                                    if i < len(sections) - 1:  # Add separator except for last item
-                                        st.markdown("---")
-                            else:
-                                # Single result or no separator
-                                if "No active alerts" in content or "Unable to fetch" in content:
-                                    st.success(content)  # Green for "no alerts" messages
-                                elif tool_choice == "get_alerts":
-                                    st.error("🚨 Weather Alert")
-                                    # Format single alert
-                                    lines = content.strip().split('\n')
-                                    formatted_lines = []
-                                    for line in lines:
-                                        line = line.strip()
-                                        if line.startswith('Event:'):
-                                            formatted_lines.append(f"** {line}**")
-                                        elif line.startswith('Area:'):
-                                            formatted_lines.append(f"** {line}**")
-                                        elif line.startswith('Severity:'):
-                                            formatted_lines.append(f"** {line}**")
-                                        elif line.startswith('Description:'):
-                                            formatted_lines.append(f"** Description:**")
-                                        elif line.startswith('Instructions:'):
-                                            formatted_lines.append(f"** Instructions:**")
-                                        elif line.startswith('* WHAT'):
-                                            formatted_lines.append(f"**What:** {line[7:]}")
-                                        elif line.startswith('* WHERE'):
-                                            formatted_lines.append(f"**Where:** {line[8:]}")
-                                        elif line.startswith('* WHEN'):
-                                            formatted_lines.append(f"**When:** {line[7:]}")
-                                        elif line.startswith('* IMPACTS'):
-                                            formatted_lines.append(f"**Impacts:** {line[10:]}")
-                                        elif line:
-                                            formatted_lines.append(line)
-                                    
-                                    st.markdown('\n'.join(formatted_lines))
-                                else:
-                                    st.info(" Weather Forecast")
-                                    # Format single forecast
-                                    lines = content.strip().split('\n')
-                                    formatted_lines = []
-                                    for line in lines:
-                                        line = line.strip()
-                                        if line.startswith('Temperature:'):
-                                            formatted_lines.append(f"** {line}**")
-                                        elif line.startswith('Wind:'):
-                                            formatted_lines.append(f"** {line}**")
-                                        elif line.startswith('Forecast:'):
-                                            formatted_lines.append(f"** {line}**")
-                                        elif line.endswith(':') and not line.startswith(' '):
-                                            formatted_lines.append(f"** {line}**")
-                                        elif line:
-                                            formatted_lines.append(line)
-                                    
-                                    st.markdown('\n'.join(formatted_lines))
-                        else:
-                            st.warning("No data returned from the weather service.")
-                            # Show debug info
-                            st.write("**Debug - Raw result:**")
-                            st.json(result.__dict__ if hasattr(result, '__dict__') else str(result))
-                        
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
-                    st.info("Make sure the MCP server is running: `python weather.py`")
-                    
-                    # Additional debugging information
-                    st.markdown("### Troubleshooting:")
-                    st.markdown("""
-                    1. **Check MCP Server**: Ensure `python weather.py` is running
-                    2. **Check URL**: Verify the MCP server URL is correct
-                    3. **Check Arguments**: Ensure the tool arguments match server expectations
-                    4. **Check Logs**: Look at the MCP server console for error messages
-                    """)
-            
-            asyncio.run(fetch_weather_data())
+            try:
+                # Reuse the pooled HTTP MCP session
+                session = get_mcp_session(server_url)
+                
+                # Ask for structured records so nothing has to be re-parsed from text
+                if tool_choice == "get_alerts":
+                    result = run_async(session.call_tool("get_alerts", {
+                        "state": state.upper(),
+                        "format": "structured"
+                    }))
+                elif tool_choice == "get_forecast":
+                    result = run_async(session.call_tool("get_forecast", {
+                        "latitude": latitude, 
+                        "longitude": longitude,
+                        "format": "structured"
+                    }))
+                
+                st.write(f"### {tool_choice.replace('_', ' ').title()} Results")
+
+                records = result.structured_content or {}
+
+                if tool_choice == "get_alerts":
+                    alerts = records.get("alerts", [])
+                    if not alerts:
+                        st.success("No active alerts for this state.")  # Green for "no alerts" messages
+                    for i, alert in enumerate(alerts):
+                        st.error(f"🚨 Alert {i+1}")  # Red for alerts
+                        formatted_lines = [
+                            f"** Event: {alert.get('event', 'Unknown')}**",
+                            f"** Area: {alert.get('areaDesc', 'Unknown')}**",
+                            f"** Severity: {alert.get('severity', 'Unknown')}**",
+                            "** Description:**",
+                            *format_alert_text(alert.get('description') or 'No description available'),
+                            "** Instructions:**",
+                            alert.get('instruction') or 'No specific instructions provided',
+                        ]
+                        st.markdown('\n'.join(formatted_lines))
+
+                        if i < len(alerts) - 1:  # Add separator except for last item
+                            st.markdown("---")
+                else:
+                    periods = records.get("periods", [])
+                    if not periods:
+                        st.warning("No data returned from the weather service.")
+                    for i, period in enumerate(periods):
+                        st.info(f"📅 {period['name']}")  # Blue for forecasts
+                        st.markdown('\n'.join([
+                            f"** Temperature: {period['temperature']}°{period['temperatureUnit']}**",
+                            f"** Wind: {period['windSpeed']} {period['windDirection']}**",
+                            f"** Forecast: {period['detailedForecast']}**",
+                        ]))
+
+                        if i < len(periods) - 1:  # Add separator except for last item
+                            st.markdown("---")
+                
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
+                st.info("Make sure the MCP server is running: `python weather.py`")
+
+                # Additional debugging information
+                st.markdown("### Troubleshooting:")
+                st.markdown("""
+                1. **Check MCP Server**: Ensure `python weather.py` is running
+                2. **Check URL**: Verify the MCP server URL is correct
+                3. **Check Arguments**: Ensure the tool arguments match server expectations
+                4. **Check Logs**: Look at the MCP server console for error messages
+                """)
     
     # Debug and testing section
     st.header("🔧 Debug & Testing")
     
     if st.button("🔍 Test MCP Connection"):
-        async def test_connection():
+        session = get_mcp_session(server_url)
+        try:
+            run_async(session.ping())
+            # Test basic connection
+            st.success(" Successfully connected to MCP server")
+            
+            # List available tools
             try:
-                async with Client(server_url) as client:
-                    # Test basic connection
-                    st.success(" Successfully connected to MCP server")
-                    
-                    # List available tools
-                    try:
-                        tools = await client.list_tools()
-                        st.write("### Available Tools:")
-                        for tool in tools:
-                            st.write(f"**{tool.get('name', 'Unknown')}**: {tool.get('description', 'No description')}")
-                            if 'inputSchema' in tool:
-                                st.json(tool['inputSchema'])
-                    except Exception as e:
-                        st.warning(f"Could not list tools: {e}")
+                tools = run_async(session.list_tools())
+                st.write("### Available Tools:")
+                for tool in tools:
+                    st.write(f"**{tool.name}**: {tool.description or 'No description'}")
+                    st.json(tool.inputSchema)
+            except Exception as e:
+                st.warning(f"Could not list tools: {e}")
+            
+            # Test a simple call
+            try:
+                st.write("### Testing get_alerts with CA...")
+                result = run_async(session.call_tool("get_alerts", {"state": "CA"}))
+                st.success("Tool call successful!")
+                st.write("**Result type:**", type(result).__name__)
+                
+                # Show the CallToolResult structure
+                st.write("**CallToolResult attributes:**")
+                if hasattr(result, '__dict__'):
+                    attrs = {k: str(v)[:200] + "..." if len(str(v)) > 200 else str(v) 
+                           for k, v in result.__dict__.items()}
+                    st.json(attrs)
+                
+                # Extract the actual content
+                content = None
+                if hasattr(result, 'data'):
+                    content = result.data
+                    st.write("**Using result.data:**")
+                elif hasattr(result, 'content') and result.content:
+                    if isinstance(result.content, list) and len(result.content) > 0:
+                        content = result.content[0].text if hasattr(result.content[0], 'text') else str(result.content[0])
+                    else:
+                        content = str(result.content)
+                    st.write("**Using result.content:**")
+                
+                if content:
+                    st.code(content[:500] + "..." if len(content) > 500 else content, language='text')
+                else:
+                    st.error("Could not extract content from result")
                     
-                    # Test a simple call
-                    try:
-                        st.write("### Testing get_alerts with CA...")
-                        result = await client.call_tool("get_alerts", {"state": "CA"})
-                        st.success("Tool call successful!")
-                        st.write("**Result type:**", type(result).__name__)
-                        
-                        # Show the CallToolResult structure
-                        st.write("**CallToolResult attributes:**")
-                        if hasattr(result, '__dict__'):
-                            attrs = {k: str(v)[:200] + "..." if len(str(v)) > 200 else str(v) 
-                                   for k, v in result.__dict__.items()}
-                            st.json(attrs)
-                        
-                        # Extract the actual content
-                        content = None
-                        if hasattr(result, 'data'):
-                            content = result.data
-                            st.write("**Using result.data:**")
-                        elif hasattr(result, 'content') and result.content:
-                            if isinstance(result.content, list) and len(result.content) > 0:
-                                content = result.content[0].text if hasattr(result.content[0], 'text') else str(result.content[0])
-                            else:
-                                content = str(result.content)
-                            st.write("**Using result.content:**")
-                        elif hasattr(result, 'structured_content') and result.structured_content:
-                            if isinstance(result.structured_content, dict) and 'result' in result.structured_content:
-                                content = result.structured_content['result']
-                            else:
-                                content = str(result.structured_content)
-                            st.write("**Using result.structured_content:**")
-                        
-                        if content:
-                            st.code(content[:500] + "..." if len(content) > 500 else content, language='text')
-                        else:
-                            st.error("Could not extract content from result")
-                            
-                    except Exception as e:
-                        st.error(f"Tool call failed: {e}")
-                        st.write("**Trying alternative formats...**")
-                        
-                        # Try alternative formats
-                        try:
-                            result = await client.call_tool("get_alerts", arguments={"state": "CA"})
-                            st.success(" Alternative format worked!")
-                            content = result.data if hasattr(result, 'data') else str(result)
-                            st.code(content[:500] + "..." if len(str(content)) > 500 else str(content), language='text')
-                        except Exception as e2:
-                            try:
-                                result = await client.call_tool("get_alerts", "CA")
-                                st.success(" Direct parameter format worked!")
-                                content = result.data if hasattr(result, 'data') else str(result)
-                                st.code(content[:500] + "..." if len(str(content)) > 500 else str(content), language='text')
-                            except Exception as e3:
-                                st.error(f"All formats failed: {e3}")
-                        
             except Exception as e:
-                st.error(f"Connection failed: {e}")
+                st.error(f"Tool call failed: {e}")
+                
+        except Exception as e:
+            st.error(f"Connection failed: {e}")
         
-        asyncio.run(test_connection())
+        st.caption(f"Session reconnects so far: {session.reconnects}")
+
+    answer_stats = get_answer_cache().as_dict()
+    st.caption(
+        f"Answer cache: {answer_stats['hits']} hits / "
+        f"{answer_stats['hits'] + answer_stats['misses']} lookups "
+        f"({answer_stats['hit_rate']:.0%}), {answer_stats['entries']} entries"
+    )
+
     st.header(" Weather Tips")
     st.info(" Check alerts before traveling")
     st.info(" Layer clothing for temperature changes")
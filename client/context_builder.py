@@ -0,0 +1,224 @@
+"""Assemble the weather data for a chat prompt into a bounded LLM context.
+
+During a large outbreak a state can have hundreds of active alerts, many
+repeating the same multi-paragraph text for different zones. Pasting
+them all into the system prompt inflates tokens, latency and cost, and
+can overflow the model's context. Instead:
+
+1. alerts from every lookup are merged by ID, and alerts with the same
+   event and text are folded into one entry listing all their areas;
+2. entries are ranked: alerts covering a place named in the prompt
+   first, then by CAP severity, then urgency, then soonest expiry;
+3. entries are written in that order until the token budget is spent,
+   with descriptions and instructions clipped at sentence boundaries;
+   when a full entry no longer fits a one-line summary is used, and what
+   is left is counted in a closing line.
+
+Forecasts are small and are kept whole unless they alone would take more
+than half the budget. Tokens are estimated from character counts (about
+four per token for English), which is fast and close enough for budgeting.
+"""
+
+from dataclasses import dataclass, field
+from collections import Counter
+
+SEVERITY_RANK = {"Extreme": 4, "Severe": 3, "Moderate": 2, "Minor": 1}
+URGENCY_RANK = {"Immediate": 4, "Expected": 3, "Future": 2, "Past": 1}
+
+# Characters kept from an alert's description and instruction
+DESCRIPTION_CHARS = 600
+INSTRUCTION_CHARS = 300
+
+# Share of the budget forecasts may use before they are shortened
+FORECAST_SHARE = 0.5
+
+# Tokens kept back for the line counting alerts that did not fit
+OMITTED_LINE_TOKENS = 64
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def clip(text: str, limit: int) -> str:
+    """`text` cut to at most `limit` characters, at a sentence end when possible."""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind("... "))
+    return (cut[:end + 1] if end > limit // 3 else cut.rsplit(" ", 1)[0]) + " [...]"
+
+
+@dataclass
+class Section:
+    """One tool call's result for the prompt.
+
+    `alerts` holds structured alert records for alert lookups, `text` the
+    formatted result of other tools, `error` a failure message. `near`
+    names the place an alert lookup was made for, if it was a point.
+    """
+
+    heading: str
+    alerts: list[dict] | None = None
+    text: str | None = None
+    error: str | None = None
+    near: str | None = None
+
+
+@dataclass
+class AlertEntry:
+    """Alerts with the same event and text, merged."""
+
+    event: str
+    severity: str
+    urgency: str
+    headline: str
+    description: str
+    instruction: str
+    expires: str
+    areas: list[str] = field(default_factory=list)
+    near: set[str] = field(default_factory=set)
+    count: int = 0
+
+    def rank(self) -> tuple:
+        return (
+            -bool(self.near),
+            -SEVERITY_RANK.get(self.severity, 0),
+            -URGENCY_RANK.get(self.urgency, 0),
+            self.expires or "~",
+        )
+
+    def near_text(self) -> str:
+        return f" near {', '.join(sorted(self.near))}" if self.near else ""
+
+    def summary(self) -> str:
+        until = f", until {self.expires}" if self.expires else ""
+        return (
+            f"- {self.event} ({self.severity}, {self.urgency}){self.near_text()}{until}: "
+            f"{self.area_text(120)}"
+        )
+
+    def full(self) -> str:
+        lines = [
+            f"Event: {self.event}{self.near_text()}",
+            f"Severity: {self.severity}  Urgency: {self.urgency}"
+            + (f"  Expires: {self.expires}" if self.expires else ""),
+            f"Area: {self.area_text(400)}",
+        ]
+        if self.headline:
+            lines.append(f"Headline: {self.headline}")
+        if self.description:
+            lines.append(f"Description: {clip(self.description, DESCRIPTION_CHARS)}")
+        if self.instruction:
+            lines.append(f"Instructions: {clip(self.instruction, INSTRUCTION_CHARS)}")
+        return "\n".join(lines)
+
+    def area_text(self, limit: int) -> str:
+        text = "; ".join(dict.fromkeys(self.areas)) or "Unknown"
+        return text if len(text) <= limit else text[:limit].rsplit(";", 1)[0] + "; ..."
+
+
+def merge_alerts(sections: list[Section]) -> list[AlertEntry]:
+    """Alerts of every section, deduplicated and folded by text, best first."""
+    seen: dict[str, AlertEntry] = {}
+    entries: dict[tuple, AlertEntry] = {}
+    for section in sections:
+        for alert in section.alerts or []:
+            alert_id = alert.get("id")
+            entry = seen.get(alert_id) if alert_id else None
+            if entry is None:
+                description = " ".join((alert.get("description") or "").split())
+                key = (alert.get("event"), description)
+                entry = entries.get(key)
+                if entry is None:
+                    entry = entries[key] = AlertEntry(
+                        event=alert.get("event") or "Unknown",
+                        severity=alert.get("severity") or "Unknown",
+                        urgency=alert.get("urgency") or "Unknown",
+                        headline=alert.get("headline") or "",
+                        description=description,
+                        instruction=alert.get("instruction") or "",
+                        expires=alert.get("expires") or "",
+                    )
+                entry.areas.append(alert.get("areaDesc") or "")
+                entry.expires = min(filter(None, [entry.expires, alert.get("expires")]), default="")
+                entry.count += 1
+                if alert_id:
+                    seen[alert_id] = entry
+            if section.near:
+                entry.near.add(section.near)
+    return sorted(entries.values(), key=AlertEntry.rank)
+
+
+def _fit_forecast(text: str, budget: int) -> str:
+    """Leading forecast periods (separated by ---) that fit in `budget` tokens."""
+    periods = text.split("\n---\n")
+    kept = []
+    for period in periods:
+        if kept and estimate_tokens("\n---\n".join([*kept, period])) > budget:
+            break
+        kept.append(period)
+    omitted = len(periods) - len(kept)
+    return "\n---\n".join(kept) + (f"\n({omitted} later periods omitted)" if omitted else "")
+
+
+def build_context(sections: list[Section], budget: int) -> str:
+    """The weather data as prompt text of roughly at most `budget` tokens."""
+    parts = []
+    errors = [f"\n\n{section.error}\n" for section in sections if section.error]
+    used = sum(map(estimate_tokens, errors))
+
+    forecasts = [section for section in sections if section.text]
+    if forecasts:
+        share = max(int(budget * FORECAST_SHARE) // len(forecasts), 1)
+        for section in forecasts:
+            text = section.text
+            if estimate_tokens(text) > share:
+                text = _fit_forecast(text, share)
+            part = f"\n\n=== {section.heading} ===\n{text}\n"
+            parts.append(part)
+            used += estimate_tokens(part)
+
+    lookups = [section for section in sections if section.alerts is not None]
+    if lookups:
+        entries = merge_alerts(lookups)
+        checked = ", ".join(section.heading for section in lookups)
+        if not entries:
+            parts.append(f"\n\n=== Weather Alerts ===\nNo active alerts ({checked}).\n")
+        else:
+            total = sum(entry.count for entry in entries)
+            header = (
+                f"\n\n=== Weather Alerts ({checked}) ===\n"
+                f"{total} active alerts, most relevant first:\n"
+            )
+            lines = [header]
+            used += estimate_tokens(header)
+            shown = 0
+            limit = budget - OMITTED_LINE_TOKENS
+            for entry in entries:
+                full = entry.full() + "\n---\n"
+                brief = entry.summary() + "\n"
+                if used + estimate_tokens(full) <= limit:
+                    lines.append(full)
+                    used += estimate_tokens(full)
+                elif used + estimate_tokens(brief) <= limit:
+                    lines.append(brief)
+                    used += estimate_tokens(brief)
+                else:
+                    break
+                shown += 1
+            rest = entries[shown:]
+            if rest:
+                events = Counter()
+                for entry in rest:
+                    events[entry.event] += entry.count
+                lines.append(
+                    f"(and {sum(e.count for e in rest)} lower-priority alerts not shown: "
+                    + ", ".join(f"{count} {event}" for event, count in events.most_common())
+                    + ")\n"
+                )
+            parts.append("".join(lines))
+
+    return "".join(parts) + "".join(errors)
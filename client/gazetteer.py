@@ -0,0 +1,224 @@
+"""Find US states and places mentioned in a chat prompt.
+
+Every state, territory and place name in the packed gazetteer
+(data/places.tsv.gz, built by build_gazetteer.py) is compiled into one
+Aho-Corasick automaton, so a prompt is scanned once, in time linear in
+its length, however many names there are. Matches must sit on word
+boundaries, overlapping matches keep the longest ("New York City" over
+"New York" and "York"), and names that are also ordinary words are
+only trusted when written the way a location would be:
+
+- two-letter state codes only in capitals ("TX", not "tx"), and the
+  codes that are English words (IN, OR, ME, HI, OK, AS) only after a
+  comma, as in "Tulsa, OK";
+- one-word places smaller than PROMINENT_POPULATION only when
+  capitalized ("Mobile", "Reading").
+
+A name that is both a state and a place is the state, unless a state
+written right after it says otherwise ("Washington, DC"). A place name
+shared by several states resolves to the one in the state written right
+after it ("Portland, ME"), else to one in a state mentioned elsewhere in
+the prompt (unless that one is tiny by comparison), else to the most
+populous.
+
+The gazetteer is loaded and compiled on first use.
+"""
+
+from dataclasses import dataclass
+from functools import cache
+import gzip
+import os
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "places.tsv.gz")
+
+# One-word places at least this large match even when typed in lowercase
+PROMINENT_POPULATION = 200_000
+
+# A place in a state mentioned elsewhere in the prompt beats the most
+# populous place of that name unless it is this many times smaller
+SIZE_RATIO = 10
+
+# State codes that are also common words
+WORD_CODES = frozenset({"IN", "OR", "ME", "HI", "OK", "AS"})
+
+
+@dataclass(frozen=True, slots=True)
+class Place:
+    name: str
+    state: str
+    latitude: float
+    longitude: float
+    population: int
+
+
+@dataclass(frozen=True, slots=True)
+class Mention:
+    """A location found in a prompt; `place` is None for a state mention."""
+
+    start: int
+    end: int
+    text: str
+    state: str
+    place: Place | None = None
+
+    @property
+    def kind(self) -> str:
+        return "state" if self.place is None else "place"
+
+
+class Automaton:
+    """Aho-Corasick automaton over lowercase keys."""
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+
+    def add(self, key: str) -> None:
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append(key)
+
+    def build(self) -> None:
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def search(self, text: str):
+        """Yield (start, end) index pairs and the key of every match in `text`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for key in out[node]:
+                yield index + 1 - len(key), index + 1, key
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+def _at_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (
+        end == len(text) or not text[end].isalnum()
+    )
+
+
+class Gazetteer:
+    """States and places compiled into a single automaton."""
+
+    def __init__(self, states: dict[str, str], places: dict[str, list[Place]]):
+        self.states = states
+        self._state_names = {name.lower(): code for code, name in states.items()}
+        self._codes = {code.lower(): code for code in states}
+        # Most populous first, the default when nothing disambiguates
+        self.places = {
+            key: sorted(candidates, key=lambda place: -place.population)
+            for key, candidates in places.items()
+        }
+        self.automaton = Automaton()
+        for key in {*self._state_names, *self._codes, *self.places}:
+            self.automaton.add(key)
+        self.automaton.build()
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_PATH) -> "Gazetteer":
+        states: dict[str, str] = {}
+        places: dict[str, list[Place]] = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                kind, *fields = line.rstrip("\n").split("\t")
+                if kind == "S":
+                    code, name = fields
+                    states[code] = name
+                else:
+                    name, state, lat, lon, population = fields
+                    places.setdefault(name.lower(), []).append(
+                        Place(name, state, float(lat), float(lon), int(population))
+                    )
+        return cls(states, places)
+
+    def _spans(self, text: str, lowered: str) -> dict[tuple[int, int], list]:
+        """(start, end) -> [state code or None, places or None] for plausible hits."""
+        spans: dict[tuple[int, int], list] = {}
+        for start, end, key in self.automaton.search(lowered):
+            if not _at_boundary(lowered, start, end):
+                continue
+            written = text[start:end]
+            state = self._state_names.get(key)
+            code = self._codes.get(key)
+            if code and written == code and (
+                code not in WORD_CODES or text[:start].rstrip().endswith(",")
+            ):
+                state = code
+            places = self.places.get(key)
+            if places and not (
+                " " in key or places[0].population >= PROMINENT_POPULATION or written[0].isupper()
+            ):
+                places = None
+            if state or places:
+                spans[start, end] = [state, places]
+        return spans
+
+    def find(self, text: str) -> list[Mention]:
+        """Every state and place mentioned in `text`, in order of appearance."""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lowercased; keep indices aligned
+            lowered = "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+        # Leftmost-longest among overlapping hits
+        spans = self._spans(text, lowered)
+        chosen = []
+        covered = 0
+        for start, end in sorted(spans, key=lambda span: (span[0], span[0] - span[1])):
+            if start >= covered:
+                chosen.append((start, end, *spans[start, end]))
+                covered = end
+
+        mentioned_states = {state for _, _, state, _ in chosen if state}
+        mentions = []
+        qualifiers = set()
+        for i, (start, end, state, places) in enumerate(chosen):
+            if i in qualifiers:
+                continue
+            if places:
+                # A state written right after the name picks the place ("Portland, ME")
+                following = chosen[i + 1] if i + 1 < len(chosen) else None
+                if following and following[2] and text[end:following[0]].strip() in (",", ""):
+                    place = next((p for p in places if p.state == following[2]), None)
+                    if place:
+                        qualifiers.add(i + 1)
+                        mentions.append(Mention(start, end, text[start:end], place.state, place))
+                        continue
+            if state:
+                mentions.append(Mention(start, end, text[start:end], state))
+                continue
+            place = places[0]
+            nearby = next((p for p in places if p.state in mentioned_states), None)
+            if nearby and nearby.population * SIZE_RATIO >= place.population:
+                place = nearby
+            mentions.append(Mention(start, end, text[start:end], place.state, place))
+        return mentions
+
+
+@cache
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Gazetteer:
+    """The gazetteer, loaded and compiled once per process."""
+    return Gazetteer.load(path)
@@ -0,0 +1,147 @@
+"""Long-lived MCP session for the Streamlit client.
+
+Streamlit reruns the whole script on every interaction, so the client
+used to create an event loop and open (and initialize) a new MCP session
+per click. Here one event loop runs on a background thread for the life
+of the process, and a single FastMCP `Client` per server URL stays
+connected on it. Callers submit coroutines with `BackgroundLoop.run`, or
+consume async iterators (such as a streamed LLM answer) item by item with
+`BackgroundLoop.iterate`.
+Sessions idle for a while are pinged before use, and a broken session is
+reconnected once and the call retried.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Coroutine, Iterator
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+# Ping a session before use when it has been idle this long (seconds)
+HEALTH_CHECK_INTERVAL = 30.0
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever on a daemon thread."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(self, coro: Coroutine, timeout: float | None = None) -> Any:
+        """Run a coroutine on the loop and wait for its result from this thread."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def iterate(self, items: AsyncIterator, timeout: float | None = None) -> Iterator:
+        """Consume an async iterator on the loop, yielding its items on this thread.
+
+        Raises TimeoutError when no item arrives within `timeout` seconds.
+        Stopping early (or the timeout) cancels the iteration on the loop.
+        """
+        results: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump() -> None:
+            try:
+                async for item in items:
+                    results.put(item)
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                try:
+                    item = results.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No result within {timeout:g}s") from None
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+
+class MCPSession:
+    """A connected FastMCP client that reconnects when the session breaks.
+
+    Must only be used from coroutines running on the `BackgroundLoop` it
+    was created for. Calls on one session run concurrently.
+    """
+
+    def __init__(self, server_url: str):
+        self.server_url = server_url
+        self.reconnects = 0
+        self._client: Client | None = None
+        self._last_used = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> Client:
+        await self.close()
+        client = Client(self.server_url)
+        await client.__aenter__()
+        self._client = client
+        return client
+
+    async def client(self) -> Client:
+        """The connected client, checked with a ping when it has been idle."""
+        async with self._lock:
+            client = self._client
+            if client is None or not client.is_connected():
+                client = await self._connect()
+            elif time.monotonic() - self._last_used > HEALTH_CHECK_INTERVAL:
+                try:
+                    await client.ping()
+                except Exception:
+                    self.reconnects += 1
+                    client = await self._connect()
+            self._last_used = time.monotonic()
+            return client
+
+    async def _reconnect(self, broken: Client) -> Client:
+        async with self._lock:
+            if self._client is broken:
+                self.reconnects += 1
+                await self._connect()
+            return self._client
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """Call a `Client` method, reconnecting once if the session is broken."""
+        client = await self.client()
+        try:
+            return await getattr(client, method)(*args, **kwargs)
+        except ToolError:
+            raise  # the tool failed, the session is fine
+        except Exception:
+            client = await self._reconnect(client)
+            return await getattr(client, method)(*args, **kwargs)
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        return await self.call("call_tool", name, arguments)
+
+    async def list_tools(self) -> list:
+        return await self.call("list_tools")
+
+    async def ping(self) -> bool:
+        return await self.call("ping")
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception:
+                pass  # the session is being replaced anyway
@@ -0,0 +1,275 @@
+"""Which active alerts cover a coordinate.
+
+Alerts either carry their own polygon (most warnings) or only list the
+UGC forecast zones and counties they cover (most watches and
+advisories). Zone boundaries practically never change, so they are
+fetched once, stored in SQLite and shared between workers.
+
+For each alert snapshot an `AlertLocator` packs every distinct shape, the
+alert polygons plus the boundaries of the zones referenced by
+polygon-less alerts, into a static R-tree over bounding boxes. A lookup
+walks the tree to the few shapes whose box holds the point and runs an
+exact point-in-polygon test on those only.
+"""
+
+from array import array
+from itertools import chain
+import json
+import math
+import threading
+import time
+from typing import Any, Iterable
+
+from alert_index import AlertSnapshot, alert_zones
+from nws_cache import connect_shared
+
+# A ring is a flat array of longitude, latitude pairs; a polygon is its
+# outer ring followed by any holes
+Ring = array
+Polygon = list[Ring]
+BBox = tuple[float, float, float, float]  # min lon, min lat, max lon, max lat
+
+# Entries per R-tree node
+NODE_CAPACITY = 16
+
+# Seconds before a zone NWS reported missing is asked for again
+ZONE_RETRY_INTERVAL = 3600.0
+
+
+def polygons(geometry: dict[str, Any] | list | None) -> list[Polygon]:
+    """The polygons of a GeoJSON Polygon, MultiPolygon or GeometryCollection.
+
+    Geometry that is already a list of polygons is passed through; rings
+    read back as plain lists (from the JSON response cache) become arrays.
+    """
+    if not geometry:
+        return []
+    if isinstance(geometry, list):
+        return [
+            [ring if isinstance(ring, array) else array("d", ring) for ring in polygon]
+            for polygon in geometry
+        ]
+    kind = geometry.get("type")
+    if kind == "Polygon":
+        parts = [geometry.get("coordinates") or []]
+    elif kind == "MultiPolygon":
+        parts = geometry.get("coordinates") or []
+    elif kind == "GeometryCollection":
+        return [polygon for part in geometry.get("geometries", []) for polygon in polygons(part)]
+    else:
+        return []
+    return [[_ring(ring) for ring in part] for part in parts if part and part[0]]
+
+
+def _ring(points: list[list[float]]) -> Ring:
+    flat = array("d", chain.from_iterable(points))
+    if len(flat) != 2 * len(points):
+        # Some positions carry an altitude
+        flat = array("d", [value for point in points for value in point[:2]])
+    return flat
+
+
+def bbox(polygon: Polygon) -> BBox:
+    xs, ys = polygon[0][0::2], polygon[0][1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _in_ring(x: float, y: float, ring: Ring) -> bool:
+    """Even-odd ray casting towards +x."""
+    inside = False
+    xs, ys = ring[0::2], ring[1::2]
+    x1, y1 = xs[-1], ys[-1]
+    for x2, y2 in zip(xs, ys):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def contains(polygon: Polygon, x: float, y: float) -> bool:
+    """Whether (x, y) lies inside the outer ring and outside every hole."""
+    return _in_ring(x, y, polygon[0]) and not any(_in_ring(x, y, hole) for hole in polygon[1:])
+
+
+class RTree:
+    """Static R-tree bulk-loaded with Sort-Tile-Recursive packing.
+
+    Nodes are (bbox, children) tuples; leaf children are (bbox, value).
+    """
+
+    def __init__(self, entries: Iterable[tuple[BBox, Any]], capacity: int = NODE_CAPACITY):
+        self.capacity = capacity
+        level = list(entries)
+        self.size = len(level)
+        while len(level) > capacity:
+            level = [(_union(group), group) for group in self._pack(level)]
+        self.root = (_union(level), level) if level else None
+
+    def _pack(self, entries: list[tuple[BBox, Any]]) -> list[list[tuple[BBox, Any]]]:
+        """Group entries into nodes: vertical slices by x, then runs by y."""
+        nodes = math.ceil(len(entries) / self.capacity)
+        per_slice = self.capacity * math.ceil(math.sqrt(nodes))
+        by_x = sorted(entries, key=lambda entry: entry[0][0] + entry[0][2])
+        groups = []
+        for start in range(0, len(by_x), per_slice):
+            vertical = sorted(
+                by_x[start:start + per_slice], key=lambda entry: entry[0][1] + entry[0][3]
+            )
+            groups += [
+                vertical[i:i + self.capacity] for i in range(0, len(vertical), self.capacity)
+            ]
+        return groups
+
+    def search(self, x: float, y: float) -> list[Any]:
+        """Values whose bounding box contains (x, y)."""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            _, children = stack.pop()
+            for entry in children:
+                (min_x, min_y, max_x, max_y), child = entry
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    if isinstance(child, list):
+                        stack.append(entry)
+                    else:
+                        found.append(child)
+        return found
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def _union(entries: list[tuple[BBox, Any]]) -> BBox:
+    return (
+        min(box[0] for box, _ in entries),
+        min(box[1] for box, _ in entries),
+        max(box[2] for box, _ in entries),
+        max(box[3] for box, _ in entries),
+    )
+
+
+def zone_endpoints(ugc: str) -> list[str]:
+    """NWS /zones types to try for a UGC code; "C" is a county, "Z" a zone."""
+    if ugc[2:3] == "C":
+        return ["county"]
+    return ["forecast", "fire"]
+
+
+class ZoneBoundaryStore:
+    """SQLite-backed UGC zone boundaries with an in-memory mirror of parsed polygons."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._zones: dict[str, list[Polygon]] = {}
+        self._failed: dict[str, float] = {}
+        self._db = connect_shared(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS zones (ugc TEXT PRIMARY KEY, geometry TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def warm(self) -> int:
+        """Load every stored boundary into memory; returns the count."""
+        with self._lock:
+            rows = self._db.execute("SELECT ugc, geometry FROM zones").fetchall()
+        self._zones = {ugc: polygons(json.loads(geometry)) for ugc, geometry in rows}
+        return len(self._zones)
+
+    def get(self, ugc: str) -> list[Polygon] | None:
+        return self._zones.get(ugc)
+
+    def missing(self, codes: Iterable[str]) -> list[str]:
+        """Codes with no known boundary, skipping those that failed recently."""
+        now = time.monotonic()
+        wanted = sorted({
+            code for code in codes
+            if code not in self._zones and now - self._failed.get(code, -math.inf) > ZONE_RETRY_INTERVAL
+        })
+        if not wanted:
+            return []
+        # Another worker may have fetched some of them since warm()
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT ugc, geometry FROM zones WHERE ugc IN ({','.join('?' * len(wanted))})",
+                wanted,
+            ).fetchall()
+        for ugc, geometry in rows:
+            self._zones[ugc] = polygons(json.loads(geometry))
+        return [code for code in wanted if code not in self._zones]
+
+    def put(self, ugc: str, geometry: dict[str, Any] | None) -> None:
+        """Store a boundary, or remember that NWS has none for `ugc` when None.
+
+        Only pass None for a zone NWS reported missing: it is not asked
+        for again for ZONE_RETRY_INTERVAL seconds.
+        """
+        shapes = polygons(geometry)
+        if not shapes:
+            self._failed[ugc] = time.monotonic()
+            return
+        self._zones[ugc] = shapes
+        self._failed.pop(ugc, None)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO zones VALUES (?, ?)", (ugc, json.dumps(geometry))
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._zones)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def zones_needed(snapshot: AlertSnapshot) -> set[str]:
+    """UGC codes whose boundaries locate the snapshot's polygon-less alerts."""
+    return {
+        code
+        for feature in snapshot.features
+        if not polygons(feature.get("geometry"))
+        for code in alert_zones(feature)
+    }
+
+
+class AlertLocator:
+    """R-tree over the shapes of one alert snapshot."""
+
+    def __init__(self, snapshot: AlertSnapshot, zones: ZoneBoundaryStore):
+        self.snapshot = snapshot
+        # Shape key -> alert indices; a zone shared by several alerts is indexed once
+        covers: dict[Any, list[int]] = {}
+        shapes: dict[Any, list[Polygon]] = {}
+        self.unlocated = 0
+        for i, feature in enumerate(snapshot.features):
+            own = polygons(feature.get("geometry"))
+            if own:
+                shapes[i] = own
+                covers[i] = [i]
+                continue
+            located = False
+            for code in alert_zones(feature):
+                boundary = zones.get(code)
+                if boundary:
+                    shapes[code] = boundary
+                    covers.setdefault(code, []).append(i)
+                    located = True
+            self.unlocated += not located
+
+        self._covers = covers
+        self.tree = RTree(
+            (bbox(polygon), (key, polygon)) for key, parts in shapes.items() for polygon in parts
+        )
+
+    def find(self, latitude: float, longitude: float) -> list[dict[str, Any]]:
+        """Alerts whose area contains the coordinate, in feed order."""
+        hits = set()
+        for key, polygon in self.tree.search(longitude, latitude):
+            if contains(polygon, longitude, latitude):
+                hits.update(self._covers[key])
+        return [self.snapshot.features[i] for i in sorted(hits)]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"shapes": len(self.tree), "unlocated_alerts": self.unlocated}
@@ -0,0 +1,278 @@
+"""Nationwide active-alert snapshot with in-memory indexes.
+
+One /alerts/active pull is parsed into indexes by state, zone (UGC code),
+severity and event type. Each refresh builds a new snapshot and swaps it
+in whole, so readers always see a consistent view without locking.
+
+Consecutive snapshots are diffed into a change log of added, updated and
+expired alerts that clients can page through with a cursor. Cursors are
+snapshot times in epoch milliseconds rather than per-process counters,
+so a cursor issued by one worker process is understood by the others.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+import time
+from typing import Any, Awaitable, Callable
+
+# How far a cursor may lie ahead of this process's clock before it is
+# treated as invalid rather than as coming from a worker that refreshed first
+MAX_CURSOR_SKEW_MS = 10 * 60 * 1000
+
+# Areas NWS serves alerts for: states, territories and marine areas (the
+# first two letters of their zones' UGC codes)
+AREA_CODES = frozenset(
+    "AL AK AS AR AZ CA CO CT DE DC FL GA GU HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO"
+    " MT NE NV NH NJ NM NY NC ND OH OK OR PA PR RI SC SD TN TX UT VT VI VA WA WV WI WY"
+    " MP PW FM MH"
+    " AM AN GM LC LE LH LM LO LS PH PK PM PS PZ SL".split()
+)
+
+# CAP severities, most severe first
+SEVERITY_RANK = {"Extreme": 4, "Severe": 3, "Moderate": 2, "Minor": 1, "Unknown": 0}
+
+
+def severity_rank(severity: str | None) -> int:
+    return SEVERITY_RANK.get((severity or "Unknown").title(), 0)
+
+
+def alert_id(feature: dict) -> str:
+    return feature.get("id") or feature.get("properties", {}).get("id", "")
+
+
+def alert_zones(feature: dict) -> list[str]:
+    """UGC zone/county codes an alert covers, e.g. ["TXZ211", "TXC453"]."""
+    geocode = feature.get("properties", {}).get("geocode") or {}
+    return [code.upper() for code in geocode.get("UGC", [])]
+
+
+@dataclass
+class AlertSnapshot:
+    """All active alerts at one point in time, indexed for lookups."""
+
+    features: list[dict[str, Any]]
+    fetched_at: float
+    by_state: dict[str, list[int]] = field(default_factory=dict)
+    by_zone: dict[str, list[int]] = field(default_factory=dict)
+    by_severity: dict[int, list[int]] = field(default_factory=dict)
+    by_event: dict[str, list[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, data: dict[str, Any], fetched_at: float | None = None) -> "AlertSnapshot":
+        snapshot = cls(data.get("features", []), fetched_at or time.time())
+        for i, feature in enumerate(snapshot.features):
+            props = feature.get("properties", {})
+            zones = alert_zones(feature)
+            for state in {zone[:2] for zone in zones}:
+                snapshot.by_state.setdefault(state, []).append(i)
+            for zone in zones:
+                snapshot.by_zone.setdefault(zone, []).append(i)
+            snapshot.by_severity.setdefault(severity_rank(props.get("severity")), []).append(i)
+            event = (props.get("event") or "").lower()
+            snapshot.by_event.setdefault(event, []).append(i)
+        return snapshot
+
+    def query(
+        self,
+        state: str | None = None,
+        zone: str | None = None,
+        min_severity: str | None = None,
+        event: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Alerts matching every given filter, in feed order."""
+        candidates = []
+        if state:
+            candidates.append(self.by_state.get(state.upper(), []))
+        if zone:
+            candidates.append(self.by_zone.get(zone.upper(), []))
+        if event:
+            candidates.append(self.by_event.get(event.lower(), []))
+        if min_severity:
+            threshold = severity_rank(min_severity)
+            candidates.append(sorted(
+                i for rank, ids in self.by_severity.items() if rank >= threshold for i in ids
+            ))
+
+        if not candidates:
+            return list(self.features)
+
+        # Walk the most selective index and probe the others
+        candidates.sort(key=len)
+        others = [set(ids) for ids in candidates[1:]]
+        return [
+            self.features[i] for i in candidates[0] if all(i in ids for ids in others)
+        ]
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+@dataclass(slots=True)
+class AlertChange:
+    """One entry in the alert change log."""
+
+    cursor: int  # time of the snapshot the change was seen in, epoch ms
+    kind: str  # "added", "updated" or "expired"
+    alert_id: str
+    zones: tuple[str, ...]
+    feature: dict[str, Any] | None  # None for expired alerts
+
+    def in_state(self, state: str) -> bool:
+        state = state.upper()
+        return any(zone.startswith(state) for zone in self.zones)
+
+
+class AlertChangeLog:
+    """Bounded log of alert changes between consecutive snapshots.
+
+    Alerts are compared by ID and their `updated`/`expires` timestamps.
+    Every worker diffs the same NWS feed, so any change made after a
+    cursor's snapshot shows up in every worker's log at a later time: a
+    cursor from another worker yields every missed change, at worst some
+    twice.
+    """
+
+    def __init__(self, max_changes: int = 10000):
+        self.changes: deque[AlertChange] = deque(maxlen=max_changes)
+        # Cursor of the latest recorded snapshot
+        self.cursor = 0
+        # Cursors before this may have missed changes: the log started
+        # later, or entries were dropped
+        self.horizon: int | None = None
+        self._versions: dict[str, tuple[Any, Any]] = {}
+        self._zones: dict[str, tuple[str, ...]] = {}
+
+    def record(self, snapshot: AlertSnapshot) -> list[AlertChange]:
+        """Diff `snapshot` against the previous one and append the changes."""
+        self.cursor = max(int(snapshot.fetched_at * 1000), self.cursor + 1)
+        if self.horizon is None:
+            self.horizon = self.cursor
+        recorded = []
+        versions = {}
+        zones = {}
+        for feature in snapshot.features:
+            props = feature.get("properties", {})
+            key = alert_id(feature)
+            versions[key] = (props.get("updated"), props.get("expires"))
+            zones[key] = tuple(alert_zones(feature))
+            previous = self._versions.get(key)
+            if previous is None:
+                recorded.append(self._append("added", key, zones[key], feature))
+            elif previous != versions[key]:
+                recorded.append(self._append("updated", key, zones[key], feature))
+
+        for key in self._versions.keys() - versions.keys():
+            recorded.append(self._append("expired", key, self._zones[key], None))
+
+        self._versions = versions
+        self._zones = zones
+        return recorded
+
+    def _append(
+        self, kind: str, key: str, zones: tuple[str, ...], feature: dict | None
+    ) -> AlertChange:
+        if len(self.changes) == self.changes.maxlen:
+            self.horizon = max(self.horizon, self.changes[0].cursor)
+        change = AlertChange(self.cursor, kind, key, zones, feature)
+        self.changes.append(change)
+        return change
+
+    def since(self, cursor: int) -> list[AlertChange] | None:
+        """Changes after `cursor`, or None when the caller must resync from scratch.
+
+        A cursor ahead of this log, issued by a worker that refreshed
+        sooner, has no changes yet.
+        """
+        if self.horizon is None or cursor < self.horizon:
+            return None
+        if cursor > time.time() * 1000 + MAX_CURSOR_SKEW_MS:
+            return None
+        return [change for change in self.changes if change.cursor > cursor]
+
+
+class AlertSnapshotEngine:
+    """Periodically rebuild the nationwide alert snapshot in the background.
+
+    `fetch` must raise or return None when the upstream fails, never a
+    stale copy: getting the previous feed object back counts as NWS
+    confirming that nothing changed. `on_change`, when given, is awaited
+    with the new changes after every refresh that produced any.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[dict[str, Any] | None]],
+        interval: float,
+        on_change: Callable[[list[AlertChange]], Awaitable[None]] | None = None,
+    ):
+        self.fetch = fetch
+        self.interval = interval
+        self.on_change = on_change
+        self.snapshot: AlertSnapshot | None = None
+        self.changes = AlertChangeLog()
+        self._data: dict[str, Any] | None = None
+        self.refreshes = 0
+        self.failures = 0
+        self._task: asyncio.Task | None = None
+
+    def current(self) -> AlertSnapshot | None:
+        """The latest snapshot, or None when there is none recent enough to trust."""
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.age() > 3 * self.interval:
+            return None
+        return snapshot
+
+    async def refresh(self) -> AlertSnapshot | None:
+        try:
+            data = await self.fetch()
+        except Exception as e:
+            print(f"Alert snapshot refresh failed: {e!r}")
+            data = None
+        if not data or "features" not in data:
+            self.failures += 1
+            return None
+        self.refreshes += 1
+        if data is self._data and self.snapshot is not None:
+            # Fresh in the response cache or not modified upstream; nothing to rebuild
+            self.snapshot.fetched_at = time.time()
+            return self.snapshot
+
+        snapshot = AlertSnapshot.build(data)
+        self.snapshot = snapshot
+        self._data = data
+        changes = self.changes.record(snapshot)
+        if changes and self.on_change is not None:
+            await self.on_change(changes)
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failures += 1
+                print(f"Alert snapshot refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def as_dict(self) -> dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "alerts": len(snapshot.features) if snapshot else 0,
+            "age_seconds": snapshot.age() if snapshot else None,
+            "change_cursor": self.changes.cursor,
+        }
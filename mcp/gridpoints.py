@@ -0,0 +1,113 @@
+"""Persistent coordinate -> NWS gridpoint index.
+
+The /points lookup that maps a latitude/longitude to a forecast office and
+grid cell practically never changes, so resolved points are stored in
+SQLite and mirrored in a dict for O(1) lookups. Worker processes share
+the database, so a point resolved by one worker is found by the others.
+"""
+
+from dataclasses import dataclass
+import threading
+from typing import Any
+
+from nws_cache import connect_shared
+
+# NWS accepts at most four decimal places (~11 m), anything finer redirects
+COORD_PRECISION = 4
+
+
+@dataclass(frozen=True, slots=True)
+class Gridpoint:
+    """Where a coordinate lives on the NWS grid."""
+
+    office: str
+    grid_x: int
+    grid_y: int
+    forecast: str
+    forecast_hourly: str | None = None
+    forecast_grid_data: str | None = None
+
+    @classmethod
+    def from_points(cls, props: dict[str, Any]) -> "Gridpoint | None":
+        """Build from the `properties` of a /points response."""
+        if not props.get("forecast"):
+            return None
+        return cls(
+            office=props.get("gridId", ""),
+            grid_x=props.get("gridX", 0),
+            grid_y=props.get("gridY", 0),
+            forecast=props["forecast"],
+            forecast_hourly=props.get("forecastHourly"),
+            forecast_grid_data=props.get("forecastGridData"),
+        )
+
+
+def round_coords(latitude: float, longitude: float) -> tuple[float, float]:
+    return round(latitude, COORD_PRECISION), round(longitude, COORD_PRECISION)
+
+
+class GridpointIndex:
+    """SQLite-backed gridpoint index with an in-memory mirror."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[float, float], Gridpoint] = {}
+        self._db = connect_shared(path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS gridpoints (
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                office TEXT NOT NULL,
+                grid_x INTEGER NOT NULL,
+                grid_y INTEGER NOT NULL,
+                forecast TEXT NOT NULL,
+                forecast_hourly TEXT,
+                forecast_grid_data TEXT,
+                PRIMARY KEY (latitude, longitude)
+            )"""
+        )
+        self._db.commit()
+
+    def warm(self) -> int:
+        """Load every stored gridpoint into memory; returns the count."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM gridpoints").fetchall()
+        self._entries = {(row[0], row[1]): Gridpoint(*row[2:]) for row in rows}
+        return len(self._entries)
+
+    def get(self, latitude: float, longitude: float) -> Gridpoint | None:
+        key = round_coords(latitude, longitude)
+        gridpoint = self._entries.get(key)
+        if gridpoint is None:
+            # Another worker may have resolved it since warm()
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT * FROM gridpoints WHERE latitude = ? AND longitude = ?", key
+                ).fetchone()
+            if row is not None:
+                gridpoint = self._entries[key] = Gridpoint(*row[2:])
+        return gridpoint
+
+    def put(self, latitude: float, longitude: float, gridpoint: Gridpoint) -> None:
+        key = round_coords(latitude, longitude)
+        self._entries[key] = gridpoint
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO gridpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *key,
+                    gridpoint.office,
+                    gridpoint.grid_x,
+                    gridpoint.grid_y,
+                    gridpoint.forecast,
+                    gridpoint.forecast_hourly,
+                    gridpoint.forecast_grid_data,
+                ),
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        self._db.close()
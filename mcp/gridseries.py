@@ -0,0 +1,203 @@
+"""Columnar time series from NWS hourly forecasts and raw gridpoint data.
+
+NWS gridpoint layers are lists of {"validTime": "<start>/<ISO-8601 duration>",
+"value": ...} runs of varying length. They are expanded onto a common
+hourly axis so every variable becomes one array aligned with the same
+timestamps, which is far smaller than per-hour prose and can be fed to
+charts and models directly.
+"""
+
+import base64
+from datetime import datetime, timezone
+import math
+import re
+import struct
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional speedup
+    np = None
+
+HOUR = 3600
+
+# Layers kept from /gridpoints/{office}/{x},{y}; the rest of the payload is dropped
+GRID_LAYERS = (
+    "temperature",
+    "dewpoint",
+    "relativeHumidity",
+    "apparentTemperature",
+    "skyCover",
+    "windDirection",
+    "windSpeed",
+    "windGust",
+    "probabilityOfPrecipitation",
+    "quantitativePrecipitation",
+    "snowfallAmount",
+)
+
+_DURATION = re.compile(
+    r"P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?)?$"
+)
+
+
+def parse_duration_hours(duration: str) -> int:
+    """Whole hours in an ISO-8601 duration such as PT3H or P1DT6H (at least 1)."""
+    match = _DURATION.match(duration)
+    if not match:
+        raise ValueError(f"Unsupported duration: {duration}")
+    days, hours, minutes = (int(match[name] or 0) for name in ("days", "hours", "minutes"))
+    return max(days * 24 + hours + math.ceil(minutes / 60), 1)
+
+
+def parse_time(timestamp: str) -> int:
+    """Epoch seconds for an ISO-8601 timestamp."""
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+
+def parse_valid_time(valid_time: str) -> tuple[int, int]:
+    """Split "<start>/<duration>" into (start epoch seconds, hours)."""
+    start, _, duration = valid_time.partition("/")
+    return parse_time(start), parse_duration_hours(duration)
+
+
+def expand_runs(
+    starts: list[int], hours: list[int], values: list[float | None], axis_start: int, length: int
+):
+    """Spread (start, hours, value) runs onto an hourly axis of `length` slots.
+
+    Slots no run covers are NaN. Returns a float64 ndarray when NumPy is
+    available, otherwise a list of floats.
+    """
+    if np is not None:
+        out = np.full(length, np.nan)
+        if not starts:
+            return out
+        durations = np.asarray(hours, dtype=np.int64)
+        first = (np.asarray(starts, dtype=np.int64) - axis_start) // HOUR
+        # Slot of every expanded hour: each run's first slot plus 0..duration-1
+        run_offsets = np.cumsum(durations) - durations
+        slots = np.repeat(first - run_offsets, durations) + np.arange(durations.sum())
+        expanded = np.repeat(
+            np.asarray([np.nan if v is None else v for v in values], dtype=np.float64),
+            durations,
+        )
+        keep = (slots >= 0) & (slots < length)
+        out[slots[keep]] = expanded[keep]
+        return out
+
+    out = [math.nan] * length
+    for start, duration, value in zip(starts, hours, values):
+        first = (start - axis_start) // HOUR
+        for slot in range(max(first, 0), min(first + duration, length)):
+            out[slot] = math.nan if value is None else value
+    return out
+
+
+def encode_column(values, encoding: str) -> list[float | None] | str:
+    """JSON list (NaN -> None) or base64 of little-endian float32."""
+    if encoding == "base64":
+        if np is not None:
+            return base64.b64encode(np.asarray(values, dtype="<f4").tobytes()).decode()
+        return base64.b64encode(struct.pack(f"<{len(values)}f", *values)).decode()
+    return [None if math.isnan(v) else round(float(v), 2) for v in values]
+
+
+def dictionary_encode(values: list[str | None]) -> dict[str, Any]:
+    """Encode repetitive strings as a category table plus integer codes."""
+    categories: dict[str | None, int] = {}
+    codes = [categories.setdefault(value, len(categories)) for value in values]
+    return {"categories": list(categories), "codes": codes}
+
+
+def _axis(start: int, length: int, encoding: str) -> dict[str, Any]:
+    return {
+        "start": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+        "step_seconds": HOUR,
+        "length": length,
+        "encoding": "base64-f32le" if encoding == "base64" else "json",
+    }
+
+
+def _wind_mph(speed: str | None) -> float | None:
+    """Top of an NWS wind speed string like "5 to 10 mph"."""
+    numbers = re.findall(r"\d+", speed or "")
+    return float(numbers[-1]) if numbers else None
+
+
+def _value(field: Any) -> Any:
+    return field.get("value") if isinstance(field, dict) else field
+
+
+def hourly_columns(periods: list[dict[str, Any]], hours: int, encoding: str) -> dict[str, Any]:
+    """Columnar form of /forecast/hourly periods."""
+    if not periods:
+        raise ValueError("No forecast periods available.")
+    starts = [parse_time(period["startTime"]) for period in periods]
+    axis_start = starts[0] - starts[0] % HOUR
+    length = min(hours, (starts[-1] - axis_start) // HOUR + 1)
+    runs = [1] * len(periods)
+
+    numeric = {
+        "temperature": [period.get("temperature") for period in periods],
+        "probabilityOfPrecipitation": [
+            _value(period.get("probabilityOfPrecipitation")) for period in periods
+        ],
+        "windSpeed": [_wind_mph(period.get("windSpeed")) for period in periods],
+    }
+    columns = {
+        name: encode_column(expand_runs(starts, runs, values, axis_start, length), encoding)
+        for name, values in numeric.items()
+    }
+
+    in_range = [(start - axis_start) // HOUR < length for start in starts]
+    for name in ("windDirection", "shortForecast"):
+        columns[name] = dictionary_encode(
+            [period.get(name) for period, keep in zip(periods, in_range) if keep]
+        )
+
+    unit = periods[0].get("temperatureUnit", "F")
+    return {
+        **_axis(axis_start, length, encoding),
+        "units": {
+            "temperature": unit,
+            "probabilityOfPrecipitation": "percent",
+            "windSpeed": "mph",
+        },
+        "columns": columns,
+    }
+
+
+def gridpoint_columns(
+    properties: dict[str, Any], variables: list[str], hours: int, encoding: str
+) -> dict[str, Any]:
+    """Columnar form of raw /gridpoints layers on a shared hourly axis."""
+    unknown = [name for name in variables if name not in GRID_LAYERS]
+    if unknown:
+        raise ValueError(f"Unknown variables {unknown}; choose from {list(GRID_LAYERS)}")
+
+    runs = {}
+    for name in variables:
+        layer = properties.get(name) or {}
+        parsed = [parse_valid_time(item["validTime"]) for item in layer.get("values", [])]
+        runs[name] = (
+            [start for start, _ in parsed],
+            [duration for _, duration in parsed],
+            [item.get("value") for item in layer.get("values", [])],
+            layer.get("uom", "").removeprefix("wmoUnit:"),
+        )
+
+    first_starts = [starts[0] for starts, *_ in runs.values() if starts]
+    if not first_starts:
+        raise ValueError("No gridpoint data available.")
+    axis_start = min(first_starts)
+    axis_start -= axis_start % HOUR
+
+    return {
+        **_axis(axis_start, hours, encoding),
+        "units": {name: run[3] for name, run in runs.items()},
+        "columns": {
+            name: encode_column(expand_runs(starts, durations, values, axis_start, hours), encoding)
+            for name, (starts, durations, values, _) in runs.items()
+        },
+    }
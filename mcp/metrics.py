@@ -0,0 +1,184 @@
+"""Prometheus metrics and optional OpenTelemetry tracing for the server.
+
+Tool calls are measured by a FastMCP middleware and upstream requests by
+`observe_upstream`. Counters kept elsewhere (cache, coalescing, alert
+snapshot, ...) are exported at scrape time through `StatsCollector`, so
+the hot paths keep incrementing plain integers.
+
+Set WEATHER_METRICS=0 to turn the instrumentation into no-ops.
+"""
+
+from contextlib import contextmanager
+import os
+import re
+import time
+from typing import Any, Callable, Iterable
+from urllib.parse import urlparse
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from prometheus_client import (
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+try:
+    from opentelemetry import trace
+
+    tracer = trace.get_tracer("weather-mcp")
+except ImportError:  # pragma: no cover - tracing is optional
+    tracer = None
+
+METRICS_ENABLED = os.getenv("WEATHER_METRICS", "1") == "1"
+
+registry = CollectorRegistry()
+
+TOOL_LATENCY = Histogram(
+    "weather_tool_duration_seconds",
+    "MCP tool call latency",
+    ["tool", "outcome"],
+    registry=registry,
+)
+TOOLS_IN_FLIGHT = Gauge(
+    "weather_tool_calls_in_flight", "MCP tool calls being handled", ["tool"], registry=registry
+)
+UPSTREAM_LATENCY = Histogram(
+    "weather_upstream_duration_seconds",
+    "NWS request latency per attempt",
+    ["endpoint", "status"],
+    registry=registry,
+)
+UPSTREAM_BYTES = Histogram(
+    "weather_upstream_response_bytes",
+    "NWS response body size",
+    ["endpoint"],
+    buckets=(1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 2e7),
+    registry=registry,
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "weather_upstream_requests_in_flight", "NWS requests in flight", registry=registry
+)
+UPSTREAM_QUEUE_WAIT = Histogram(
+    "weather_upstream_queue_wait_seconds",
+    "Time a NWS request waited for its turn and a rate-limit token",
+    ["lane"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=registry,
+)
+
+_ENDPOINTS = [
+    (re.compile(r"^/points/[^/]+$"), "/points/{point}"),
+    (re.compile(r"^/gridpoints/[^/]+/[^/]+/forecast/hourly$"), "/gridpoints/{grid}/forecast/hourly"),
+    (re.compile(r"^/gridpoints/[^/]+/[^/]+/forecast$"), "/gridpoints/{grid}/forecast"),
+    (re.compile(r"^/gridpoints/[^/]+/[^/]+$"), "/gridpoints/{grid}"),
+    (re.compile(r"^/alerts/active/area/[^/]+$"), "/alerts/active/area/{area}"),
+    (re.compile(r"^/alerts/active$"), "/alerts/active"),
+]
+
+
+def endpoint_label(url: str) -> str:
+    """Low-cardinality endpoint name for a NWS URL."""
+    path = urlparse(url).path
+    for pattern, label in _ENDPOINTS:
+        if pattern.match(path):
+            return label
+    return "other"
+
+
+class UpstreamObservation:
+    """Filled in by the caller of `observe_upstream` as the response arrives."""
+
+    __slots__ = ("status", "size")
+
+    def __init__(self):
+        self.status: int | str = "error"
+        self.size: int | None = None
+
+
+@contextmanager
+def observe_upstream(url: str):
+    """Time one upstream attempt; set `.status` and `.size` on the yielded object."""
+    observation = UpstreamObservation()
+    if not METRICS_ENABLED:
+        yield observation
+        return
+
+    endpoint = endpoint_label(url)
+    UPSTREAM_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        yield observation
+    finally:
+        UPSTREAM_IN_FLIGHT.dec()
+        UPSTREAM_LATENCY.labels(endpoint, str(observation.status)).observe(
+            time.perf_counter() - start
+        )
+        if observation.size is not None:
+            UPSTREAM_BYTES.labels(endpoint).observe(observation.size)
+
+
+def observe_queue_wait(lane: str, seconds: float) -> None:
+    if METRICS_ENABLED:
+        UPSTREAM_QUEUE_WAIT.labels(lane).observe(seconds)
+
+
+@contextmanager
+def trace_span(name: str, **attributes: Any):
+    """OpenTelemetry span when tracing is installed, otherwise nothing."""
+    if tracer is None or not METRICS_ENABLED:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Record latency, outcome and concurrency of every MCP tool call."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool = context.message.name
+        in_flight = TOOLS_IN_FLIGHT.labels(tool)
+        in_flight.inc()
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+            outcome = "ok"
+            return result
+        finally:
+            in_flight.dec()
+            TOOL_LATENCY.labels(tool, outcome).observe(time.perf_counter() - start)
+
+
+class StatsCollector:
+    """Export numeric values of stats dicts as metrics named weather_<source>_<key>.
+
+    Keys listed in `counters` only ever grow and are exported as counters
+    (with the `_total` suffix), so rate() and increase() work on them and
+    a restart reads as a reset; everything else is a gauge.
+    """
+
+    def __init__(
+        self,
+        sources: dict[str, Callable[[], dict[str, Any]]],
+        counters: dict[str, Iterable[str]] | None = None,
+    ):
+        self.sources = sources
+        self.counters = {source: frozenset(keys) for source, keys in (counters or {}).items()}
+
+    def collect(self):
+        for source, stats in self.sources.items():
+            counters = self.counters.get(source, frozenset())
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                family = CounterMetricFamily if key in counters else GaugeMetricFamily
+                yield family(
+                    f"weather_{source}_{key}", f"{source} {key.replace('_', ' ')}", value=value
+                )
+
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
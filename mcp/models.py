@@ -0,0 +1,108 @@
+"""Structured tool results.
+
+Field names follow the NWS API so records are a projection of the
+upstream payload rather than a re-mapping of it. Fields missing from
+the payload are left out of the record; fields NWS may send as null
+are typed as optional.
+"""
+
+from typing import Any
+
+from typing_extensions import TypedDict
+
+
+class Alert(TypedDict, total=False):
+    id: str
+    event: str
+    headline: str | None
+    areaDesc: str
+    severity: str
+    urgency: str
+    effective: str | None
+    expires: str | None
+    description: str | None
+    instruction: str | None
+
+
+class ForecastPeriod(TypedDict, total=False):
+    number: int
+    name: str
+    startTime: str
+    endTime: str
+    isDaytime: bool
+    temperature: int
+    temperatureUnit: str
+    probabilityOfPrecipitation: int | None
+    windSpeed: str
+    windDirection: str
+    shortForecast: str
+    detailedForecast: str
+
+
+class Place(TypedDict, total=False):
+    name: str
+    state: str
+    latitude: float
+    longitude: float
+    population: int
+    distance_km: float
+
+
+class AlertsResult(TypedDict):
+    state: str
+    alerts: list[Alert]
+
+
+class PointAlertsResult(TypedDict):
+    latitude: float
+    longitude: float
+    alerts: list[Alert]
+
+
+class ForecastResult(TypedDict):
+    latitude: float
+    longitude: float
+    total: int
+    offset: int
+    periods: list[ForecastPeriod]
+
+
+class GeocodeResult(TypedDict):
+    query: str
+    places: list[Place]
+
+
+class NearbyPlacesResult(TypedDict):
+    latitude: float
+    longitude: float
+    places: list[Place]
+
+
+ALERT_RECORD_FIELDS = tuple(Alert.__annotations__)
+PERIOD_RECORD_FIELDS = tuple(ForecastPeriod.__annotations__)
+
+
+def alert_record(
+    feature: dict[str, Any], fields: tuple[str, ...] = ALERT_RECORD_FIELDS
+) -> Alert:
+    props = feature.get("properties", {})
+    return {name: props[name] for name in fields if name in props}
+
+
+def period_record(
+    period: dict[str, Any], fields: tuple[str, ...] = PERIOD_RECORD_FIELDS
+) -> ForecastPeriod:
+    record = {name: period[name] for name in fields if name in period}
+    if isinstance(record.get("probabilityOfPrecipitation"), dict):
+        record["probabilityOfPrecipitation"] = record["probabilityOfPrecipitation"].get("value")
+    return record
+
+
+def select_fields(requested: list[str] | None, allowed: tuple[str, ...]) -> tuple[str, ...]:
+    """Validate a caller's field selection; None selects every field."""
+    if not requested:
+        return allowed
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(allowed)}")
+    return tuple(requested)
@@ -0,0 +1,222 @@
+"""Response cache for NWS API requests.
+
+Entries keep the parsed JSON together with the validators (ETag and
+Last-Modified) needed to revalidate them, and an expiry time derived from
+the upstream Cache-Control / Expires headers.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Protocol
+
+
+@dataclass
+class CacheEntry:
+    """A cached NWS response."""
+
+    data: dict[str, Any]
+    size: int
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> CacheEntry | None: ...
+
+    def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+def freshness_lifetime(headers, default: float) -> float | None:
+    """Seconds a response may be served from cache, or None if it must not be stored.
+
+    Honors Cache-Control (no-store, no-cache, s-maxage, max-age) and falls back
+    to Expires - Date, then to `default`.
+    """
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(float(directives[name]), 0.0)
+            except ValueError:
+                pass
+
+    expires = headers.get("expires")
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires).timestamp()
+            date = headers.get("date")
+            now = parsedate_to_datetime(date).timestamp() if date else time.time()
+            return max(expires_at - now, 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    return default
+
+
+class MemoryCache:
+    """In-memory LRU cache bounded by the total size of the cached bodies."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            self.delete(key)
+            return
+        self.delete(key)
+        self._entries[key] = entry
+        self.current_bytes += entry.size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.size
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def connect_shared(path: str) -> sqlite3.Connection:
+    """Open a SQLite database that several worker processes use at once.
+
+    WAL lets readers proceed while another process writes, and the busy
+    timeout makes concurrent writers wait instead of failing.
+    """
+    db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class DiskCache:
+    """SQLite-backed cache that survives restarts and is shared between workers."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = connect_shared(path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )"""
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, expires_at, etag, last_modified FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        body, expires_at, etag, last_modified = row
+        return CacheEntry(json.loads(body), len(body), expires_at, etag, last_modified)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        # Packed alert polygons (arrays) are stored as lists
+        body = json.dumps(entry.data, separators=(",", ":"), default=list).encode()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, body, entry.expires_at, entry.etag, entry.last_modified),
+            )
+            self._db.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class TieredCache:
+    """Memory LRU in front of a persistent backend.
+
+    An expired memory entry is checked against the backend before use, so a
+    response another worker process already refreshed is picked up instead
+    of being revalidated again.
+    """
+
+    def __init__(self, memory: MemoryCache, disk: DiskCache):
+        self.memory = memory
+        self.disk = disk
+
+    @property
+    def current_bytes(self) -> int:
+        return self.memory.current_bytes
+
+    def get(self, key: str) -> CacheEntry | None:
+        entry = self.memory.get(key)
+        if entry is None or not entry.is_fresh(time.time()):
+            stored = self.disk.get(key)
+            if stored is not None and (entry is None or stored.expires_at > entry.expires_at):
+                self.memory.set(key, stored)
+                entry = stored
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self.memory.set(key, entry)
+        self.disk.set(key, entry)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how requests were served."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    not_modified: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
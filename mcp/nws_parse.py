@@ -0,0 +1,179 @@
+"""Decoding of NWS GeoJSON responses, keeping only the fields we use.
+
+Alert feeds carry large polygon geometries and forecasts carry fields
+nothing here reads. For those endpoints the body is streamed through
+ijson's C backend, which builds only the `properties` objects and skips
+everything else without materializing it. Without that backend the body
+is decoded in one go (orjson when available) and projected afterwards.
+Raw gridpoint data is always decoded whole and reduced to the layers we
+serve.
+
+The nationwide /alerts/active feed behind the alert snapshot is the one
+alert response whose polygons are kept, for point lookups. It is streamed
+a feature at a time and each polygon is packed into flat coordinate
+arrays (see alert_geo.polygons) as soon as it is parsed.
+"""
+
+import json
+import re
+from typing import Any
+from urllib.parse import urlparse
+
+from alert_geo import polygons
+from gridseries import GRID_LAYERS
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    loads = json.loads
+
+try:
+    import ijson
+
+    # The pure-Python backend is slower than a plain decode, only stream with C
+    STREAMING = ijson.backend == "yajl2_c"
+except ImportError:  # pragma: no cover - ijson is an optional speedup
+    ijson = None
+    STREAMING = False
+
+ALERT_FIELDS = frozenset({
+    "id", "event", "headline", "areaDesc", "severity", "urgency", "certainty",
+    "status", "messageType", "sent", "effective", "onset", "expires", "ends",
+    "updated", "description", "instruction", "geocode", "affectedZones",
+})
+
+PERIOD_FIELDS = frozenset({
+    "number", "name", "startTime", "endTime", "isDaytime", "temperature",
+    "temperatureUnit", "probabilityOfPrecipitation", "windSpeed",
+    "windDirection", "shortForecast", "detailedForecast",
+})
+
+
+def _project(item: dict[str, Any], fields: frozenset[str]) -> dict[str, Any]:
+    return {key: value for key, value in item.items() if key in fields}
+
+
+def _alert_feature(props: dict[str, Any]) -> dict[str, Any]:
+    props = _project(props, ALERT_FIELDS)
+    geocode = props.get("geocode")
+    if geocode:
+        props["geocode"] = {"UGC": geocode.get("UGC", [])}
+    return {"id": props.get("id"), "properties": props}
+
+
+def _snapshot_feature(feature: dict[str, Any]) -> dict[str, Any]:
+    projected = _alert_feature(feature.get("properties", {}))
+    projected["geometry"] = polygons(feature.get("geometry")) or None
+    return projected
+
+
+def project_alerts(data: dict[str, Any]) -> dict[str, Any]:
+    """Reduce an alert FeatureCollection to the rendered alert properties."""
+    return {
+        "features": [
+            _alert_feature(feature.get("properties", {}))
+            for feature in data.get("features", [])
+        ]
+    }
+
+
+def project_alert_snapshot(data: dict[str, Any]) -> dict[str, Any]:
+    """Reduce the nationwide alert feed to rendered properties and packed polygons."""
+    return {"features": [_snapshot_feature(feature) for feature in data.get("features", [])]}
+
+
+def project_forecast(data: dict[str, Any]) -> dict[str, Any]:
+    """Reduce a forecast response to its periods."""
+    periods = data.get("properties", {}).get("periods", [])
+    return {"properties": {"periods": [_project(p, PERIOD_FIELDS) for p in periods]}}
+
+
+def project_gridpoint(data: dict[str, Any]) -> dict[str, Any]:
+    """Reduce raw gridpoint data to the time-series layers we serve."""
+    props = data.get("properties", {})
+    return {"properties": {name: props[name] for name in GRID_LAYERS if name in props}}
+
+
+_GRIDPOINT_PATH = re.compile(r"^/gridpoints/[^/]+/[^/]+$")
+
+
+def projection_for(url: str) -> str | None:
+    """Which projection applies to a URL.
+
+    One of "alert_snapshot", "alerts", "forecast", "gridpoint" or None.
+    """
+    path = urlparse(url).path
+    if path == "/alerts/active":
+        return "alert_snapshot"
+    if path.startswith("/alerts"):
+        return "alerts"
+    if path.endswith("/forecast") or path.endswith("/forecast/hourly"):
+        return "forecast"
+    if _GRIDPOINT_PATH.match(path):
+        return "gridpoint"
+    return None
+
+
+class _StreamReader:
+    """File-like adapter over an async byte iterator for ijson."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks.__aiter__()
+        self.bytes_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b""  # ijson probes with read(0) to detect bytes vs str
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def decode(url: str, body: bytes) -> dict[str, Any]:
+    """Decode a complete body and apply the projection for its URL."""
+    data = loads(body)
+    projection = projection_for(url)
+    if projection == "alert_snapshot":
+        return project_alert_snapshot(data)
+    if projection == "alerts":
+        return project_alerts(data)
+    if projection == "forecast":
+        return project_forecast(data)
+    if projection == "gridpoint":
+        return project_gridpoint(data)
+    return data
+
+
+async def decode_stream(url: str, chunks) -> tuple[dict[str, Any], int]:
+    """Incrementally decode an alert or forecast body from an async byte iterator.
+
+    Returns (data, body size in bytes). Requires the ijson C backend.
+    """
+    reader = _StreamReader(chunks)
+    projection = projection_for(url)
+    if projection == "alert_snapshot":
+        # Whole features, one at a time, so only one raw polygon is held at once
+        items = ijson.items_async(reader, "features.item", use_float=True)
+        features = [_snapshot_feature(feature) async for feature in items]
+        return {"features": features}, reader.bytes_read
+    if projection == "alerts":
+        items = ijson.items_async(reader, "features.item.properties", use_float=True)
+        features = [_alert_feature(props) async for props in items]
+        return {"features": features}, reader.bytes_read
+
+    items = ijson.items_async(reader, "properties.periods.item", use_float=True)
+    periods = [_project(period, PERIOD_FIELDS) async for period in items]
+    return {"properties": {"periods": periods}}, reader.bytes_read
+
+
+async def parse_response(url: str, response) -> tuple[dict[str, Any], int]:
+    """Decode an httpx streaming response; returns (data, body size in bytes)."""
+    if STREAMING and projection_for(url) in ("alert_snapshot", "alerts", "forecast"):
+        return await decode_stream(url, response.aiter_bytes())
+    body = await response.aread()
+    return decode(url, body), len(body)
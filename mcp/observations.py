@@ -0,0 +1,487 @@
+"""Local history of station observations.
+
+History questions ("how cold did it get last night?", "hourly highs this
+week") keep asking /stations/{id}/observations for overlapping windows.
+Every window fetched from NWS is kept in an append-only columnar store, so
+only the parts of a requested range that were never downloaded go upstream
+and ranges and aggregates are answered from local data.
+
+A segment holds the rows of one fetched window as arrays: sorted int64
+epoch seconds and one float32 array per variable, NaN where a value is
+missing. Segments are never modified and their windows never overlap, so
+together they also record which time ranges are known, including ranges
+without any observations. Only the part of a window older than
+SETTLE_SECONDS is stored: stations report late and NWS revises recent
+rows, so newer observations are fetched every time and not kept.
+
+Segments live in SQLite, shared between workers, and are mirrored in
+memory per station once used. When a station has more than MAX_SEGMENTS,
+adjacent segments are merged, so a station queried every few minutes does
+not accumulate thousands of tiny segments.
+"""
+
+from array import array
+import bisect
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import math
+import sys
+import threading
+from typing import Any, Iterable
+
+from gridseries import encode_column, parse_time
+from nws_cache import connect_shared
+
+HOUR = 3600
+DAY = 86400
+
+# Numeric observation properties kept, with the unit NWS reports each in
+OBSERVATION_FIELDS = {
+    "temperature": "degC",
+    "dewpoint": "degC",
+    "relativeHumidity": "percent",
+    "windDirection": "degree_(angle)",
+    "windSpeed": "km_h-1",
+    "windGust": "km_h-1",
+    "barometricPressure": "Pa",
+    "visibility": "m",
+    "precipitationLastHour": "mm",
+}
+FIELDS = tuple(OBSERVATION_FIELDS)
+
+# Observations newer than this are re-fetched on every query instead of stored
+SETTLE_SECONDS = 2 * HOUR
+
+# Segments per station before adjacent ones are merged
+MAX_SEGMENTS = 32
+
+# Longest range one query may cover
+MAX_RANGE = 31 * DAY
+
+BUCKETS = {"hour": HOUR, "day": DAY}
+
+
+def format_time(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def parse_instant(timestamp: str) -> int:
+    """Epoch seconds for an ISO-8601 timestamp; UTC when it has no offset."""
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _to_le(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+@dataclass(slots=True)
+class Station:
+    """An observation station, the nearest one to some gridpoint."""
+
+    identifier: str
+    name: str
+    latitude: float
+    longitude: float
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.identifier,
+            "name": self.name,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+        }
+
+
+def nearest_station(
+    features: list[dict[str, Any]], latitude: float, longitude: float
+) -> Station | None:
+    """The station of a /stations FeatureCollection closest to the coordinate."""
+    best, best_distance = None, math.inf
+    for feature in features:
+        props = feature.get("properties") or {}
+        coordinates = (feature.get("geometry") or {}).get("coordinates")
+        if not props.get("stationIdentifier") or not coordinates:
+            continue
+        lon, lat = coordinates[:2]
+        # Equirectangular distance is plenty to rank stations a few km apart
+        dx = (lon - longitude) * math.cos(math.radians(latitude))
+        distance = dx * dx + (lat - latitude) ** 2
+        if distance < best_distance:
+            best_distance = distance
+            best = Station(props["stationIdentifier"], props.get("name") or "", lat, lon)
+    return best
+
+
+@dataclass(slots=True)
+class Segment:
+    """Observations of the window [start, end) as parallel arrays."""
+
+    start: int
+    end: int
+    times: array  # "q", sorted
+    columns: dict[str, array]  # "f" per field, NaN where missing
+
+    @classmethod
+    def empty(cls, start: int, end: int) -> "Segment":
+        return cls(start, end, array("q"), {name: array("f") for name in FIELDS})
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def window(self, start: int, end: int) -> "Segment":
+        """The rows in [start, end), sharing nothing with this segment."""
+        start, end = max(start, self.start), min(end, self.end)
+        lo, hi = bisect.bisect_left(self.times, start), bisect.bisect_left(self.times, end)
+        return Segment(
+            start,
+            max(end, start),
+            self.times[lo:hi],
+            {name: values[lo:hi] for name, values in self.columns.items()},
+        )
+
+    def pack(self) -> tuple[bytes, bytes]:
+        """Little-endian times and the columns in FIELDS order, concatenated."""
+        return _to_le(self.times), b"".join(_to_le(self.columns[name]) for name in FIELDS)
+
+    @classmethod
+    def unpack(cls, start: int, end: int, fields: str, times: bytes, data: bytes) -> "Segment":
+        stamps = _from_le("q", times)
+        width = len(stamps) * 4
+        columns = {
+            name: _from_le("f", data[i * width:(i + 1) * width])
+            for i, name in enumerate(fields.split(","))
+        }
+        for name in FIELDS:
+            columns.setdefault(name, array("f", [math.nan]) * len(stamps))
+        return cls(start, end, stamps, columns)
+
+
+def join(segments: list[Segment], start: int, end: int) -> Segment:
+    """Consecutive, non-overlapping segments as one segment over [start, end)."""
+    joined = Segment.empty(start, end)
+    for segment in sorted(segments, key=lambda s: s.start):
+        joined.times.extend(segment.times)
+        for name in FIELDS:
+            joined.columns[name].extend(segment.columns[name])
+    return joined
+
+
+def parse_observations(features: list[dict[str, Any]], start: int, end: int) -> Segment:
+    """Segment of /stations/{id}/observations features timestamped in [start, end).
+
+    NWS lists newest first and occasionally repeats a timestamp; rows are
+    sorted and the last one listed for a timestamp is kept.
+    """
+    rows: dict[int, list[float]] = {}
+    for feature in features:
+        props = feature.get("properties") or {}
+        if not props.get("timestamp"):
+            continue
+        stamp = parse_time(props["timestamp"])
+        if start <= stamp < end:
+            values = []
+            for name in FIELDS:
+                field = props.get(name)
+                value = field.get("value") if isinstance(field, dict) else field
+                values.append(math.nan if value is None else float(value))
+            rows[stamp] = values
+    segment = Segment.empty(start, end)
+    for stamp in sorted(rows):
+        segment.times.append(stamp)
+        for name, value in zip(FIELDS, rows[stamp]):
+            segment.columns[name].append(value)
+    return segment
+
+
+def gaps(windows: Iterable[tuple[int, int]], start: int, end: int) -> list[tuple[int, int]]:
+    """Parts of [start, end) not covered by the sorted, disjoint `windows`."""
+    missing = []
+    cursor = start
+    for window_start, window_end in windows:
+        if window_end <= cursor:
+            continue
+        if window_start >= end:
+            break
+        if window_start > cursor:
+            missing.append((cursor, window_start))
+        cursor = max(cursor, window_end)
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+class ObservationStore:
+    """SQLite-backed observation segments and nearest stations, mirrored in memory."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._stations: dict[tuple[str, int, int], Station] = {}
+        # Station -> (start, end) -> segment, loaded on first use
+        self._segments: dict[str, dict[tuple[int, int], Segment]] = {}
+        self.rows_stored = 0
+        self.windows_stored = 0
+        self.compactions = 0
+        self._db = connect_shared(path)
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS stations (
+                office TEXT NOT NULL,
+                grid_x INTEGER NOT NULL,
+                grid_y INTEGER NOT NULL,
+                station TEXT NOT NULL,
+                name TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                PRIMARY KEY (office, grid_x, grid_y)
+            );
+            CREATE TABLE IF NOT EXISTS segments (
+                station TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                end INTEGER NOT NULL,
+                rows INTEGER NOT NULL,
+                fields TEXT NOT NULL,
+                times BLOB NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (station, start)
+            );"""
+        )
+        self._db.commit()
+
+    def warm(self) -> int:
+        """Load every stored station into memory; returns the count."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM stations").fetchall()
+        self._stations = {(row[0], row[1], row[2]): Station(*row[3:]) for row in rows}
+        return len(self._stations)
+
+    def station(self, office: str, grid_x: int, grid_y: int) -> Station | None:
+        key = (office, grid_x, grid_y)
+        station = self._stations.get(key)
+        if station is None:
+            # Another worker may have resolved it since warm()
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT * FROM stations WHERE office = ? AND grid_x = ? AND grid_y = ?", key
+                ).fetchone()
+            if row is not None:
+                station = self._stations[key] = Station(*row[3:])
+        return station
+
+    def put_station(self, office: str, grid_x: int, grid_y: int, station: Station) -> None:
+        key = (office, grid_x, grid_y)
+        self._stations[key] = station
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO stations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, station.identifier, station.name, station.latitude, station.longitude),
+            )
+            self._db.commit()
+
+    def _windows(self, station: str) -> list[tuple[int, int]]:
+        return self._db.execute(
+            "SELECT start, end FROM segments WHERE station = ? ORDER BY start", (station,)
+        ).fetchall()
+
+    def _sync(self, station: str) -> dict[tuple[int, int], Segment]:
+        """The station's segments, reading those other workers added or merged."""
+        with self._lock:
+            windows = self._windows(station)
+            known = self._segments.get(station, {})
+            new = [window for window in windows if window not in known]
+            if new or len(known) != len(windows):
+                rows = self._db.execute(
+                    f"SELECT start, end, fields, times, data FROM segments "
+                    f"WHERE station = ? AND start IN ({','.join('?' * len(new))})",
+                    (station, *(start for start, _ in new)),
+                ).fetchall() if new else []
+                loaded = {(row[0], row[1]): Segment.unpack(*row) for row in rows}
+                known = self._segments[station] = {
+                    window: known[window] if window in known else loaded[window]
+                    for window in windows
+                    if window in known or window in loaded
+                }
+            return known
+
+    def missing(self, station: str, start: int, end: int) -> list[tuple[int, int]]:
+        """Parts of [start, end) never fetched for the station."""
+        if start >= end:
+            return []
+        with self._lock:
+            windows = self._windows(station)
+        return gaps(windows, start, end)
+
+    def append(self, station: str, segment: Segment) -> int:
+        """Store the rows of a fetched window; returns the number of rows kept.
+
+        Parts of the window another request stored meanwhile are skipped, so
+        windows stay disjoint without any coordination between workers.
+        """
+        kept = 0
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for start, end in gaps(self._windows(station), segment.start, segment.end):
+                    part = segment.window(start, end)
+                    self._db.execute(
+                        "INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (station, start, end, len(part), ",".join(FIELDS), *part.pack()),
+                    )
+                    self._segments.setdefault(station, {})[(start, end)] = part
+                    self.windows_stored += 1
+                    kept += len(part)
+                if len(self._windows(station)) > MAX_SEGMENTS:
+                    self._compact(station)
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        self.rows_stored += kept
+        return kept
+
+    def _compact(self, station: str) -> None:
+        """Merge runs of adjacent segments into one each (inside a transaction)."""
+        rows = self._db.execute(
+            "SELECT start, end, fields, times, data FROM segments WHERE station = ? ORDER BY start",
+            (station,),
+        ).fetchall()
+        runs: list[list[Segment]] = []
+        for row in rows:
+            segment = Segment.unpack(*row)
+            if runs and runs[-1][-1].end == segment.start:
+                runs[-1].append(segment)
+            else:
+                runs.append([segment])
+        self._db.execute("DELETE FROM segments WHERE station = ?", (station,))
+        merged = {}
+        for run in runs:
+            segment = join(run, run[0].start, run[-1].end)
+            self._db.execute(
+                "INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    station, segment.start, segment.end, len(segment), ",".join(FIELDS),
+                    *segment.pack(),
+                ),
+            )
+            merged[(segment.start, segment.end)] = segment
+        self._segments[station] = merged
+        self.compactions += 1
+
+    def query(self, station: str, start: int, end: int) -> Segment:
+        """Stored observations timestamped in [start, end)."""
+        parts = [
+            segment.window(start, end)
+            for (window_start, window_end), segment in self._sync(station).items()
+            if window_start < end and window_end > start
+        ]
+        return join(parts, start, end)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stations": len(self._stations),
+            "segments_loaded": sum(map(len, self._segments.values())),
+            "rows_stored": self.rows_stored,
+            "windows_stored": self.windows_stored,
+            "compactions": self.compactions,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def bucket_stats(
+    segment: Segment, name: str, axis_start: int, step: int, length: int
+) -> dict[str, list[float]]:
+    """Per-bucket min, max and mean of a column; wind direction is averaged as a vector."""
+    low = [math.nan] * length
+    high = [math.nan] * length
+    total = [0.0] * length
+    north = [0.0] * length
+    count = [0] * length
+    circular = name == "windDirection"
+    for stamp, value in zip(segment.times, segment.columns[name]):
+        if math.isnan(value):
+            continue
+        slot = (stamp - axis_start) // step
+        if not 0 <= slot < length:
+            continue
+        if count[slot]:
+            low[slot] = min(low[slot], value)
+            high[slot] = max(high[slot], value)
+        else:
+            low[slot] = high[slot] = value
+        if circular:
+            total[slot] += math.sin(math.radians(value))
+            north[slot] += math.cos(math.radians(value))
+        else:
+            total[slot] += value
+        count[slot] += 1
+    if circular:
+        mean = [
+            math.degrees(math.atan2(east, up)) % 360 if n else math.nan
+            for east, up, n in zip(total, north, count)
+        ]
+    else:
+        mean = [t / n if n else math.nan for t, n in zip(total, count)]
+    return {"min": low, "max": high, "mean": mean}
+
+
+def observation_columns(
+    station: Station,
+    segment: Segment,
+    variables: list[str],
+    interval: str,
+    encoding: str,
+) -> dict[str, Any]:
+    """Columnar form of observations: raw rows, or min/max/mean per hour or day (UTC)."""
+    unknown = [name for name in variables if name not in OBSERVATION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown variables {unknown}; choose from {list(FIELDS)}")
+    result: dict[str, Any] = {
+        "station": station.as_dict(),
+        "start": format_time(segment.start),
+        "end": format_time(segment.end),
+        "interval": interval,
+        "encoding": "base64-f32le" if encoding == "base64" else "json",
+        "units": {name: OBSERVATION_FIELDS[name] for name in variables},
+    }
+    if interval == "raw":
+        return {
+            **result,
+            "length": len(segment),
+            "times": [format_time(stamp) for stamp in segment.times],
+            "columns": {name: encode_column(segment.columns[name], encoding) for name in variables},
+        }
+
+    step = BUCKETS[interval]
+    axis_start = segment.start - segment.start % step
+    length = max(-(-(segment.end - axis_start) // step), 0)
+    counts = [0] * length
+    for stamp in segment.times:
+        counts[(stamp - axis_start) // step] += 1
+    return {
+        **result,
+        "axis_start": format_time(axis_start),
+        "step_seconds": step,
+        "length": length,
+        "count": counts,
+        "columns": {
+            name: {
+                stat: encode_column(values, encoding)
+                for stat, values in bucket_stats(segment, name, axis_start, step, length).items()
+            }
+            for name in variables
+        },
+    }
@@ -0,0 +1,259 @@
+"""Offline geocoding and nearest-place search over bundled US places.
+
+The places come from the client's packed gazetteer
+(client/data/places.tsv.gz, GeoNames, CC BY 4.0) and are compiled into
+one binary index file that is memory-mapped, so startup costs a single
+mmap call and workers share the pages:
+
+- places are stored as unit vectors on the sphere in implicit KD-tree
+  order (the median of each range is the node, its halves the
+  children), so k-nearest queries need no pointers and chord distance
+  orders places like great-circle distance;
+- lowercase names (and aliases such as "NYC") are stored sorted, so
+  geocoding is a binary search.
+
+    python mcp/places.py   # build the index from the packed gazetteer
+"""
+
+import bisect
+import gzip
+import heapq
+import math
+import mmap
+import os
+import struct
+from typing import Any
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(HERE, "..", "client", "data", "places.tsv.gz")
+DEFAULT_INDEX = os.path.join(HERE, "data", "places.idx")
+
+EARTH_RADIUS_KM = 6371.0088
+MAGIC = b"WXP1"
+# magic, places, keys, names bytes, keys bytes, states bytes
+HEADER = struct.Struct("<4sIIIII")
+
+
+def _unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+
+def _chord_to_km(chord_squared: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(chord_squared) / 2, 1.0))
+
+
+def _read_source(path: str):
+    """States and places (name, state, lat, lon, population) from the packed gazetteer."""
+    states, places = {}, []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            kind, *fields = line.rstrip("\n").split("\t")
+            if kind == "S":
+                states[fields[0]] = fields[1]
+            else:
+                name, state, lat, lon, population = fields
+                places.append((name, state, float(lat), float(lon), int(population)))
+    return states, places
+
+
+def _kd_order(points: list[tuple], lo: int, hi: int, depth: int) -> None:
+    """Reorder points[lo:hi] in place into implicit KD-tree order."""
+    if hi - lo <= 1:
+        return
+    axis = depth % 3
+    points[lo:hi] = sorted(points[lo:hi], key=lambda point: point[0][axis])
+    mid = (lo + hi) // 2
+    _kd_order(points, lo, mid, depth + 1)
+    _kd_order(points, mid + 1, hi, depth + 1)
+
+
+def build_index(source: str = DEFAULT_SOURCE, out: str = DEFAULT_INDEX) -> int:
+    """Compile the packed gazetteer into the binary index; returns the place count."""
+    states, rows = _read_source(source)
+
+    # Aliases share coordinates with their place; keep the longest name
+    canonical: dict[tuple, tuple] = {}
+    for row in rows:
+        key = (row[1], row[2], row[3])
+        if key not in canonical or len(row[0]) > len(canonical[key][0]):
+            canonical[key] = row
+    points = [(_unit_vector(row[2], row[3]), row) for row in canonical.values()]
+    _kd_order(points, 0, len(points), 0)
+    position = {(row[1], row[2], row[3]): i for i, (_, row) in enumerate(points)}
+
+    # Every name (place names, aliases, "name, ST") points at a place
+    keys = sorted({
+        (name.lower(), position[(state, lat, lon)])
+        for name, state, lat, lon, _ in rows
+    })
+
+    names = [row[0].encode() for _, row in points]
+    key_bytes = [key.encode() for key, _ in keys]
+    names_blob, keys_blob = b"".join(names), b"".join(key_bytes)
+    states_blob = "".join(f"{code}\t{name}\n" for code, name in states.items()).encode()
+
+    def offsets(parts: list[bytes]) -> list[int]:
+        result = [0]
+        for part in parts:
+            result.append(result[-1] + len(part))
+        return result
+
+    count = len(points)
+    sections = [
+        struct.pack(f"<{3 * count}f", *(c for vector, _ in points for c in vector)),
+        struct.pack(f"<{count}I", *(row[4] for _, row in points)),
+        struct.pack(f"<{count + 1}I", *offsets(names)),
+        struct.pack(f"<{len(keys) + 1}I", *offsets(key_bytes)),
+        struct.pack(f"<{len(keys)}I", *(place for _, place in keys)),
+        "".join(row[1] for _, row in points).encode(),
+        names_blob,
+        keys_blob,
+        states_blob,
+    ]
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    temporary = f"{out}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, count, len(keys), len(names_blob), len(keys_blob), len(states_blob)
+        ))
+        for section in sections:
+            f.write(section)
+    os.replace(temporary, out)  # atomic, so concurrent workers never map a partial file
+    return count
+
+
+class PlaceIndex:
+    """Read-only, memory-mapped view of a compiled places index."""
+
+    def __init__(self, path: str = DEFAULT_INDEX):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, count, key_count, names_size, keys_size, states_size = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a places index")
+        self.count = count
+        self._key_count = key_count
+
+        offset = HEADER.size
+
+        def take(size: int, fmt: str | None = None):
+            nonlocal offset
+            part = view[offset:offset + size]
+            offset += size
+            return part.cast(fmt) if fmt else part
+
+        self._xyz = take(12 * count, "f")
+        self._population = take(4 * count, "I")
+        self._name_offsets = take(4 * (count + 1), "I")
+        self._key_offsets = take(4 * (key_count + 1), "I")
+        self._key_places = take(4 * key_count, "I")
+        self._states = take(2 * count)
+        self._names = take(names_size)
+        self._keys = take(keys_size)
+        # Lowercase state name -> code, for "Name, State" queries
+        self.states = {
+            name.lower(): code
+            for code, name in (
+                line.split("\t") for line in bytes(take(states_size)).decode().splitlines()
+            )
+        }
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key(self, i: int) -> str:
+        return bytes(self._keys[self._key_offsets[i]:self._key_offsets[i + 1]]).decode()
+
+    def place(self, i: int, distance_km: float | None = None) -> dict[str, Any]:
+        x, y, z = self._xyz[3 * i:3 * i + 3]
+        record = {
+            "name": bytes(self._names[self._name_offsets[i]:self._name_offsets[i + 1]]).decode(),
+            "state": bytes(self._states[2 * i:2 * i + 2]).decode(),
+            "latitude": round(math.degrees(math.asin(max(-1.0, min(1.0, z)))), 4),
+            "longitude": round(math.degrees(math.atan2(y, x)), 4),
+            "population": self._population[i],
+        }
+        if distance_km is not None:
+            record["distance_km"] = round(distance_km, 2)
+        return record
+
+    def lookup(self, name: str) -> list[int]:
+        """Places named exactly `name` (case-insensitive), most populous first."""
+        key = name.strip().lower()
+        keys = _KeyView(self)
+        lo = bisect.bisect_left(keys, key)
+        found = []
+        while lo < self._key_count and self._key(lo) == key:
+            found.append(self._key_places[lo])
+            lo += 1
+        return sorted(found, key=lambda i: -self._population[i])
+
+    def geocode(self, query: str, limit: int = 5) -> list[dict[str, Any]]:
+        """Resolve "Name", "Name, ST" or "Name, State" to matching places."""
+        name, _, qualifier = query.partition(",")
+        found = self.lookup(name)
+        qualifier = qualifier.strip()
+        if qualifier:
+            code = self.states.get(qualifier.lower(), qualifier.upper()).encode()
+            found = [i for i in found if self._states[2 * i:2 * i + 2] == code]
+        return [self.place(i) for i in found[:limit]]
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5) -> list[dict[str, Any]]:
+        """The k places closest to a coordinate, nearest first."""
+        target = _unit_vector(latitude, longitude)
+        xyz = self._xyz
+        best: list[tuple[float, int]] = []  # max-heap of (-distance², index)
+        # (lo, hi, depth, squared distance to the splitting plane that led here)
+        stack = [(0, self.count, 0, 0.0)]
+        while stack:
+            lo, hi, depth, bound = stack.pop()
+            # Skip subtrees that cannot hold anything closer than the current k-th
+            if lo >= hi or (len(best) == k and bound >= -best[0][0]):
+                continue
+            mid = (lo + hi) // 2
+            base = 3 * mid
+            dx = xyz[base] - target[0]
+            dy = xyz[base + 1] - target[1]
+            dz = xyz[base + 2] - target[2]
+            distance = dx * dx + dy * dy + dz * dz
+            if len(best) < k:
+                heapq.heappush(best, (-distance, mid))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, mid))
+
+            axis = depth % 3
+            delta = target[axis] - xyz[base + axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if delta < 0 else ((mid + 1, hi), (lo, mid))
+            stack.append((*far, depth + 1, delta * delta))
+            stack.append((*near, depth + 1, bound))
+
+        return [
+            self.place(i, _chord_to_km(-negative))
+            for negative, i in sorted(best, key=lambda item: -item[0])
+        ]
+
+
+class _KeyView:
+    """Sequence over the sorted keys, for bisect."""
+
+    def __init__(self, index: PlaceIndex):
+        self._index = index
+
+    def __len__(self) -> int:
+        return self._index._key_count
+
+    def __getitem__(self, i: int) -> str:
+        return self._index._key(i)
+
+
+def open_index(path: str = DEFAULT_INDEX, source: str = DEFAULT_SOURCE) -> PlaceIndex:
+    """Map the index, compiling it from the packed gazetteer first if it is missing."""
+    if not os.path.exists(path):
+        build_index(source, path)
+    return PlaceIndex(path)
+
+
+if __name__ == "__main__":
+    print(f"{build_index()} places written to {DEFAULT_INDEX}")
@@ -0,0 +1,184 @@
+"""Keep the most requested upstream responses fresh before anyone asks.
+
+Every cached request is counted in a `DecayingCounter`, whose scores
+halve every `half_life` seconds, so the ranking follows what is popular
+now rather than what was popular once. A background `PrefetchScheduler`
+periodically takes the top entries and refreshes those that expire
+within `lead` seconds, soonest first, spaced `1 / rate` seconds apart so
+prefetching never bursts against the NWS rate limit.
+
+A prefetch "hits" when a request is served from the entry it refreshed
+at a time the previous entry would already have expired, i.e. when it
+saved a caller an upstream round trip.
+"""
+
+import asyncio
+import heapq
+import math
+import time
+from typing import Any, Awaitable, Callable
+
+from nws_cache import CacheEntry
+
+# Rebase decayed weights before 2 ** exponent gets near float overflow
+_MAX_EXPONENT = 512
+
+
+class DecayingCounter:
+    """Per-key request counts with exponential time decay.
+
+    A hit adds 2 ** (age / half_life) relative to a reference time, which
+    ranks keys exactly like decaying every score and costs O(1) per hit.
+    """
+
+    def __init__(self, half_life: float, max_keys: int = 10000):
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self._origin = time.monotonic()
+        self._weights: dict[str, float] = {}
+
+    def _exponent(self, now: float) -> float:
+        return (now - self._origin) / self.half_life
+
+    def hit(self, key: str, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        exponent = self._exponent(now)
+        if exponent > _MAX_EXPONENT:
+            scale = 2.0 ** -exponent
+            self._weights = {k: w * scale for k, w in self._weights.items() if w * scale > 1e-9}
+            self._origin = now
+            exponent = 0.0
+        self._weights[key] = self._weights.get(key, 0.0) + 2.0 ** exponent
+        if len(self._weights) > self.max_keys:
+            # Forget the coldest half rather than pruning on every hit
+            keep = heapq.nlargest(self.max_keys // 2, self._weights.items(), key=lambda kv: kv[1])
+            self._weights = dict(keep)
+
+    def score(self, key: str, now: float | None = None) -> float:
+        """Decayed hit count of `key` as of `now`."""
+        now = time.monotonic() if now is None else now
+        return self._weights.get(key, 0.0) / 2.0 ** self._exponent(now)
+
+    def top(self, n: int, now: float | None = None) -> list[tuple[str, float]]:
+        """The `n` highest-scoring keys with their decayed scores."""
+        now = time.monotonic() if now is None else now
+        scale = 2.0 ** -self._exponent(now)
+        best = heapq.nlargest(n, self._weights.items(), key=lambda kv: kv[1])
+        return [(key, weight * scale) for key, weight in best]
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+
+class PrefetchScheduler:
+    """Refresh the hottest cached responses shortly before they expire.
+
+    `refresh` must raise or return None when the upstream fails, never the
+    stale entry it was given: whatever it returns counts as a prefetch.
+    """
+
+    def __init__(
+        self,
+        cache_get: Callable[[str], CacheEntry | None],
+        refresh: Callable[[str, CacheEntry | None], Awaitable[Any]],
+        hot_set: int,
+        lead: float,
+        rate: float,
+        interval: float = 5.0,
+        half_life: float = 600.0,
+        min_score: float = 2.0,
+        trackable: Callable[[str], bool] = lambda url: True,
+    ):
+        self.cache_get = cache_get
+        self.refresh = refresh
+        self.hot_set = hot_set
+        self.lead = lead
+        self.rate = rate
+        self.interval = interval
+        self.min_score = min_score
+        self.trackable = trackable
+        self.counter = DecayingCounter(half_life)
+        self.prefetches = 0
+        self.hits = 0
+        self.failures = 0
+        # URL -> expiry of the entry a prefetch replaced, until a request benefits
+        self._pending: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+
+    def record(self, url: str) -> None:
+        """Count a request for `url`."""
+        if self.trackable(url):
+            self.counter.hit(url)
+
+    def served_fresh(self, url: str, now: float) -> None:
+        """Note a fresh cache hit, crediting the prefetch that made it one."""
+        replaced = self._pending.get(url)
+        if replaced is not None and now >= replaced:
+            self.hits += 1
+            del self._pending[url]
+
+    def due(self, now: float) -> list[tuple[str, CacheEntry | None]]:
+        """Hot entries that are missing or expire within `lead`, soonest first."""
+        due = []
+        for url, score in self.counter.top(self.hot_set):
+            if score < self.min_score:
+                break
+            entry = self.cache_get(url)
+            if entry is None or entry.expires_at - now <= self.lead:
+                due.append((url, entry))
+        due.sort(key=lambda item: item[1].expires_at if item[1] else -math.inf)
+        return due
+
+    async def run_once(self) -> int:
+        """Refresh what is due, at most `rate` per second; returns the count."""
+        budget = max(int(self.rate * self.interval), 1)
+        refreshed = 0
+        for url, entry in self.due(time.time())[:budget]:
+            try:
+                data = await self.refresh(url, entry)
+            except Exception as e:
+                data = None
+                print(f"Prefetch of {url} failed: {e!r}")
+            if data is None:
+                self.failures += 1
+            else:
+                self.prefetches += 1
+                refreshed += 1
+                # Keep the oldest expiry: without any of the prefetches since
+                # then, a request now would have had to go upstream
+                self._pending.setdefault(url, entry.expires_at if entry else 0.0)
+            await asyncio.sleep(1 / self.rate)
+        return refreshed
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Prefetch cycle failed: {e!r}")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def hot(self, n: int = 10) -> list[dict[str, Any]]:
+        return [{"url": url, "score": round(score, 2)} for url, score in self.counter.top(n)]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "tracked": len(self.counter),
+            "prefetches": self.prefetches,
+            "prefetch_hits": self.hits,
+            "failures": self.failures,
+            "hit_rate": self.hits / self.prefetches if self.prefetches else 0.0,
+        }
@@ -0,0 +1,176 @@
+"""Protection for upstream calls: rate limiting, retries and circuit breaking.
+
+Each upstream host gets a token bucket that slows down when the host
+answers 429 or sends Retry-After, and a circuit breaker that fails fast
+while the host keeps erroring. Retries use full-jitter exponential
+backoff so synchronized clients do not retry in lockstep.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import random
+import time
+from typing import Any
+
+import httpx
+
+# Statuses worth retrying for an idempotent GET
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """The upstream host is considered unhealthy; the request was not sent."""
+
+
+class TokenBucket:
+    """Token bucket whose rate halves on throttling and recovers on success."""
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.min_rate = rate / 10
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the seconds spent waiting."""
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return now - started
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self, retry_after: float | None) -> None:
+        """The host pushed back: slow down, and pause for `retry_after` if given."""
+        self.rate = max(self.rate / 2, self.min_rate)
+        self.tokens = 0.0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def refund(self) -> None:
+        """Give back a token that was acquired but not used."""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def on_success(self) -> None:
+        self.rate = min(self.rate + self.max_rate / 20, self.max_rate)
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open probe."""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            # Let a single probe through until it succeeds or fails
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """The probe ended without an outcome (e.g. cancelled): let the next one through."""
+        if self.state == "half_open":
+            self._probing = False
+
+
+def retry_after_seconds(response: httpx.Response) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given (0-based) retry attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Whether an error says the host is unhealthy (as opposed to a bad request)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUSES
+    return isinstance(error, httpx.TransportError)
+
+
+@dataclass
+class UpstreamStats:
+    """Counters describing how the resilience layer treated requests."""
+
+    attempts: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failures: int = 0
+    short_circuited: int = 0
+    limiter_wait_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "limiter_wait_seconds": round(self.limiter_wait_seconds, 3),
+        }
+
+
+class UpstreamGuard:
+    """Rate limiter and circuit breaker for one upstream host."""
+
+    def __init__(self, rate: float, burst: int, breaker_threshold: int, breaker_reset: float):
+        self.limiter = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "rate": round(self.limiter.rate, 2),
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
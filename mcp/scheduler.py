@@ -0,0 +1,344 @@
+"""Fair scheduling of upstream NWS requests between sessions, tools and lanes.
+
+All sessions share one upstream. Without scheduling, a client looping
+over hundreds of coordinates fills the rate limiter and the connection
+pool, and an interactive question waits behind all of it. Instead every
+upstream attempt waits in the `UpstreamScheduler` of its host, which
+hands out that host's rate-limit tokens and concurrency:
+
+- by lane, in strict priority: interactive tool calls first, then batch
+  tools (get_*_many), then background work (prefetching, revalidation,
+  alert snapshots). Batch and background lanes have their own
+  concurrency caps, so capacity is always left for interactive calls;
+- within a lane, round-robin over flows, one per (session, tool), so a
+  session with hundreds of queued requests gets the same share as a
+  session with one (deficit round-robin where every request costs the
+  same). A session is also capped in how many requests it has in flight.
+
+The tool call a request is made for is carried in a context variable set
+by `SchedulingMiddleware`; requests made outside tool calls count as
+background work. `SessionQuota` limits upstream requests per session and
+minute. The time each request spent queued, including the wait for its
+rate-limit token, is recorded per lane.
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import Context, ContextVar, copy_context
+from dataclasses import dataclass
+import time
+from typing import Any
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from metrics import observe_queue_wait
+from resilience import TokenBucket
+
+# Lanes in priority order
+LANES = ("interactive", "batch", "background")
+
+# Recent queue waits kept per lane for the percentiles in /stats
+WAIT_SAMPLES = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class Origin:
+    """Who an upstream request is made for."""
+
+    session: str
+    tool: str
+    lane: str
+
+
+BACKGROUND = Origin("server", "", "background")
+
+current_origin: ContextVar[Origin] = ContextVar("current_origin", default=BACKGROUND)
+
+
+def background_context() -> Context:
+    """A copy of the current context in which upstream requests are background work."""
+    context = copy_context()
+    context.run(current_origin.set, BACKGROUND)
+    return context
+
+
+class QuotaExceededError(Exception):
+    """The session used up its upstream request quota; the request was not sent."""
+
+
+class SessionQuota:
+    """Upstream requests per session and minute, as a token bucket per session."""
+
+    def __init__(self, per_minute: int, max_sessions: int = 10000):
+        self.per_minute = per_minute
+        self.max_sessions = max_sessions
+        # Session -> (tokens, monotonic time of the last update)
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self.rejected = 0
+
+    def charge(self, origin: Origin) -> None:
+        """Take one request from the session's quota, raising QuotaExceededError when empty."""
+        if self.per_minute <= 0 or origin.lane == "background":
+            return
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(origin.session, (float(self.per_minute), now))
+        tokens = min(self.per_minute, tokens + (now - updated) * self.per_minute / 60)
+        if tokens < 1:
+            self._buckets[origin.session] = (tokens, now)
+            self.rejected += 1
+            raise QuotaExceededError(
+                f"Quota of {self.per_minute} upstream requests per minute used up"
+            )
+        self._buckets[origin.session] = (tokens - 1, now)
+        if len(self._buckets) > self.max_sessions:
+            # A bucket untouched for a minute is full again, the same as a new one
+            self._buckets = {
+                session: state for session, state in self._buckets.items() if now - state[1] < 60
+            }
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "quota_per_minute": self.per_minute,
+            "quota_sessions": len(self._buckets),
+            "quota_rejected": self.rejected,
+        }
+
+
+class _Waiter:
+    __slots__ = ("future", "enqueued", "limiter_wait")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.limiter_wait = 0.0
+
+
+class _Flow:
+    __slots__ = ("key", "waiters")
+
+    def __init__(self, key: tuple[str, str]):
+        self.key = key
+        self.waiters: deque[_Waiter] = deque()
+
+
+class _Lane:
+    """Waiting requests of one lane, one queue per (session, tool) flow."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.flows: dict[tuple[str, str], _Flow] = {}
+        # Flows with waiters, in round-robin order
+        self.active: deque[_Flow] = deque()
+        self.queued = 0
+        self.in_flight = 0
+        self.granted = 0
+        self.waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.wait_seconds = 0.0
+
+    def enqueue(self, origin: Origin, waiter: _Waiter) -> None:
+        key = (origin.session, origin.tool)
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = self.flows[key] = _Flow(key)
+            self.active.append(flow)
+        flow.waiters.append(waiter)
+        self.queued += 1
+
+    def next(self, session_full) -> tuple[str, _Waiter] | None:
+        """Session and waiter of the next flow in turn whose session may send."""
+        if self.in_flight >= self.limit:
+            return None
+        skipped = 0
+        while skipped < len(self.active):
+            flow = self.active[0]
+            # Callers that gave up (deadline, cancellation) leave their waiter behind
+            while flow.waiters and flow.waiters[0].future.done():
+                flow.waiters.popleft()
+                self.queued -= 1
+            if not flow.waiters:
+                self.active.popleft()
+                del self.flows[flow.key]
+                continue
+            session = flow.key[0]
+            self.active.rotate(-1)
+            if session_full(session):
+                skipped += 1
+                continue
+            waiter = flow.waiters.popleft()
+            self.queued -= 1
+            if not flow.waiters:
+                self.active.pop()
+                del self.flows[flow.key]
+            return session, waiter
+        return None
+
+    def record_wait(self, seconds: float) -> None:
+        self.granted += 1
+        self.waits.append(seconds)
+        self.wait_seconds += seconds
+        observe_queue_wait(self.name, seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            "limit": self.limit,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "flows": len(self.flows),
+            "granted": self.granted,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "wait_p50_seconds": round(waits[len(waits) // 2], 4) if waits else 0.0,
+            "wait_p99_seconds": round(waits[int(len(waits) * 0.99)], 4) if waits else 0.0,
+        }
+
+
+class UpstreamScheduler:
+    """Hand out one host's rate-limit tokens and concurrency by lane, then by flow."""
+
+    def __init__(
+        self,
+        limiter: TokenBucket,
+        concurrency: int,
+        lane_limits: dict[str, int],
+        session_concurrency: int,
+        enabled: bool = True,
+    ):
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.session_concurrency = session_concurrency
+        self.enabled = enabled
+        self.lanes = {name: _Lane(name, lane_limits.get(name, concurrency)) for name in LANES}
+        self.in_flight = 0
+        self._sessions: dict[str, int] = {}
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for the caller's turn and a rate-limit token, and hold a concurrency slot.
+
+        Yields the seconds spent waiting for the rate-limit token.
+        """
+        if not self.enabled:
+            yield await self.limiter.acquire()
+            return
+
+        origin = current_origin.get()
+        lane = self.lanes[origin.lane]
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        lane.enqueue(origin, waiter)
+        self._ensure_dispatcher()
+        self._wake.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller was cancelled
+                self._release(lane, origin.session)
+            else:
+                waiter.future.cancel()
+            raise
+        try:
+            yield waiter.limiter_wait
+        finally:
+            self._release(lane, origin.session)
+
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._dispatch())
+
+    def _session_full(self, session: str) -> bool:
+        return self._sessions.get(session, 0) >= self.session_concurrency
+
+    def _next(self) -> tuple[_Lane, str, _Waiter] | None:
+        if self.in_flight >= self.concurrency:
+            return None
+        for lane in self.lanes.values():
+            picked = lane.next(self._session_full)
+            if picked is not None:
+                session, waiter = picked
+                lane.in_flight += 1
+                self.in_flight += 1
+                self._sessions[session] = self._sessions.get(session, 0) + 1
+                return lane, session, waiter
+        return None
+
+    def _release(self, lane: _Lane, session: str) -> None:
+        lane.in_flight -= 1
+        self.in_flight -= 1
+        remaining = self._sessions[session] - 1
+        if remaining:
+            self._sessions[session] = remaining
+        else:
+            del self._sessions[session]
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _dispatch(self) -> None:
+        while True:
+            if self.in_flight < self.concurrency and any(
+                lane.queued for lane in self.lanes.values()
+            ):
+                # Take the token first and pick who gets it afterwards, so a
+                # request arriving during the wait can still go first
+                limiter_wait = await self.limiter.acquire()
+                picked = self._next()
+                if picked is not None:
+                    lane, _, waiter = picked
+                    self._grant(lane, waiter, limiter_wait)
+                    continue
+                self.limiter.refund()
+            self._wake.clear()
+            await self._wake.wait()
+
+    def _grant(self, lane: _Lane, waiter: _Waiter, limiter_wait: float) -> None:
+        waiter.limiter_wait = limiter_wait
+        lane.record_wait(time.monotonic() - waiter.enqueued)
+        waiter.future.set_result(None)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "sessions_in_flight": len(self._sessions),
+            "lanes": {name: lane.as_dict() for name, lane in self.lanes.items()},
+        }
+
+
+def caller_id(context) -> str:
+    """MCP session ID; the client address under stateless HTTP, where each call is a new session."""
+    if context is None or context.request_context is None:
+        return "anonymous"
+    request = context.request_context.request
+    if request is not None and not request.headers.get("mcp-session-id") and request.client:
+        return request.client.host
+    return context.session_id
+
+
+class SchedulingMiddleware(Middleware):
+    """Tag the upstream requests of each tool call with its caller, tool and lane."""
+
+    def __init__(self, batch_tools: frozenset[str]):
+        self.batch_tools = batch_tools
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        tool = context.message.name
+        lane = "batch" if tool in self.batch_tools else "interactive"
+        token = current_origin.set(Origin(caller_id(context.fastmcp_context), tool, lane))
+        try:
+            return await call_next(context)
+        finally:
+            current_origin.reset(token)
@@ -0,0 +1,58 @@
+"""Production entry point: the weather MCP server on one or more uvicorn workers.
+
+    WEATHER_HOST=0.0.0.0 python mcp/serve.py
+
+Every worker is a separate process with its own event loop, so workers
+share responses and gridpoints through SQLite files (WAL mode) instead
+of memory; an NWS response fetched by one worker is served from the
+shared cache by the others.
+
+MCP sessions live in the worker that created them, and uvicorn hands
+each connection to any worker on the shared port. The default is one
+worker; to scale out, run one server per port (WEATHER_WORKERS=1,
+WEATHER_PORT=8001, 8002, ...) behind a proxy that routes on the
+Mcp-Session-Id header, so resource subscriptions, per-session fair
+scheduling and quotas keep working. Several workers on one port are
+only possible with WEATHER_STATELESS=1, which drops sessions altogether.
+Alert change cursors are snapshot times and work across workers either way.
+"""
+
+import os
+import sys
+
+import uvicorn
+
+WEATHER_WORKERS = int(os.getenv("WEATHER_WORKERS", "1"))
+WEATHER_STATELESS = os.getenv("WEATHER_STATELESS", "0") == "1"
+
+if WEATHER_WORKERS > 1:
+    if not WEATHER_STATELESS:
+        sys.exit(
+            "WEATHER_WORKERS > 1 shares one port between workers, which breaks MCP sessions. "
+            "Run one worker per port behind a proxy that routes on Mcp-Session-Id, "
+            "or set WEATHER_STATELESS=1 to serve without sessions."
+        )
+    # Read by every worker when it imports weather.py
+    os.environ.setdefault("NWS_CACHE_PATH", "responses.db")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from weather import WEATHER_HOST, WEATHER_PORT, mcp  # noqa: E402
+
+app = mcp.http_app(stateless_http=WEATHER_STATELESS, json_response=WEATHER_STATELESS)
+
+
+if __name__ == "__main__":
+    print(
+        f"Starting weather MCP server with {WEATHER_WORKERS} worker(s) on "
+        f"http://{WEATHER_HOST}:{WEATHER_PORT}/mcp"
+        f"{' (stateless)' if WEATHER_STATELESS else ''}"
+    )
+    uvicorn.run(
+        "serve:app",
+        host=WEATHER_HOST,
+        port=WEATHER_PORT,
+        workers=WEATHER_WORKERS,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        timeout_graceful_shutdown=10,
+    )
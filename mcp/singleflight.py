@@ -0,0 +1,37 @@
+"""Request coalescing for concurrent identical upstream fetches."""
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    """Share one in-flight call between all concurrent callers with the same key.
+
+    The shared call runs as its own task, so a caller that is cancelled
+    does not cancel the work the other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "upstream": self.calls - self.coalesced,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+            "coalescing_ratio": self.coalesced / self.calls if self.calls else 0.0,
+        }
@@ -1,35 +1,578 @@
-from typing import Any
+from typing import Any, Coroutine, Literal
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import time
+import weakref
+from urllib.parse import urlparse
 import httpx
 import uvicorn
 from dotenv import load_dotenv
 from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.tools.tool import ToolResult
+from mcp.server.session import ServerSession
+from prometheus_client import CONTENT_TYPE_LATEST
+from pydantic import AnyUrl
 from groq import Groq
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from alert_geo import AlertLocator, ZoneBoundaryStore, zone_endpoints, zones_needed
+from alert_index import AREA_CODES, AlertSnapshot, AlertSnapshotEngine, alert_id
+from gridseries import gridpoint_columns, hourly_columns
+from gridpoints import Gridpoint, GridpointIndex, round_coords
+from metrics import (
+    METRICS_ENABLED,
+    StatsCollector,
+    ToolMetricsMiddleware,
+    observe_upstream,
+    registry,
+    render_metrics,
+    trace_span,
+)
+from models import (
+    ALERT_RECORD_FIELDS,
+    PERIOD_RECORD_FIELDS,
+    AlertsResult,
+    ForecastResult,
+    GeocodeResult,
+    NearbyPlacesResult,
+    PointAlertsResult,
+    alert_record,
+    period_record,
+    select_fields,
+)
+from nws_cache import CacheEntry, CacheStats, DiskCache, MemoryCache, TieredCache, freshness_lifetime
+from nws_parse import parse_response
+from observations import (
+    MAX_RANGE,
+    SETTLE_SECONDS,
+    ObservationStore,
+    Segment,
+    Station,
+    join,
+    nearest_station,
+    observation_columns,
+    parse_instant,
+    parse_observations,
+)
+from places import DEFAULT_INDEX, PlaceIndex, open_index
+from prefetch import PrefetchScheduler
+from resilience import (
+    CircuitOpenError,
+    UpstreamGuard,
+    UpstreamStats,
+    backoff_delay,
+    is_retryable,
+    is_upstream_failure,
+    retry_after_seconds,
+)
+from scheduler import (
+    LANES,
+    QuotaExceededError,
+    SchedulingMiddleware,
+    SessionQuota,
+    UpstreamScheduler,
+    background_context,
+    current_origin,
+)
+from singleflight import SingleFlight
 
 # Load env variables (for Groq API key)
 load_dotenv()
 
-# Create an MCP server with HTTP support
-mcp = FastMCP("weather")
-
 # Constants
-NWS_API_BASE = "https://api.weather.gov"
+NWS_API_BASE = os.getenv("NWS_API_BASE", "https://api.weather.gov")
 USER_AGENT = "weather-app/1.0"
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json",
-    }
-    async with httpx.AsyncClient() as client:
+# Upstream connection pool settings (overridable through the environment)
+NWS_HTTP2 = os.getenv("NWS_HTTP2", "1") == "1"
+NWS_MAX_CONNECTIONS = int(os.getenv("NWS_MAX_CONNECTIONS", "100"))
+NWS_MAX_KEEPALIVE = int(os.getenv("NWS_MAX_KEEPALIVE", "20"))
+NWS_KEEPALIVE_EXPIRY = float(os.getenv("NWS_KEEPALIVE_EXPIRY", "30"))
+NWS_CONNECT_TIMEOUT = float(os.getenv("NWS_CONNECT_TIMEOUT", "5"))
+NWS_READ_TIMEOUT = float(os.getenv("NWS_READ_TIMEOUT", "15"))
+NWS_WRITE_TIMEOUT = float(os.getenv("NWS_WRITE_TIMEOUT", "5"))
+NWS_POOL_TIMEOUT = float(os.getenv("NWS_POOL_TIMEOUT", "5"))
+
+# Response cache settings
+NWS_CACHE_MAX_BYTES = int(os.getenv("NWS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+NWS_CACHE_PATH = os.getenv("NWS_CACHE_PATH")  # enables the on-disk backend when set
+NWS_CACHE_DEFAULT_TTL = float(os.getenv("NWS_CACHE_DEFAULT_TTL", "60"))
+NWS_CACHE_STALE_TTL = float(os.getenv("NWS_CACHE_STALE_TTL", "300"))
+
+# Upstream protection: per-host rate limit, retries and circuit breaker
+NWS_RATE_LIMIT = float(os.getenv("NWS_RATE_LIMIT", "50"))  # requests per second
+NWS_RATE_BURST = int(os.getenv("NWS_RATE_BURST", "100"))
+NWS_RETRIES = int(os.getenv("NWS_RETRIES", "2"))
+NWS_RETRY_BASE_DELAY = float(os.getenv("NWS_RETRY_BASE_DELAY", "0.25"))
+NWS_RETRY_MAX_DELAY = float(os.getenv("NWS_RETRY_MAX_DELAY", "4"))
+NWS_REQUEST_DEADLINE = float(os.getenv("NWS_REQUEST_DEADLINE", "20"))
+NWS_BREAKER_THRESHOLD = int(os.getenv("NWS_BREAKER_THRESHOLD", "5"))
+NWS_BREAKER_RESET = float(os.getenv("NWS_BREAKER_RESET", "30"))
+
+# Upstream fetches allowed in flight per batch tool call
+NWS_BATCH_CONCURRENCY = int(os.getenv("NWS_BATCH_CONCURRENCY", "10"))
+
+# Fair scheduling of upstream requests between sessions, tools and priority lanes
+NWS_SCHEDULER = os.getenv("NWS_SCHEDULER", "1") == "1"
+NWS_UPSTREAM_CONCURRENCY = int(os.getenv("NWS_UPSTREAM_CONCURRENCY", str(NWS_MAX_CONNECTIONS)))
+NWS_BATCH_LANE_CONCURRENCY = int(os.getenv("NWS_BATCH_LANE_CONCURRENCY", "8"))
+NWS_BACKGROUND_LANE_CONCURRENCY = int(os.getenv("NWS_BACKGROUND_LANE_CONCURRENCY", "4"))
+NWS_SESSION_CONCURRENCY = int(os.getenv("NWS_SESSION_CONCURRENCY", "8"))
+NWS_SESSION_QUOTA = int(os.getenv("NWS_SESSION_QUOTA", "0"))  # requests per minute, 0 = unlimited
+NWS_BATCH_TOOLS = frozenset(
+    os.getenv("NWS_BATCH_TOOLS", "get_alerts_many,get_forecast_many").split(",")
+)
+
+# Nationwide alert snapshot, refreshed in the background
+NWS_ALERTS_SNAPSHOT = os.getenv("NWS_ALERTS_SNAPSHOT", "1") == "1"
+NWS_ALERTS_REFRESH_INTERVAL = float(os.getenv("NWS_ALERTS_REFRESH_INTERVAL", "60"))
+
+# Background refresh of the most requested responses before they expire
+NWS_PREFETCH = os.getenv("NWS_PREFETCH", "1") == "1"
+NWS_PREFETCH_TOP = int(os.getenv("NWS_PREFETCH_TOP", "50"))  # size of the hot set
+NWS_PREFETCH_LEAD = float(os.getenv("NWS_PREFETCH_LEAD", "30"))  # seconds before expiry
+NWS_PREFETCH_RATE = float(os.getenv("NWS_PREFETCH_RATE", "2"))  # refreshes per second
+NWS_PREFETCH_HALF_LIFE = float(os.getenv("NWS_PREFETCH_HALF_LIFE", "600"))
+
+# Persistent coordinate -> gridpoint index
+NWS_GRIDPOINT_DB = os.getenv("NWS_GRIDPOINT_DB", "gridpoints.db")
+
+# Persistent UGC zone/county boundaries for locating alerts without a polygon
+NWS_ZONE_DB = os.getenv("NWS_ZONE_DB", "zones.db")
+
+# Local store of station observation history
+NWS_OBSERVATIONS_DB = os.getenv("NWS_OBSERVATIONS_DB", "observations.db")
+
+# Offline place index, compiled from client/data/places.tsv.gz when missing
+WEATHER_PLACES_INDEX = os.getenv("WEATHER_PLACES_INDEX", DEFAULT_INDEX)
+
+# Bind address of the HTTP transport
+WEATHER_HOST = os.getenv("WEATHER_HOST", "127.0.0.1")
+WEATHER_PORT = int(os.getenv("WEATHER_PORT", "8000"))
+
+# Shared upstream client, opened and closed by the server lifespan
+http_client: httpx.AsyncClient | None = None
+
+# Memory-mapped place index, opened by the lifespan or on first use
+place_index: PlaceIndex | None = None
+
+
+def create_response_cache():
+    """Build the response cache from the environment settings."""
+    memory = MemoryCache(NWS_CACHE_MAX_BYTES)
+    if NWS_CACHE_PATH:
+        return TieredCache(memory, DiskCache(NWS_CACHE_PATH))
+    return memory
+
+
+response_cache = create_response_cache()
+cache_stats = CacheStats()
+gridpoint_index = GridpointIndex(NWS_GRIDPOINT_DB)
+zone_boundaries = ZoneBoundaryStore(NWS_ZONE_DB)
+observation_store = ObservationStore(NWS_OBSERVATIONS_DB)
+inflight = SingleFlight()
+upstream_stats = UpstreamStats()
+upstream_guards: dict[str, UpstreamGuard] = {}
+upstream_schedulers: dict[str, UpstreamScheduler] = {}
+session_quota = SessionQuota(NWS_SESSION_QUOTA)
+alert_engine = AlertSnapshotEngine(
+    # Shared by every session, even when a tool call triggers the refresh
+    lambda: in_background(fetch_alert_feed()),
+    NWS_ALERTS_REFRESH_INTERVAL,
+    on_change=lambda changes: on_alerts_changed(),
+)
+
+prefetcher = PrefetchScheduler(
+    response_cache.get,
+    lambda url, entry: prefetch_refresh(url, entry),
+    hot_set=NWS_PREFETCH_TOP,
+    lead=NWS_PREFETCH_LEAD,
+    rate=NWS_PREFETCH_RATE,
+    half_life=NWS_PREFETCH_HALF_LIFE,
+    trackable=lambda url: is_prefetchable(url),
+)
+
+# Resource URI whose subscribers are notified when active alerts change
+ALERT_CHANGES_URI = "alerts://changes"
+
+# Sessions subscribed to each resource URI
+resource_subscribers: dict[str, weakref.WeakSet[ServerSession]] = {}
+
+# Background revalidations in flight, keyed by URL
+_revalidating: dict[str, asyncio.Task] = {}
+
+# Spatial index over the current alert snapshot, rebuilt when alerts change
+alert_locator: AlertLocator | None = None
+_locator_lock = asyncio.Lock()
+_locator_task: asyncio.Task | None = None
+
+# One ingestion at a time per station, so concurrent queries fetch a gap once
+_station_locks: dict[str, asyncio.Lock] = {}
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled keep-alive client used for all NWS requests."""
+    return httpx.AsyncClient(
+        http2=NWS_HTTP2,
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/geo+json",
+        },
+        limits=httpx.Limits(
+            max_connections=NWS_MAX_CONNECTIONS,
+            max_keepalive_connections=NWS_MAX_KEEPALIVE,
+            keepalive_expiry=NWS_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=NWS_CONNECT_TIMEOUT,
+            read=NWS_READ_TIMEOUT,
+            write=NWS_WRITE_TIMEOUT,
+            pool=NWS_POOL_TIMEOUT,
+        ),
+    )
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Keep one upstream connection pool open for the lifetime of the server."""
+    global http_client
+    http_client = create_http_client()
+    gridpoint_index.warm()
+    zone_boundaries.warm()
+    observation_store.warm()
+    get_place_index()
+    if NWS_ALERTS_SNAPSHOT:
+        alert_engine.start()
+    if NWS_PREFETCH:
+        prefetcher.start()
+    try:
+        yield
+    finally:
+        await alert_engine.stop()
+        await prefetcher.stop()
+        for scheduler in upstream_schedulers.values():
+            await scheduler.stop()
+        if _locator_task is not None:
+            _locator_task.cancel()
+        for task in list(_revalidating.values()):
+            task.cancel()
+        await http_client.aclose()
+        http_client = None
+
+
+# Create an MCP server with HTTP support
+mcp = FastMCP("weather", lifespan=lifespan)
+mcp.add_middleware(SchedulingMiddleware(NWS_BATCH_TOOLS))
+if METRICS_ENABLED:
+    mcp.add_middleware(ToolMetricsMiddleware())
+
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    resource_subscribers.setdefault(str(uri), weakref.WeakSet()).add(session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    resource_subscribers.get(str(uri), weakref.WeakSet()).discard(session)
+
+
+async def notify_resource_updated(uri: str) -> None:
+    """Send notifications/resources/updated to every session subscribed to `uri`."""
+    subscribers = resource_subscribers.get(uri, weakref.WeakSet())
+    for session in list(subscribers):
         try:
-            response = await client.get(url, headers=headers, timeout=30.0)
+            await session.send_resource_updated(AnyUrl(uri))
+        except Exception:
+            subscribers.discard(session)
+
+
+def _get_capabilities_with_subscribe(get_capabilities):
+    # The low-level server always advertises subscribe=False, even with handlers
+    def wrapper(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+    return wrapper
+
+
+mcp._mcp_server.get_capabilities = _get_capabilities_with_subscribe(
+    mcp._mcp_server.get_capabilities
+)
+
+
+async def make_nws_request(url: str) -> dict[str, Any] | None:
+    """Make a request to the NWS API with proper error handling.
+
+    Fresh cached responses are returned directly. Expired ones are still
+    served for NWS_CACHE_STALE_TTL seconds while a conditional request
+    refreshes them in the background. Concurrent misses for the same URL
+    share a single upstream request.
+    """
+    with trace_span("make_nws_request", url=url):
+        return await _cached_request(url)
+
+
+def is_prefetchable(url: str) -> bool:
+    """Whether the prefetcher tracks `url`: forecasts, gridpoints and state alerts."""
+    # /points and zone boundaries are persisted, /alerts/active has its own refresher
+    path = urlparse(url).path
+    return path.startswith(("/gridpoints/", "/alerts/active/area/"))
+
+
+async def _cached_request(url: str) -> dict[str, Any] | None:
+    prefetcher.record(url)
+    entry = response_cache.get(url)
+    if entry is not None:
+        now = time.time()
+        if entry.is_fresh(now):
+            cache_stats.hits += 1
+            prefetcher.served_fresh(url, now)
+            return entry.data
+        if now < entry.expires_at + NWS_CACHE_STALE_TTL:
+            cache_stats.stale_hits += 1
+            _revalidate_in_background(url, entry)
+            return entry.data
+
+    cache_stats.misses += 1
+    # Charged before joining a fetch, so one session's exhausted quota never
+    # fails another session's call that coalesced with it
+    try:
+        session_quota.charge(current_origin.get())
+    except QuotaExceededError as e:
+        raise ToolError(str(e)) from e
+    return await inflight.do(flight_key(url), lambda: _fetch_json(url, entry))
+
+
+def flight_key(url: str) -> str:
+    """Coalescing key: callers only share fetches queued in their own scheduler lane.
+
+    Joining a batch or background fetch would leave an interactive caller
+    waiting in that lower-priority queue.
+    """
+    return f"{current_origin.get().lane} {url}"
+
+
+async def prefetch_refresh(url: str, entry: CacheEntry | None) -> dict[str, Any]:
+    """Refresh `url` for the prefetcher, raising when NWS cannot be reached.
+
+    A stale fallback would be counted as a successful prefetch. The fetch
+    gets its own coalescing key so that background callers joining it
+    still get their usual stale fallback rather than the error.
+    """
+    return await inflight.do(
+        f"prefetch {url}", lambda: _fetch_json(url, entry, stale_on_error=False)
+    )
+
+
+def _revalidate_in_background(url: str, entry: CacheEntry) -> None:
+    if url in _revalidating:
+        return
+    task = asyncio.create_task(_fetch_json(url, entry), context=background_context())
+    _revalidating[url] = task
+    task.add_done_callback(lambda _: _revalidating.pop(url, None))
+
+
+async def fetch_alert_feed() -> dict[str, Any]:
+    """The nationwide /alerts/active feed, raising when NWS cannot be reached.
+
+    Unlike make_nws_request this never falls back to a stale cache entry:
+    the snapshot engine takes an unchanged result as NWS confirming that
+    nothing changed, so an outage has to surface as an error.
+    """
+    url = f"{NWS_API_BASE}/alerts/active"
+    entry = response_cache.get(url)
+    if entry is not None and entry.is_fresh(time.time()):
+        return entry.data
+    return await inflight.do(
+        flight_key(url), lambda: _fetch_json(url, entry, stale_on_error=False)
+    )
+
+
+async def _fetch_json(
+    url: str, entry: CacheEntry | None = None, stale_on_error: bool = True
+) -> dict[str, Any] | None:
+    """Fetch `url`, revalidating `entry` when given, and update the cache.
+
+    When the upstream fails, `entry`'s stale data is returned, or None
+    without one; with stale_on_error=False the error is raised instead.
+    """
+    headers = {}
+    if entry is not None:
+        cache_stats.revalidations += 1
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    try:
+        deadline = asyncio.get_running_loop().time() + NWS_REQUEST_DEADLINE
+        async with asyncio.timeout_at(deadline):
+            if http_client is None:
+                # Called outside the server lifespan (scripts, REPL): use a one-off client
+                async with create_http_client() as client:
+                    return await _send_with_retries(client, url, headers, entry, deadline)
+            return await _send_with_retries(http_client, url, headers, entry, deadline)
+    except Exception as e:
+        print(f"API request failed: {e!r}")
+        if not stale_on_error:
+            raise
+        # Stale data beats no data when the upstream is failing
+        return entry.data if entry is not None else None
+
+
+def upstream_guard(url: str) -> UpstreamGuard:
+    host = urlparse(url).netloc
+    guard = upstream_guards.get(host)
+    if guard is None:
+        guard = upstream_guards[host] = UpstreamGuard(
+            NWS_RATE_LIMIT, NWS_RATE_BURST, NWS_BREAKER_THRESHOLD, NWS_BREAKER_RESET
+        )
+    return guard
+
+
+def upstream_scheduler(url: str) -> UpstreamScheduler:
+    """Scheduler handing out the rate-limit tokens of the host's guard."""
+    host = urlparse(url).netloc
+    scheduler = upstream_schedulers.get(host)
+    if scheduler is None:
+        scheduler = upstream_schedulers[host] = UpstreamScheduler(
+            upstream_guard(url).limiter,
+            NWS_UPSTREAM_CONCURRENCY,
+            {"batch": NWS_BATCH_LANE_CONCURRENCY, "background": NWS_BACKGROUND_LANE_CONCURRENCY},
+            NWS_SESSION_CONCURRENCY,
+            enabled=NWS_SCHEDULER,
+        )
+    return scheduler
+
+
+async def _send_with_retries(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: dict[str, str],
+    entry: CacheEntry | None,
+    deadline: float,
+) -> dict[str, Any]:
+    """Send through the host's scheduler and breaker, retrying transient failures.
+
+    Each attempt waits for its turn and a rate-limit token in the host's
+    scheduler, which holds a concurrency slot for the attempt only, not
+    for the backoff between attempts. No retry is scheduled past
+    `deadline` (event loop time).
+    """
+    guard = upstream_guard(url)
+    if not guard.breaker.allow():
+        upstream_stats.short_circuited += 1
+        raise CircuitOpenError(f"Circuit open for {urlparse(url).netloc}")
+
+    # A half-open breaker let this request through as its only probe. It
+    # must be handed back however the request ends, or the breaker stays
+    # shut for good
+    probing = guard.breaker.state == "half_open"
+    try:
+        return await _attempts(client, url, headers, entry, deadline, guard)
+    finally:
+        if probing:
+            guard.breaker.release_probe()
+
+
+async def _attempts(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: dict[str, str],
+    entry: CacheEntry | None,
+    deadline: float,
+    guard: UpstreamGuard,
+) -> dict[str, Any]:
+    scheduler = upstream_scheduler(url)
+    attempt = 0
+    while True:
+        async with scheduler.slot() as limiter_wait:
+            upstream_stats.limiter_wait_seconds += limiter_wait
+            upstream_stats.attempts += 1
+            try:
+                data = await _send(client, url, headers, entry)
+                error = None
+            except asyncio.CancelledError:
+                # Cut off by the request deadline: the host is too slow to count as healthy
+                upstream_stats.failures += 1
+                guard.breaker.record_failure()
+                raise
+            except Exception as e:
+                error = e
+
+        if error is None:
+            guard.limiter.on_success()
+            guard.breaker.record_success()
+            return data
+
+        retry_after = None
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = retry_after_seconds(error.response)
+            if error.response.status_code == 429 or retry_after is not None:
+                upstream_stats.throttled += 1
+                guard.limiter.throttle(retry_after)
+
+        delay = max(
+            backoff_delay(attempt, NWS_RETRY_BASE_DELAY, NWS_RETRY_MAX_DELAY), retry_after or 0.0
+        )
+        # A wait the deadline would cut short cannot end in a response
+        out_of_time = delay >= deadline - asyncio.get_running_loop().time()
+        if attempt >= NWS_RETRIES or not is_retryable(error) or out_of_time:
+            if is_upstream_failure(error):
+                upstream_stats.failures += 1
+                guard.breaker.record_failure()
+            else:
+                guard.breaker.record_success()
+            raise error
+
+        upstream_stats.retries += 1
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def _send(
+    client: httpx.AsyncClient, url: str, headers: dict[str, str], entry: CacheEntry | None
+) -> dict[str, Any]:
+    with observe_upstream(url) as observation:
+        async with client.stream("GET", url, headers=headers) as response:
+            observation.status = response.status_code
+            if response.status_code == 304 and entry is not None:
+                cache_stats.not_modified += 1
+                _store_response(url, entry.data, entry.size, response.headers, entry)
+                return entry.data
+
             response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"API request failed: {e}")
-            return None
+            data, size = await parse_response(url, response)
+            observation.size = size
+
+    _store_response(url, data, size, response.headers)
+    return data
+
+
+def _store_response(
+    url: str,
+    data: dict[str, Any],
+    size: int,
+    headers: httpx.Headers,
+    previous: CacheEntry | None = None,
+) -> None:
+    ttl = freshness_lifetime(headers, NWS_CACHE_DEFAULT_TTL)
+    if ttl is None:
+        response_cache.delete(url)
+        return
+    response_cache.set(url, CacheEntry(
+        data=data,
+        size=size,
+        expires_at=time.time() + ttl,
+        etag=headers.get("etag") or (previous.etag if previous else None),
+        last_modified=headers.get("last-modified") or (previous.last_modified if previous else None),
+    ))
 
 
 def format_alert(feature: dict) -> str:
@@ -44,78 +587,800 @@ Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
 
-@mcp.tool()
-async def get_alerts(state: str) -> str:
-    """Get weather alerts for a US state.
+def format_period(period: dict) -> str:
+    """Format a forecast period into a readable string."""
+    return f"""
+{period['name']}:
+Temperature: {period['temperature']}°{period['temperatureUnit']}
+Wind: {period['windSpeed']} {period['windDirection']}
+Forecast: {period['detailedForecast']}
+"""
 
-    Args:
-        state: Two-letter US state code (e.g. CA, NY)
+
+class WeatherError(Exception):
+    """A lookup failed; the message is meant for the end user."""
+
+
+def area_code(state: str) -> str:
+    """A state, territory or marine area code, upper-cased; WeatherError when unknown."""
+    code = state.strip().upper()
+    if code not in AREA_CODES:
+        raise WeatherError(
+            f"Unknown state code {state!r}; use a two-letter code such as CA or NY."
+        )
+    return code
+
+
+async def alert_features_for_state(state: str) -> list[dict[str, Any]]:
+    """Active alert features for a state, raising WeatherError on failure.
+
+    Served from the nationwide snapshot when a recent one is available.
     """
+    # The snapshot has no alerts for an unknown code rather than an error
+    state = area_code(state)
+    snapshot = alert_engine.current()
+    if snapshot is not None:
+        return snapshot.query(state=state)
+
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
     data = await make_nws_request(url)
 
     if not data or "features" not in data:
-        return "Unable to fetch alerts or no alerts found."
+        raise WeatherError("Unable to fetch alerts or no alerts found.")
+    return data["features"]
 
-    if not data["features"]:
+
+async def alerts_for_state(state: str) -> str:
+    """Formatted active alerts for a state, raising WeatherError on failure."""
+    features = await alert_features_for_state(state)
+    if not features:
         return "No active alerts for this state."
 
-    alerts = [format_alert(feature) for feature in data["features"]]
+    alerts = [format_alert(feature) for feature in features]
     return "\n---\n".join(alerts)
 
 
-@mcp.tool()
-async def get_forecast(latitude: float, longitude: float) -> str:
-    """Get weather forecast for a location.
+async def resolve_gridpoint(latitude: float, longitude: float) -> Gridpoint:
+    """NWS grid cell for a coordinate, raising WeatherError on failure.
 
-    Args:
-        latitude: Latitude of the location
-        longitude: Longitude of the location
+    Known coordinates come from the gridpoint index without a /points call.
     """
-    # Get the forecast grid endpoint
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
+    gridpoint = gridpoint_index.get(latitude, longitude)
+    if gridpoint is not None:
+        return gridpoint
+
+    lat, lon = round_coords(latitude, longitude)
+    points_url = f"{NWS_API_BASE}/points/{lat},{lon}"
     points_data = await make_nws_request(points_url)
 
     if not points_data or "properties" not in points_data:
-        return "Unable to fetch forecast data for this location."
+        raise WeatherError("Unable to fetch forecast data for this location.")
+
+    gridpoint = Gridpoint.from_points(points_data["properties"])
+    if gridpoint is None:
+        raise WeatherError("No forecast URL available.")
+    gridpoint_index.put(latitude, longitude, gridpoint)
+    return gridpoint
+
 
-    forecast_url = points_data["properties"].get("forecast")
-    if not forecast_url:
-        return "No forecast URL available."
+def get_place_index() -> PlaceIndex:
+    global place_index
+    if place_index is None:
+        place_index = open_index(WEATHER_PLACES_INDEX)
+    return place_index
 
-    forecast_data = await make_nws_request(forecast_url)
+
+def resolve_location(
+    latitude: float | None, longitude: float | None, place: str | None
+) -> tuple[float, float]:
+    """Coordinates from explicit latitude/longitude or a place name, raising WeatherError."""
+    if place:
+        matches = get_place_index().geocode(place, limit=1)
+        if not matches:
+            raise WeatherError(f"Unknown place: {place}. Try \"City, ST\" or coordinates.")
+        return matches[0]["latitude"], matches[0]["longitude"]
+    if latitude is None or longitude is None:
+        raise WeatherError("Provide latitude and longitude, or a place name.")
+    return latitude, longitude
+
+
+async def forecast_periods(latitude: float, longitude: float) -> list[dict[str, Any]]:
+    """All forecast periods for a coordinate, raising WeatherError on failure."""
+    gridpoint = await resolve_gridpoint(latitude, longitude)
+    forecast_data = await make_nws_request(gridpoint.forecast)
     if not forecast_data or "properties" not in forecast_data:
-        return "Unable to fetch detailed forecast."
+        raise WeatherError("Unable to fetch detailed forecast.")
 
     periods = forecast_data["properties"].get("periods", [])
     if not periods:
-        return "No forecast periods available."
+        raise WeatherError("No forecast periods available.")
+    return periods
 
-    forecasts = []
-    for period in periods[:5]:  # Only show next 5 periods
-        forecast = f"""
-{period['name']}:
-Temperature: {period['temperature']}°{period['temperatureUnit']}
-Wind: {period['windSpeed']} {period['windDirection']}
-Forecast: {period['detailedForecast']}
-"""
-        forecasts.append(forecast)
 
+async def forecast_for_point(
+    latitude: float, longitude: float, offset: int = 0, limit: int = 5
+) -> str:
+    """Formatted forecast periods for a coordinate, raising WeatherError on failure."""
+    periods = await forecast_periods(latitude, longitude)
+    offset = max(offset, 0)
+    forecasts = [format_period(period) for period in periods[offset:offset + max(limit, 0)]]
     return "\n---\n".join(forecasts)
 
 
+async def gather_bounded(items: list, fetch) -> list[dict[str, Any]]:
+    """Run `fetch` over `items` concurrently, at most NWS_BATCH_CONCURRENCY at a time.
+
+    Each item yields {"result": ...} or {"error": ...}, in input order.
+    """
+    semaphore = asyncio.Semaphore(NWS_BATCH_CONCURRENCY)
+
+    async def run(item) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                return {"result": await fetch(item)}
+            except (WeatherError, ToolError) as e:
+                return {"error": str(e)}
+            except Exception as e:
+                return {"error": f"Unexpected error: {e}"}
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+
+def structured_result(record: dict[str, Any]) -> ToolResult:
+    """A tool result carrying `record` as structured content.
+
+    Tools with a text and a structured format are registered without an
+    output schema: a union schema would be validated with jsonschema on
+    every call, on the server and again in the client, text calls included.
+    """
+    return ToolResult(structured_content=record)
+
+
+@mcp.tool(output_schema=None)
+async def get_alerts(
+    state: str,
+    format: Literal["text", "structured"] = "text",
+    fields: list[str] | None = None,
+) -> str | ToolResult:
+    """Get weather alerts for a US state.
+
+    Args:
+        state: Two-letter US state code (e.g. CA, NY)
+        format: "text" for readable text, "structured" for typed alert records
+        fields: With format="structured", only return these alert fields
+            (id, event, headline, areaDesc, severity, urgency, effective,
+            expires, description, instruction)
+    """
+    if format == "text":
+        try:
+            return await alerts_for_state(state)
+        except WeatherError as e:
+            return str(e)
+
+    try:
+        selected = select_fields(fields, ALERT_RECORD_FIELDS)
+        features = await alert_features_for_state(state)
+    except (ValueError, WeatherError) as e:
+        raise ToolError(str(e))
+    result: AlertsResult = {
+        "state": state.strip().upper(),
+        "alerts": [alert_record(feature, selected) for feature in features],
+    }
+    return structured_result(result)
+
+
+@mcp.tool(output_schema=None)
+async def get_forecast(
+    latitude: float | None = None,
+    longitude: float | None = None,
+    place: str | None = None,
+    format: Literal["text", "structured"] = "text",
+    offset: int = 0,
+    limit: int = 5,
+    fields: list[str] | None = None,
+) -> str | ToolResult:
+    """Get weather forecast for a location.
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        place: US place name instead of coordinates, e.g. "Portland, ME"
+        format: "text" for readable text, "structured" for typed period records
+        offset: Index of the first forecast period to return
+        limit: Number of forecast periods to return (up to 14 are available)
+        fields: With format="structured", only return these period fields
+            (number, name, startTime, endTime, isDaytime, temperature,
+            temperatureUnit, probabilityOfPrecipitation, windSpeed,
+            windDirection, shortForecast, detailedForecast)
+    """
+    if format == "text":
+        try:
+            latitude, longitude = resolve_location(latitude, longitude, place)
+            return await forecast_for_point(latitude, longitude, offset, limit)
+        except WeatherError as e:
+            return str(e)
+
+    try:
+        latitude, longitude = resolve_location(latitude, longitude, place)
+        selected = select_fields(fields, PERIOD_RECORD_FIELDS)
+        periods = await forecast_periods(latitude, longitude)
+    except (ValueError, WeatherError) as e:
+        raise ToolError(str(e))
+    offset = max(offset, 0)
+    result: ForecastResult = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "total": len(periods),
+        "offset": offset,
+        "periods": [
+            period_record(period, selected)
+            for period in periods[offset:offset + max(limit, 0)]
+        ],
+    }
+    return structured_result(result)
+
+
+@mcp.tool()
+def geocode(name: str, limit: int = 5) -> GeocodeResult:
+    """Find US places by name, offline, most populous first.
+
+    Args:
+        name: Place name, optionally with a state: "Springfield",
+            "Portland, ME" or "Portland, Oregon"
+        limit: Maximum number of places to return
+    """
+    return {"query": name, "places": get_place_index().geocode(name, max(limit, 1))}
+
+
+@mcp.tool()
+def nearest_places(latitude: float, longitude: float, k: int = 5) -> NearbyPlacesResult:
+    """Find the US places closest to a coordinate, offline, nearest first.
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        k: Number of places to return (up to 50)
+    """
+    k = min(max(k, 1), 50)
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "places": get_place_index().nearest(latitude, longitude, k),
+    }
+
+
+@mcp.tool()
+async def get_hourly_forecast(
+    latitude: float,
+    longitude: float,
+    hours: int = 168,
+    encoding: Literal["json", "base64"] = "json",
+) -> dict[str, Any]:
+    """Get the hourly forecast for a location as compact columns.
+
+    Returns an hourly time axis ("start", "step_seconds", "length") and one
+    array per variable in "columns": temperature, probabilityOfPrecipitation
+    and windSpeed as numbers, windDirection and shortForecast as
+    {"categories", "codes"}. With encoding="base64" numeric columns are
+    little-endian float32 (NaN for missing hours).
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        hours: Number of hours to return (up to 168)
+        encoding: "json" for number arrays, "base64" for packed float32
+    """
+    hours = min(max(hours, 1), 168)
+    try:
+        gridpoint = await resolve_gridpoint(latitude, longitude)
+        url = gridpoint.forecast_hourly or f"{gridpoint.forecast}/hourly"
+        data = await make_nws_request(url)
+        if not data or "properties" not in data:
+            raise WeatherError("Unable to fetch hourly forecast.")
+        return hourly_columns(data["properties"].get("periods", []), hours, encoding)
+    except (ValueError, WeatherError) as e:
+        raise ToolError(str(e))
+
+
+@mcp.tool()
+async def get_gridpoint_series(
+    latitude: float,
+    longitude: float,
+    variables: list[str] | None = None,
+    hours: int = 168,
+    encoding: Literal["json", "base64"] = "json",
+) -> dict[str, Any]:
+    """Get raw NWS gridpoint forecast data for a location as hourly columns.
+
+    Returns an hourly time axis ("start", "step_seconds", "length"), the unit
+    of each variable in "units" and one array per variable in "columns".
+    With encoding="base64" columns are little-endian float32 (NaN for gaps).
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        variables: Layers to return (default temperature,
+            probabilityOfPrecipitation, windSpeed). Available: temperature,
+            dewpoint, relativeHumidity, apparentTemperature, skyCover,
+            windDirection, windSpeed, windGust, probabilityOfPrecipitation,
+            quantitativePrecipitation, snowfallAmount
+        hours: Number of hours to return (up to 168)
+        encoding: "json" for number arrays, "base64" for packed float32
+    """
+    variables = variables or ["temperature", "probabilityOfPrecipitation", "windSpeed"]
+    hours = min(max(hours, 1), 168)
+    try:
+        gridpoint = await resolve_gridpoint(latitude, longitude)
+        url = gridpoint.forecast_grid_data or (
+            f"{NWS_API_BASE}/gridpoints/{gridpoint.office}/{gridpoint.grid_x},{gridpoint.grid_y}"
+        )
+        data = await make_nws_request(url)
+        if not data or "properties" not in data:
+            raise WeatherError("Unable to fetch gridpoint data.")
+        return gridpoint_columns(data["properties"], variables, hours, encoding)
+    except (ValueError, WeatherError) as e:
+        raise ToolError(str(e))
+
+
+async def station_for_point(latitude: float, longitude: float) -> Station:
+    """Observation station nearest a coordinate, raising WeatherError on failure.
+
+    Stations are remembered per gridpoint, so /stations is asked once per cell.
+    """
+    gridpoint = await resolve_gridpoint(latitude, longitude)
+    cell = (gridpoint.office, gridpoint.grid_x, gridpoint.grid_y)
+    station = observation_store.station(*cell)
+    if station is not None:
+        return station
+
+    data = await make_nws_request(
+        f"{NWS_API_BASE}/gridpoints/{gridpoint.office}/{gridpoint.grid_x},{gridpoint.grid_y}/stations"
+    )
+    station = nearest_station((data or {}).get("features") or [], latitude, longitude)
+    if station is None:
+        raise WeatherError("No observation station found for this location.")
+    observation_store.put_station(*cell, station)
+    return station
+
+
+async def fetch_observations(station: str, start: int, end: int) -> Segment:
+    """Observations of a station in [start, end) from NWS, raising WeatherError on failure.
+
+    When pages are left after the last one followed, the segment only
+    covers [oldest observation fetched, end), so the rest of the window
+    is still missing from the store and fetched by a later request.
+    """
+    def iso(epoch: int) -> str:
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+    url = f"{NWS_API_BASE}/stations/{station}/observations?start={iso(start)}&end={iso(end)}"
+    features = []
+    # Long windows come in pages; follow them, but never indefinitely
+    for _ in range(20):
+        data = await make_nws_request(url)
+        if not data or "features" not in data:
+            raise WeatherError("Unable to fetch observations.")
+        features += data["features"]
+        url = (data.get("pagination") or {}).get("next")
+        if not url or not data["features"]:
+            return parse_observations(features, start, end)
+
+    # NWS lists newest first: what the unfollowed pages hold is older
+    segment = parse_observations(features, start, end)
+    return segment.window(segment.times[0] if segment else end, end)
+
+
+async def observations_for_point(
+    latitude: float, longitude: float, start: int, end: int
+) -> tuple[Station, Segment]:
+    """Station and observations in [start, end), downloading only what is not stored."""
+    station = await station_for_point(latitude, longitude)
+    settled = max(min(end, int(time.time()) - SETTLE_SECONDS), start)
+    lock = _station_locks.setdefault(station.identifier, asyncio.Lock())
+    async with lock:
+        for gap_start, gap_end in observation_store.missing(station.identifier, start, settled):
+            segment = await fetch_observations(station.identifier, gap_start, gap_end)
+            observation_store.append(station.identifier, segment)
+    parts = [observation_store.query(station.identifier, start, settled)]
+    if end > settled:
+        parts.append(await fetch_observations(station.identifier, settled, end))
+    return station, join(parts, start, end)
+
+
+@mcp.tool()
+async def get_observations(
+    latitude: float | None = None,
+    longitude: float | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    interval: Literal["raw", "hour", "day"] = "raw",
+    variables: list[str] | None = None,
+    place: str | None = None,
+    encoding: Literal["json", "base64"] = "json",
+) -> dict[str, Any]:
+    """Get observed weather from the station nearest a location, as compact columns.
+
+    With interval="raw" every observation is returned: "times" and one
+    array per variable in "columns". With "hour" or "day" observations are
+    summarized into UTC buckets on an axis ("axis_start", "step_seconds",
+    "length"): "count" holds the observations per bucket and each column
+    is {"min", "max", "mean"}. Missing values are null (NaN with
+    encoding="base64", little-endian float32). Repeated queries are
+    answered from stored history; only new time ranges are downloaded.
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        start: Start of the range, ISO-8601 (default 24 hours before end);
+            times without an offset are UTC
+        end: End of the range, ISO-8601 (default now)
+        interval: "raw" for each observation, "hour" or "day" for min/max/mean
+        variables: Observed values to return (default temperature,
+            dewpoint, windSpeed). Available: temperature, dewpoint,
+            relativeHumidity, windDirection, windSpeed, windGust,
+            barometricPressure, visibility, precipitationLastHour
+        place: US place name instead of coordinates, e.g. "Tulsa, OK"
+        encoding: "json" for number arrays, "base64" for packed float32
+    """
+    variables = variables or ["temperature", "dewpoint", "windSpeed"]
+    try:
+        latitude, longitude = resolve_location(latitude, longitude, place)
+        end_time = parse_instant(end) if end else int(time.time())
+        start_time = parse_instant(start) if start else end_time - 86400
+        if start_time >= end_time:
+            raise ValueError("start must be before end.")
+        if end_time - start_time > MAX_RANGE:
+            raise ValueError(f"Ranges are limited to {MAX_RANGE // 86400} days.")
+        station, segment = await observations_for_point(latitude, longitude, start_time, end_time)
+        return observation_columns(station, segment, variables, interval, encoding)
+    except (ValueError, WeatherError) as e:
+        raise ToolError(str(e))
+
+
+@mcp.tool()
+async def search_alerts(
+    state: str | None = None,
+    zone: str | None = None,
+    min_severity: str | None = None,
+    event: str | None = None,
+) -> str:
+    """Search active US weather alerts nationwide. All filters are optional and combined.
+
+    Args:
+        state: Two-letter US state code (e.g. TX)
+        zone: NWS zone or county UGC code (e.g. TXZ211, TXC453)
+        min_severity: Minimum severity: Minor, Moderate, Severe or Extreme
+        event: Exact event type (e.g. Tornado Warning)
+    """
+    if state:
+        try:
+            state = area_code(state)
+        except WeatherError as e:
+            return str(e)
+    snapshot = alert_engine.current() or await alert_engine.refresh()
+    if snapshot is None:
+        return "Unable to fetch alerts."
+
+    features = snapshot.query(state=state, zone=zone, min_severity=min_severity, event=event)
+    if not features:
+        return "No active alerts match these filters."
+
+    return "\n---\n".join(format_alert(feature) for feature in features)
+
+
+async def on_alerts_changed() -> None:
+    """Tell subscribers and re-index the new snapshot off the request path."""
+    global _locator_task
+    await notify_resource_updated(ALERT_CHANGES_URI)
+    if alert_engine.snapshot is not None:
+        _locator_task = asyncio.create_task(
+            locate_alerts(alert_engine.snapshot), context=background_context()
+        )
+
+
+async def fetch_zone_boundary(ugc: str) -> dict[str, Any] | None:
+    """GeoJSON geometry of a UGC zone or county, or None when NWS has none.
+
+    Raises when NWS could not be asked (quota, open breaker, 5xx,
+    timeout), so the zone is tried again rather than taken as missing.
+    """
+    for kind in zone_endpoints(ugc):
+        url = f"{NWS_API_BASE}/zones/{kind}/{ugc}"
+        try:
+            data = await inflight.do(
+                flight_key(url), lambda: _fetch_json(url, stale_on_error=False)
+            )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                continue
+            raise
+        if data and data.get("geometry"):
+            return data["geometry"]
+    return None
+
+
+async def in_background(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Await `coro` as background work: uncharged and in the background lane.
+
+    For fetches that build state shared by every session, which must not
+    depend on the quota or priority of whoever happened to trigger them.
+    """
+    return await asyncio.create_task(coro, context=background_context())
+
+
+async def locate_alerts(snapshot: AlertSnapshot) -> AlertLocator:
+    """The spatial index for `snapshot`, fetching boundaries of new zones first."""
+    global alert_locator
+    async with _locator_lock:
+        if alert_locator is None or alert_locator.snapshot is not snapshot:
+            missing = zone_boundaries.missing(zones_needed(snapshot))
+            results = await in_background(gather_bounded(missing, fetch_zone_boundary))
+            for ugc, result in zip(missing, results):
+                if "error" in result:
+                    print(f"Boundary of zone {ugc} unavailable: {result['error']}")
+                    continue
+                zone_boundaries.put(ugc, result["result"])
+            alert_locator = AlertLocator(snapshot, zone_boundaries)
+        return alert_locator
+
+
+def alert_locator_stats() -> dict[str, Any]:
+    return {"zones": len(zone_boundaries), **(alert_locator.as_dict() if alert_locator else {})}
+
+
+@mcp.tool(output_schema=None)
+async def get_alerts_for_point(
+    latitude: float | None = None,
+    longitude: float | None = None,
+    place: str | None = None,
+    format: Literal["text", "structured"] = "text",
+) -> str | ToolResult:
+    """Get the active weather alerts whose area contains a location.
+
+    Unlike get_alerts, which returns every alert in a state, only alerts
+    whose polygon, or one of whose zones, contains the point are returned.
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        place: US place name instead of coordinates, e.g. "Tulsa, OK"
+        format: "text" for readable text, "structured" for typed alert records
+    """
+    try:
+        latitude, longitude = resolve_location(latitude, longitude, place)
+        snapshot = alert_engine.current() or await alert_engine.refresh()
+        if snapshot is None:
+            raise WeatherError("Unable to fetch alerts.")
+    except WeatherError as e:
+        if format == "text":
+            return str(e)
+        raise ToolError(str(e))
+
+    features = (await locate_alerts(snapshot)).find(latitude, longitude)
+    if format == "structured":
+        result: PointAlertsResult = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "alerts": [alert_record(feature) for feature in features],
+        }
+        return structured_result(result)
+    if not features:
+        return "No active alerts for this location."
+    return "\n---\n".join(format_alert(feature) for feature in features)
+
+
+def alert_summary(key: str, feature: dict | None) -> dict[str, Any]:
+    """Compact representation of an alert for get_alert_changes."""
+    if feature is None:
+        return {"id": key}
+    props = feature.get("properties", {})
+    return {
+        "id": key,
+        "updated": props.get("updated"),
+        "expires": props.get("expires"),
+        "text": format_alert(feature),
+    }
+
+
+@mcp.tool()
+async def get_alert_changes(since: int = 0, state: str | None = None) -> dict[str, Any]:
+    """Get alerts that were added, updated or expired since a cursor.
+
+    Pass the "cursor" from the previous response as `since` to receive only
+    what changed. When "reset" is true the cursor was unknown or too old and
+    "added" holds every active alert, so the caller should replace its state.
+    A change may occasionally be reported twice; apply changes by alert ID.
+    Subscribe to the alerts://changes resource to be told when to poll.
+
+    Args:
+        since: Cursor returned by the previous call; 0 for a full sync
+        state: Optional two-letter US state code to limit changes to
+    """
+    snapshot = alert_engine.current() or await alert_engine.refresh()
+    if snapshot is None:
+        return {"error": "Unable to fetch alerts."}
+
+    result = {
+        "cursor": alert_engine.changes.cursor,
+        "reset": False,
+        "added": [],
+        "updated": [],
+        "expired": [],
+    }
+    changes = alert_engine.changes.since(since)
+    if changes is None:
+        result["reset"] = True
+        result["added"] = [
+            alert_summary(alert_id(feature), feature) for feature in snapshot.query(state=state)
+        ]
+        return result
+
+    # A cursor from a worker that refreshed sooner is ahead of this one; keep it
+    result["cursor"] = max(result["cursor"], since)
+    for change in changes:
+        if state is None or change.in_state(state):
+            result[change.kind].append(alert_summary(change.alert_id, change.feature))
+    return result
+
+
+@mcp.resource(ALERT_CHANGES_URI, mime_type="application/json")
+def alert_changes_cursor() -> dict[str, Any]:
+    """Latest alert change cursor; subscribe for notifications when alerts change."""
+    return {"cursor": alert_engine.changes.cursor}
+
+
+@mcp.tool()
+async def get_alerts_many(states: list[str]) -> list[dict[str, Any]]:
+    """Get weather alerts for several US states in one call.
+
+    Args:
+        states: Two-letter US state codes (e.g. ["CA", "NY", "TX"])
+
+    Returns one entry per state with either a "result" or an "error".
+    """
+    results = await gather_bounded(states, alerts_for_state)
+    return [{"state": state, **result} for state, result in zip(states, results)]
+
+
+@mcp.tool()
+async def get_forecast_many(locations: list[tuple[float, float]]) -> list[dict[str, Any]]:
+    """Get weather forecasts for several locations in one call.
+
+    Args:
+        locations: (latitude, longitude) pairs, e.g. [[40.7128, -74.006], [41.8781, -87.6298]]
+
+    Returns one entry per location with either a "result" or an "error".
+    """
+    results = await gather_bounded(locations, lambda loc: forecast_for_point(*loc))
+    return [
+        {"latitude": lat, "longitude": lon, **result}
+        for (lat, lon), result in zip(locations, results)
+    ]
+
+
+def scheduler_stats() -> dict[str, Any]:
+    """Quota counters and per-lane queue figures summed over hosts."""
+    totals: dict[str, Any] = session_quota.as_dict()
+    for scheduler in upstream_schedulers.values():
+        for lane, stats in scheduler.as_dict()["lanes"].items():
+            for key in ("queued", "in_flight", "granted", "wait_seconds"):
+                name = f"{lane}_{key}"
+                totals[name] = totals.get(name, 0) + stats[key]
+            name = f"{lane}_wait_p99_seconds"
+            totals[name] = max(totals.get(name, 0.0), stats["wait_p99_seconds"])
+    return totals
+
+
+def stats_snapshot() -> dict[str, Any]:
+    return {
+        "cache": cache_stats.as_dict(),
+        "coalescing": inflight.as_dict(),
+        "upstream": {
+            **upstream_stats.as_dict(),
+            "hosts": {host: guard.as_dict() for host, guard in upstream_guards.items()},
+        },
+        "gridpoints": {"indexed": len(gridpoint_index)},
+        "alert_snapshot": alert_engine.as_dict(),
+        "alert_locator": alert_locator_stats(),
+        "prefetch": {**prefetcher.as_dict(), "hot": prefetcher.hot()},
+        "observations": observation_store.as_dict(),
+        "scheduler": {
+            **scheduler_stats(),
+            "hosts": {host: scheduler.as_dict() for host, scheduler in upstream_schedulers.items()},
+        },
+    }
+
+
+registry.register(StatsCollector({
+    "cache": lambda: {**cache_stats.as_dict(), "bytes": response_cache.current_bytes},
+    "coalescing": lambda: inflight.as_dict(),
+    "upstream": lambda: upstream_stats.as_dict(),
+    "gridpoints": lambda: {"indexed": len(gridpoint_index)},
+    "alert_snapshot": lambda: alert_engine.as_dict(),
+    "alert_locator": alert_locator_stats,
+    "prefetch": lambda: prefetcher.as_dict(),
+    "observations": lambda: observation_store.as_dict(),
+    "scheduler": scheduler_stats,
+}, counters={
+    "cache": ("hits", "stale_hits", "misses", "revalidations", "not_modified"),
+    "coalescing": ("calls", "upstream", "coalesced"),
+    "upstream": (
+        "attempts", "retries", "throttled", "failures", "short_circuited", "limiter_wait_seconds",
+    ),
+    "alert_snapshot": ("refreshes", "failures"),
+    "prefetch": ("prefetches", "prefetch_hits", "failures"),
+    "observations": ("rows_stored", "windows_stored", "compactions"),
+    "scheduler": (
+        "quota_rejected",
+        *(f"{lane}_{key}" for lane in LANES for key in ("granted", "wait_seconds")),
+    ),
+}))
+
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats(request: Request) -> JSONResponse:
+    """Report how upstream requests are being served."""
+    return JSONResponse(stats_snapshot())
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+def readiness() -> dict[str, Any]:
+    """Whether the server can answer from upstream and its indexes, with reasons."""
+    problems = []
+    if http_client is None:
+        problems.append("upstream client not started")
+    open_hosts = [host for host, guard in upstream_guards.items() if guard.breaker.state == "open"]
+    if open_hosts:
+        problems.append(f"circuit open for {', '.join(open_hosts)}")
+    if NWS_ALERTS_SNAPSHOT and alert_engine.current() is None:
+        problems.append("no recent alert snapshot")
+    return {
+        "ready": not problems,
+        "problems": problems,
+        "gridpoints_indexed": len(gridpoint_index),
+        "alert_snapshot_age_seconds": alert_engine.as_dict()["age_seconds"],
+    }
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness: the process is up and serving HTTP."""
+    return JSONResponse({"status": "ok", **readiness()})
+
+
+@mcp.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    """Readiness: 503 while upstream or the alert snapshot are unavailable."""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
 
 # Run the server with HTTP transport
 if __name__ == "__main__":
     print("Starting weather MCP server with HTTP transport...")
     print("Available tools:")
     print("- get_alerts: Get weather alerts for US states")
-    print("- get_forecast: Get detailed weather forecast for coordinates")
+    print("- get_forecast: Get detailed weather forecast for coordinates or a place name")
+    print("- geocode / nearest_places: Offline place lookup by name or coordinate")
+    print("- get_alerts_many / get_forecast_many: Batch versions of the above")
+    print("- get_hourly_forecast / get_gridpoint_series: Hourly data as compact columns")
+    print("- get_observations: Observed weather history with hourly or daily min/max/mean")
+    print("- search_alerts: Filter active alerts by state, zone, severity or event")
+    print("- get_alerts_for_point: Alerts whose area contains a coordinate or place")
+    print("- get_alert_changes: Alerts added, updated or expired since a cursor")
     
     
     print("Server will be available at:")
-    print("- HTTP API: http://localhost:8000")
-    print("- MCP over HTTP: http://localhost:8000/mcp")
+    print(f"- HTTP API: http://{WEATHER_HOST}:{WEATHER_PORT}")
+    print(f"- MCP over HTTP: http://{WEATHER_HOST}:{WEATHER_PORT}/mcp")
+    print("- Health: /health and /ready")
+    print("- Metrics: /metrics (Prometheus) and /stats (JSON)")
+    print("For several worker processes run mcp/serve.py instead.")
     
     # Run with uvicorn for HTTP transport
-    mcp.run(transport="http", host="127.0.0.1", port=8000)
\ No newline at end of file
+    mcp.run(transport="http", host=WEATHER_HOST, port=WEATHER_PORT)
\ No newline at end of file